@@ -1,7 +1,10 @@
 from logging_handler import create_logger, INFO, DEBUG
 import os
+import json
+import hashlib
 from importlib import import_module
 from .platforms._base import SbcPlatform_Base
+from .platforms._registry import get_registry
 
 VERSION = (1,0,5)
 
@@ -13,29 +16,115 @@ PLATFORM_INFO = namedtuple('PLATFORM_INFO', ('gpio_valid_values', 'dynamic_overl
 
 PLATFORM_BASE_DIR = os.path.join(os.path.dirname(__file__), 'platforms')
 
-def SBCPlatform(list_only=False, log_level=INFO) -> SbcPlatform_Base:
+# Platform identification cache.  The fingerprint is built from the devicetree model file, the kernel
+# release and the package version.  /run is a tmpfs so the disk cache is cleared on every reboot.
+PLATFORM_CACHE_FILE = '/run/sbc_gpio/platform_cache.json'
+PLATFORM_MODEL_FILE = '/sys/firmware/devicetree/base/model'
+# environment variable that selects the simulated platform (platforms/sim.py), part of the fingerprint
+PLATFORM_SIM_ENV = 'SBC_GPIO_SIM'
+_platform_cache = {}
+
+
+def platform_fingerprint() -> str:
+    ''' Return the fingerprint used to key the platform identification cache '''
+    fingerprint = hashlib.sha1()
+    try:
+        with open(PLATFORM_MODEL_FILE, 'rb') as model_file:
+            fingerprint.update(model_file.read())
+    except OSError:
+        pass
+    fingerprint.update(b'\x00' + os.uname().release.encode('utf-8'))
+    fingerprint.update(b'\x00' + '.'.join(str(x) for x in VERSION).encode('utf-8'))
+    fingerprint.update(b'\x00' + os.environ.get(PLATFORM_SIM_ENV, '').encode('utf-8'))
+    return fingerprint.hexdigest()
+
+
+def clear_platform_cache(disk=True) -> None:
+    ''' Invalidate the platform identification cache in memory and (optionally) on disk '''
+    _platform_cache.clear()
+    if disk:
+        try:
+            os.remove(PLATFORM_CACHE_FILE)
+        except FileNotFoundError:
+            pass
+
+
+def _read_platform_cache(fingerprint:str) -> dict|None:
+    ''' Return the cached platform entry for the fingerprint from memory or disk, or None '''
+    if fingerprint in _platform_cache:
+        return _platform_cache[fingerprint]
+    try:
+        with open(PLATFORM_CACHE_FILE, 'r', encoding='utf-8') as cache_file:
+            entry = json.loads(cache_file.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(entry, dict) or entry.get('fingerprint') != fingerprint:
+        return None
+    _platform_cache[fingerprint] = entry
+    return entry
+
+
+def _write_platform_cache(entry:dict, logger) -> None:
+    ''' Save the platform entry in memory and try to persist it to disk '''
+    _platform_cache[entry['fingerprint']] = entry
+    try:
+        os.makedirs(os.path.dirname(PLATFORM_CACHE_FILE), exist_ok=True)
+        tmp_file = f"{PLATFORM_CACHE_FILE}.{os.getpid()}"
+        with open(tmp_file, 'w', encoding='utf-8') as cache_file:
+            cache_file.write(json.dumps(entry))
+        os.replace(tmp_file, PLATFORM_CACHE_FILE)
+    except OSError as e:
+        logger.debug(f"{__name__}: Unable to write platform cache file {PLATFORM_CACHE_FILE}: {e}")
+
+
+def _cached_platform(fingerprint:str, log_level, logger) -> SbcPlatform_Base|None:
+    ''' Return the platform class from the cache without scanning all platform files, or None on a miss '''
+    entry = _read_platform_cache(fingerprint)
+    if entry is None:
+        return None
+    try:
+        module = import_module(f"sbc_gpio.platforms.{entry['module']}")
+        platform = module.SUPPORTED_PLATFORMS[entry['index']]
+        if platform.get('model') != entry.get('model'):
+            raise ValueError(f"cached model {entry.get('model')} does not match {platform.get('model')}")
+        sbc_platform = module.SbcPlatformClass(log_level=log_level, platform_index=entry['index'], serial=entry.get('serial'))
+    except Exception as e:
+        logger.debug(f"{__name__}: Discarding platform cache entry {entry}. Error: {e}")
+        clear_platform_cache()
+        return None
+    logger.debug(f"{__name__}: {entry['module']}: Matched platform from cache: {sbc_platform.description}")
+    return sbc_platform
+
+
+def SBCPlatform(list_only=False, log_level=INFO, use_cache=True) -> SbcPlatform_Base:
     ''' Identify the platform and return the SbcPlatformClass that matches '''
     logger = create_logger(console_level=log_level, name=__name__)
 
-    # Get a list of the platform files
-    logger.debug(f"{__name__}: Listing platform files from: {PLATFORM_BASE_DIR}")
-    platform_files = os.listdir(PLATFORM_BASE_DIR)
-    supported_platforms = []
+    fingerprint = platform_fingerprint() if use_cache and not list_only else None
+    if fingerprint is not None:
+        sbc_platform = _cached_platform(fingerprint, log_level, logger)
+        if sbc_platform is not None:
+            return sbc_platform
+
+    # Load the registry of all platform files (built once per process)
+    logger.debug(f"{__name__}: Loading platform files from: {PLATFORM_BASE_DIR}")
+    registry = get_registry(logger=logger)
+    for platform_file, error in registry.errors.items():
+        logger.warning(f'{__name__}: Unable to import {platform_file}. Error: {error}')
+    supported_platforms = registry.supported_platforms
     matched_platform = None
-    for platform_file in platform_files:
-        if platform_file.endswith('.py') and not platform_file.startswith('_'):
-            try:
-                logger.debug(f"{__name__}: {platform_file}: Testing platform file...")
-                module = import_module(f"sbc_gpio.platforms.{platform_file.split('.py')[0]}")
-                supported_platforms += [platform.get('description', platform.get('model')) for platform in module.SUPPORTED_PLATFORMS]
-                sbc_platform = module.SbcPlatformClass(log_level=log_level)
-                if sbc_platform.platform_matched:
-                    logger.info(f"{__name__}: {platform_file}: Matched platform: {sbc_platform.description}")
-                    if not list_only:
-                        return sbc_platform
-                    matched_platform = sbc_platform
-            except Exception as e:
-                logger.warning(f'{__name__}: Unable to import {platform_file}. Error: {e}')
+    match = registry.identify()
+    if match is not None:
+        module_name, index, identifier = match
+        try:
+            module = import_module(f"sbc_gpio.platforms.{module_name}")
+            matched_platform = module.SbcPlatformClass(log_level=log_level, platform_index=index)
+            logger.info(f"{__name__}: {module_name}: Matched platform: {matched_platform.description} using {identifier}")
+            if fingerprint is not None:
+                _write_platform_cache({'fingerprint': fingerprint, 'module': module_name, 'index': index,
+                                       'model': matched_platform.model, 'serial': matched_platform.serial}, logger)
+        except Exception as e:
+            logger.warning(f'{__name__}: Unable to load platform {module_name}. Error: {e}')
 
     if list_only:
         print(f'Supported platforms: {supported_platforms}')
@@ -43,5 +132,8 @@ def SBCPlatform(list_only=False, log_level=INFO) -> SbcPlatform_Base:
             print(f'Matched platform: {matched_platform.description}')
         quit()
 
+    if matched_platform is not None:
+        return matched_platform
+
     # platform wasn't identified
-    raise ImportError(f'Unable to identify platform.  Supported platforms: {supported_platforms}')
\ No newline at end of file
+    raise ImportError(f'Unable to identify platform.  Supported platforms: {supported_platforms}')
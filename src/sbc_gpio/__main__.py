@@ -12,6 +12,9 @@ available in the sbc_gpio/device_tests folder.
 Executing tests requires a config file that includes the GPIO info needed for each of the tests.
 A sample configuration file can be generated using the CLI options outlined below:
 
+Test modules are only imported when the key for the test is in the config file.  Tests from other
+packages can be added using the "sbc_gpio.device_tests" entry point group (see device_tests/_registry.py).
+
 
 Usage Example:
 =============
@@ -89,54 +92,20 @@ import json
 import sys
 from time import sleep
 from logging_handler import create_logger, INFO, WARNING
-from sbc_gpio.device_tests.led_gpiod import DevTest_LED
-from sbc_gpio.device_tests.button_gpiod import DevTest_Button
-from sbc_gpio.device_tests.i2c_display import DevTest_I2CDisp
-from sbc_gpio.device_tests.ir import DevTest_IR
-from sbc_gpio.device_tests.dht_spi import DevTest_DHT
-from sbc_gpio.device_tests.bmx_spi import DevTest_BMX
-from sbc_gpio.device_tests.uart import DevTest_UART
+from sbc_gpio.device_tests._registry import create_tests
 from . import SBCPlatform
 
 
-def run_test(run_secs=60, log_file='', led=None, btn=None, dht=None, ir=None, dht_spi=None, dht22=False, bmx=None, bmx_spi=None, i2c=None, log_level=INFO,
-             uart_dev=None, usb_dev=None, spi_cs=None):
-    ''' Run a basic set of tests on the specified devices.  All tests are run in parallel for a number of seconds.'''
+def run_test(run_secs=60, log_file='', log_level=INFO, **config):
+    ''' Run a basic set of tests on the specified devices.  All tests are run in parallel for a number of seconds.
+        Each config key selects a test (see device_tests/_registry.py), test modules are only imported if used.'''
     logger = create_logger(console_level=log_level, name='SBC_Tester', log_file=log_file, file_level=log_level)
-    logger.debug(f'Running test for {run_secs} with the following-> LED: {led}, BTN: {btn}, DHT: {dht}, DHT_SPI: {dht_spi}, DHT22: {dht22}, IR: {ir}, BMX: {bmx}, BMX_SPI: {bmx_spi}, SPI_CS: {spi_cs}, I2C: {i2c} UART_DEV: {uart_dev}, USB_DEV: {usb_dev}')
+    logger.debug(f'Running test for {run_secs} with the following-> {config}')
 
     # loop through and start each test
     platform = SBCPlatform()
     # only run a test if passed values are not None or empty string
-    tests = []
-    if led is not None and led != '':
-        if platform.gpio_is_valid(led):
-            tests.append(DevTest_LED(gpio=platform.get_gpio_out(led), log_level=log_level))
-        else:
-            logger.error('Unable to run LED test. %i not a valid GPIO (%s)', led, platform.gpio_valid_values)
-    if btn is not None and btn != '':
-        if platform.gpio_is_valid(btn):
-            tests.append(DevTest_Button(gpio=platform.get_gpio_in(btn), log_level=log_level))
-        else:
-            logger.error('Unable to run BTN test. %i not a valid GPIO (%s)', btn, platform.gpio_valid_values)
-    if dht is not None and dht != '' and isinstance(dht_spi, int):
-        if platform.gpio_is_valid(dht):
-            tests.append(DevTest_DHT(spi_bus=dht_spi, dht22=dht22, gpio_tuple=platform.gpio_tuple(dht), log_level=log_level, spi_cs=spi_cs if spi_cs is not None else 0))
-        else:
-            logger.error('Unable to run DHT test. %i not a valid GPIO (%s)', dht, platform.gpio_valid_values)
-    if bmx is not None and bmx != '' and isinstance(bmx_spi, int):
-        if platform.gpio_is_valid(bmx):
-            tests.append(DevTest_BMX(spi_bus=bmx_spi, gpio_tuple=platform.gpio_tuple(bmx), log_level=log_level, spi_cs=spi_cs if spi_cs is not None else 0))
-        else:
-            logger.error('Unable to run BMX test. %i not a valid GPIO (%s)', bmx, platform.gpio_valid_values)
-    if isinstance(i2c, int) and i2c in platform.i2c_buses():
-        tests.append(DevTest_I2CDisp(port=i2c, log_level=log_level))
-    elif i2c is not None:
-        logger.error(f'Unable to run i2c test.  {i2c} not in {platform.i2c_buses()}')
-    if isinstance(ir, bool) and ir:
-        tests.append(DevTest_IR(log_level=log_level))
-    if uart_dev is not None and usb_dev is not None:
-        tests.append(DevTest_UART(uart_dev, usb_dev, log_level=log_level))
+    tests = create_tests(platform, config, log_level, logger)
 
     # start the tests
     for test in tests:
@@ -0,0 +1,75 @@
+'''
+Benchmark for event callback dispatch.  Submits a burst of events for a number of pins and reports the
+throughput, the peak thread count, dropped callbacks and callbacks that ran out of order for the pin.
+Compares a new thread per event (the previous behavior) with each CallbackExecutor mode.
+
+Usage:
+$ python3 -m sbc_gpio.benchmarks.callback_executor
+$ python3 -m sbc_gpio.benchmarks.callback_executor --events 20000 --pins 8 --work-us 50
+'''
+import argparse
+import threading
+from time import perf_counter, perf_counter_ns
+from sbc_gpio.gpio_libs._executor import CallbackExecutor, INLINE, POOL, ORDERED
+
+
+class Recorder:
+    ''' Callback target that records the order of events per pin and the peak thread count '''
+    def __init__(self, work_us:int):
+        self.work_ns = work_us * 1000
+        self.lock = threading.Lock()
+        self.last = {}
+        self.received = 0
+        self.out_of_order = 0
+        self.max_threads = 0
+
+    def callback(self, gpio, count, **kwargs):
+        end_ns = perf_counter_ns() + self.work_ns
+        while perf_counter_ns() < end_ns:
+            pass
+        with self.lock:
+            self.received += 1
+            if count < self.last.get(gpio, -1):
+                self.out_of_order += 1
+            self.last[gpio] = count
+            self.max_threads = max(self.max_threads, threading.active_count())
+
+
+def thread_per_event(recorder:Recorder, events:int, pins:int):
+    ''' Start a new thread for every event '''
+    threads = []
+    for count in range(events):
+        thread = threading.Thread(target=recorder.callback, kwargs={'gpio': count % pins, 'count': count})
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return {}
+
+
+def executor(mode:str):
+    ''' Return a benchmark function that runs the events on a CallbackExecutor in the mode '''
+    def run(recorder:Recorder, events:int, pins:int):
+        callback_executor = CallbackExecutor(mode=mode, max_queue=events, name=f'benchmark-{mode}', log_level='CRITICAL')
+        for count in range(events):
+            callback_executor.submit(count % pins, recorder.callback, {'gpio': count % pins, 'count': count})
+        callback_executor.shutdown()
+        return callback_executor.stats()
+    return run
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare thread per event callbacks with the callback executor")
+    parser.add_argument('--events', required=False, type=int, default=5000, help="(5000) Number of events to submit")
+    parser.add_argument('--pins', required=False, type=int, default=4, help="(4) Number of pins the events are spread over")
+    parser.add_argument('--work-us', required=False, type=int, default=10, help="(10) Busy time of each callback in microseconds")
+    args = parser.parse_args()
+
+    for name, func in (('thread per event', thread_per_event), (INLINE, executor(INLINE)), (POOL, executor(POOL)),
+                       (ORDERED, executor(ORDERED))):
+        recorder = Recorder(args.work_us)
+        start = perf_counter()
+        stats = func(recorder, args.events, args.pins)
+        elapsed = perf_counter() - start
+        print(f"{name:16} {args.events / elapsed:10.0f} events/sec, peak threads {recorder.max_threads:5}, "
+              f"out of order {recorder.out_of_order:5}, dropped {stats.get('dropped', 0)}")
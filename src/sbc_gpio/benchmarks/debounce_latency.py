@@ -0,0 +1,68 @@
+'''
+Benchmark for the edge latency with userspace debounce and kernel debounce (GPIO uAPI v2 debounce_period_us).
+Requires an output looped back to an input with a jumper wire.  The output is toggled and the time from the
+write to the callback is measured for each debounce mode.  With userspace debounce every edge is delayed by at
+least debounce_ms in Python, with kernel debounce the kernel delays the edge and Python receives it directly.
+The callback timestamp is the monotonic clock (gpiod, uAPI, sim) or time() for the RPi.GPIO 'time' argument.
+
+Usage:
+$ python3 -m sbc_gpio.benchmarks.debounce_latency --out 17 --in 27
+$ python3 -m sbc_gpio.benchmarks.debounce_latency --out 17 --in 27 --debounce 5 --count 200
+'''
+import argparse
+from threading import Event
+from time import monotonic, time, sleep
+import sbc_gpio
+from sbc_gpio import PULL
+
+
+def measure(platform, out_gpio, in_gpio, debounce_ms:int, count:int, kernel_debounce:bool) -> dict:
+    ''' Toggle the output count times and return the latency statistics for the debounce mode '''
+    received, latencies, kernel_latencies = Event(), [], []
+    # write time on the monotonic clock and on the time() clock (RPi.GPIO callbacks)
+    write_time = [0.0, 0.0]
+
+    def callback(**kwargs):
+        latencies.append(monotonic() - write_time[0])
+        if 'timestamp' in kwargs:
+            kernel_latencies.append(kwargs['timestamp'] - write_time[0])
+        elif 'time' in kwargs:
+            kernel_latencies.append(kwargs['time'] - write_time[1])
+        received.set()
+
+    gpio_out = platform.get_gpio_out(out_gpio, log_level='CRITICAL', initial_state=0)
+    gpio_in = platform.get_gpio_in(in_gpio, pull=PULL.DOWN, debounce_ms=debounce_ms, callback=callback, log_level='CRITICAL',
+                                   kernel_debounce=kernel_debounce)
+    missed = 0
+    sleep(0.1)
+    for value in range(1, count + 1):
+        received.clear()
+        write_time[0], write_time[1] = monotonic(), time()
+        gpio_out.set_high() if value % 2 else gpio_out.set_low()
+        if not received.wait(1 + debounce_ms / 1000):
+            missed += 1
+        sleep(debounce_ms / 1000 * 2)
+    used_kernel_debounce = gpio_in._kernel_debounce
+    gpio_in.close()
+    gpio_out.close()
+    latencies, kernel_latencies = sorted(latencies), sorted(kernel_latencies)
+    return {'kernel_debounce': used_kernel_debounce, 'missed': missed,
+            'callback_p50_ms': latencies[len(latencies) // 2] * 1000 if len(latencies) > 0 else None,
+            'callback_p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if len(latencies) > 0 else None,
+            'timestamp_p50_ms': kernel_latencies[len(kernel_latencies) // 2] * 1000 if len(kernel_latencies) > 0 else None}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the edge latency with userspace and kernel debounce (requires a loopback wire)")
+    parser.add_argument('--out', required=True, type=str, help="Output GPIO (wired to the input)")
+    parser.add_argument('--in', dest='in_gpio', required=True, type=str, help="Input GPIO (wired to the output)")
+    parser.add_argument('--debounce', required=False, type=int, default=10, help="(10) Debounce in ms")
+    parser.add_argument('--count', required=False, type=int, default=100, help="(100) Number of edges to measure")
+    args = parser.parse_args()
+
+    platform = sbc_gpio.SBCPlatform(log_level='CRITICAL')
+    for name, kernel_debounce in (('userspace debounce', False), ('kernel debounce', True)):
+        results = measure(platform, args.out, args.in_gpio, args.debounce, args.count, kernel_debounce)
+        print(f"{name}:")
+        for key, value in results.items():
+            print(f"    {key:22} {value:10.3f}" if isinstance(value, float) else f"    {key:22} {value!s:>10}")
@@ -0,0 +1,93 @@
+'''
+Benchmark for idle cost and event latency of watching many input pins.  Pipes stand in for the line
+event fds so no hardware is needed.  Compares the previous model (one thread per pin polling with a
+1 second timeout) with the shared event dispatcher (one thread waiting on all fds).
+
+Usage:
+$ python3 -m sbc_gpio.benchmarks.event_dispatch
+$ python3 -m sbc_gpio.benchmarks.event_dispatch --pins 64 --idle 5 --events 1000
+'''
+import argparse
+import os
+import select
+import threading
+from time import perf_counter_ns, process_time_ns, sleep
+from sbc_gpio.gpio_libs._dispatcher import EventDispatcher
+
+
+def thread_per_pin(pins:int, idle_secs:float, events:int) -> dict:
+    ''' Watch each pipe from its own thread (select with a 1 second timeout like the previous event thread) '''
+    pipes = [os.pipe() for _ in range(pins)]
+    stop, received, latencies = False, threading.Event(), []
+
+    def watch(read_fd):
+        while not stop:
+            if select.select([read_fd], [], [], 1)[0]:
+                sent_ns = int.from_bytes(os.read(read_fd, 8), 'little')
+                latencies.append(perf_counter_ns() - sent_ns)
+                received.set()
+
+    threads = [threading.Thread(target=watch, args=(read_fd,), daemon=True) for read_fd, _ in pipes]
+    for thread in threads:
+        thread.start()
+    results = _measure(pipes, idle_secs, events, received, latencies)
+    stop = True
+    for thread in threads:
+        thread.join()
+    for read_fd, write_fd in pipes:
+        os.close(read_fd)
+        os.close(write_fd)
+    return results
+
+
+def dispatcher(pins:int, idle_secs:float, events:int) -> dict:
+    ''' Watch every pipe from the shared event dispatcher '''
+    pipes = [os.pipe() for _ in range(pins)]
+    received, latencies = threading.Event(), []
+    event_dispatcher = EventDispatcher(name='benchmark-dispatcher', log_level='CRITICAL')
+
+    def on_readable(read_fd):
+        sent_ns = int.from_bytes(os.read(read_fd, 8), 'little')
+        latencies.append(perf_counter_ns() - sent_ns)
+        received.set()
+
+    for read_fd, _ in pipes:
+        event_dispatcher.register(read_fd, lambda read_fd=read_fd: on_readable(read_fd))
+    results = _measure(pipes, idle_secs, events, received, latencies)
+    results['wakeups'] = event_dispatcher.stats()['wakeups']
+    for read_fd, write_fd in pipes:
+        event_dispatcher.unregister(read_fd)
+        os.close(read_fd)
+        os.close(write_fd)
+    return results
+
+
+def _measure(pipes:list, idle_secs:float, events:int, received:threading.Event, latencies:list) -> dict:
+    ''' Measure the idle CPU time and thread count, then the latency of events written to the pipes '''
+    sleep(0.1)
+    threads = threading.active_count()
+    cpu_start = process_time_ns()
+    sleep(idle_secs)
+    idle_cpu_ns = process_time_ns() - cpu_start
+    for count in range(events):
+        received.clear()
+        os.write(pipes[count % len(pipes)][1], perf_counter_ns().to_bytes(8, 'little'))
+        received.wait(1)
+    latencies = sorted(latencies)
+    return {'threads': threads, 'idle_cpu_ms_per_sec': idle_cpu_ns / 1e6 / idle_secs,
+            'latency_p50_us': latencies[len(latencies) // 2] / 1000 if len(latencies) > 0 else None,
+            'latency_p99_us': latencies[int(len(latencies) * 0.99)] / 1000 if len(latencies) > 0 else None}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare thread per pin and the shared event dispatcher")
+    parser.add_argument('--pins', required=False, type=int, default=32, help="(32) Number of simulated input pins")
+    parser.add_argument('--idle', required=False, type=float, default=3, help="(3) Seconds to measure the idle CPU time")
+    parser.add_argument('--events', required=False, type=int, default=500, help="(500) Number of events to measure latency")
+    args = parser.parse_args()
+
+    for name, func in (('thread per pin', thread_per_pin), ('event dispatcher', dispatcher)):
+        results = func(args.pins, args.idle, args.events)
+        print(f"{name}:")
+        for key, value in results.items():
+            print(f"    {key:22} {value:10.2f}" if isinstance(value, float) else f"    {key:22} {value:>10}")
@@ -0,0 +1,61 @@
+'''
+Benchmark for the import time and memory used when identifying the platform.  Runs a new interpreter
+with "python -X importtime" and reports the total import time, the slowest imports, the peak RSS of the
+process and any GPIO libraries that were imported.  GPIO libraries are only expected to be imported
+when a GPIO is requested, not when the platform is identified.
+
+Usage:
+$ python3 -m sbc_gpio.benchmarks.import_time
+$ python3 -m sbc_gpio.benchmarks.import_time --gpio 17
+'''
+import argparse
+import re
+import resource
+import subprocess
+import sys
+
+GPIO_LIB_MODULES = ('gpiod', 'RPi.GPIO', 'sbc_gpio.gpio_libs.lib_gpiod', 'sbc_gpio.gpio_libs.lib_gpiod2', 'sbc_gpio.gpio_libs.lib_uapi', 'sbc_gpio.gpio_libs.rpi_gpio', 'sbc_gpio.gpio_libs.mmap_bcm')
+
+SAMPLE_CODE = '''
+import sys
+import sbc_gpio
+from sbc_gpio.platforms._registry import get_registry
+registry = get_registry()
+if len(sys.argv) > 1:
+    platform = sbc_gpio.SBCPlatform(log_level='CRITICAL', use_cache=False)
+    platform.get_gpio_out(sys.argv[1]).close()
+'''
+
+IMPORT_TIME_RE = re.compile(r'^import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|(?P<indent>\s+)(?P<module>\S+)$')
+
+
+def import_times(gpio=None) -> tuple:
+    ''' Run the sample code with -X importtime.  Returns ([(self us, cumulative us, module, level)], max rss kB) '''
+    cmd = [sys.executable, '-X', 'importtime', '-c', SAMPLE_CODE] + ([str(gpio)] if gpio is not None else [])
+    out = subprocess.run(cmd, capture_output=True, check=False)
+    imports = []
+    for line in out.stderr.decode('utf-8').splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            imports.append((int(match.group('self')), int(match.group('cumulative')), match.group('module'),
+                            (len(match.group('indent')) - 1) // 2))
+    return imports, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Report the import time and memory for platform identification")
+    parser.add_argument('--gpio', required=False, type=str, default=None, help="Also request this GPIO as an output (loads the GPIO library)")
+    parser.add_argument('--top', required=False, type=int, default=10, help="(10) Number of slowest imports to list")
+    args = parser.parse_args()
+
+    imports, max_rss = import_times(args.gpio)
+    total_us = sum(cumulative for _, cumulative, _, level in imports if level == 0)
+    sbc_gpio_us = sum(cumulative for _, cumulative, module, level in imports if level == 0 and module.startswith('sbc_gpio'))
+    print(f"Total import time:     {total_us / 1000:8.2f}ms")
+    print(f"sbc_gpio import time:  {sbc_gpio_us / 1000:8.2f}ms")
+    print(f"Peak RSS:              {max_rss / 1024:8.2f}MB")
+    gpio_libs = [module for _, _, module, _ in imports if module in GPIO_LIB_MODULES]
+    print(f"GPIO libraries loaded: {', '.join(gpio_libs) if len(gpio_libs) > 0 else 'none'}")
+    print(f"Slowest {args.top} imports (self time):")
+    for self_us, cumulative, module, _ in sorted(imports, reverse=True)[:args.top]:
+        print(f"    {self_us / 1000:8.2f}ms (cumulative {cumulative / 1000:8.2f}ms) {module}")
@@ -0,0 +1,79 @@
+'''
+Benchmark for the cost of the pin objects: construction time, memory per object and the set_high/set_low
+time.  The base classes (no hardware) are always measured.  If a GPIO is passed, each GPIO library that can
+be imported on this device is measured by requesting and releasing the line count times.
+
+Usage:
+$ python3 -m sbc_gpio.benchmarks.pin_objects
+$ python3 -m sbc_gpio.benchmarks.pin_objects --gpio 17 --count 1000 --libs lib_uapi mmap_bcm
+'''
+import argparse
+import sys
+from time import perf_counter_ns
+from sbc_gpio import EVENT, PULL
+from sbc_gpio.gpio_libs._generic_gpio import GpioIn, GpioOut
+
+GPIO_LIBS = ('lib_gpiod2', 'lib_gpiod', 'lib_uapi', 'rpi_gpio', 'mmap_bcm')
+
+
+def object_size(gpio) -> int:
+    ''' Return the bytes used by the object and its attribute dict (if the class does not use __slots__) '''
+    return sys.getsizeof(gpio) + (sys.getsizeof(gpio.__dict__) if hasattr(gpio, '__dict__') else 0)
+
+
+def construct_base(count:int) -> dict:
+    ''' Construct count base GpioIn and GpioOut objects (kept alive) and return the time and size per object '''
+    results = {}
+    for cls, kwargs in ((GpioOut, {'pull': PULL.NONE}),
+                        (GpioIn, {'event': EVENT.BOTH, 'callback': None, 'debounce_ms': 0, 'pull': PULL.DOWN})):
+        blocks = sys.getallocatedblocks()
+        start = perf_counter_ns()
+        gpios = [cls(name=f'pin{pin}', log_level='CRITICAL', **kwargs) for pin in range(count)]
+        elapsed = perf_counter_ns() - start
+        results[cls.__name__] = {'ns_per_object': elapsed / count, 'bytes_per_object': object_size(gpios[0]),
+                                 'blocks_per_object': (sys.getallocatedblocks() - blocks) / count}
+    return results
+
+
+def construct_lib(gpio_lib, gpio_tuple:tuple, count:int) -> dict:
+    ''' Request and release the output count times and return the time per object, the size and the toggle time '''
+    start = perf_counter_ns()
+    for _ in range(count):
+        gpio_lib.GpioOut(gpio_tuple[1], gpio_tuple[0], log_level='CRITICAL').close()
+    elapsed = perf_counter_ns() - start
+    gpio = gpio_lib.GpioOut(gpio_tuple[1], gpio_tuple[0], log_level='CRITICAL')
+    set_high, set_low = gpio.set_high, gpio.set_low
+    toggle_start = perf_counter_ns()
+    for _ in range(count):
+        set_high()
+        set_low()
+    toggle_elapsed = perf_counter_ns() - toggle_start
+    size = object_size(gpio)
+    gpio.close()
+    return {'ns_per_object': elapsed / count, 'bytes_per_object': size, 'ns_per_write': toggle_elapsed / count / 2}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure the construction, memory and toggle cost of the pin objects")
+    parser.add_argument('--gpio', required=False, type=str, default=None, help="Output GPIO for the library tests (nothing should be connected)")
+    parser.add_argument('--count', required=False, type=int, default=1000, help="(1000) Number of objects to construct")
+    parser.add_argument('--libs', required=False, nargs='+', default=GPIO_LIBS, help=f"({' '.join(GPIO_LIBS)}) GPIO libraries to test")
+    args = parser.parse_args()
+
+    for class_name, results in construct_base(args.count).items():
+        print(f"{'base ' + class_name:20} {results['ns_per_object']:10.0f}ns/object {results['bytes_per_object']:6} bytes/object "
+              f"{results['blocks_per_object']:6.1f} blocks/object")
+    if args.gpio is not None:
+        import sbc_gpio
+        from sbc_gpio.platforms._base import load_gpio_lib
+        platform = sbc_gpio.SBCPlatform(log_level='CRITICAL')
+        gpio_tuple = tuple(platform.gpio_tuple(args.gpio))
+        for lib_name in args.libs:
+            try:
+                gpio_lib = load_gpio_lib(f'sbc_gpio.gpio_libs.{lib_name}')
+            except ImportError as e:
+                print(f"{lib_name:20} not available: {e}")
+                continue
+            results = construct_lib(gpio_lib, gpio_tuple, args.count)
+            print(f"{lib_name:20} {results['ns_per_object']:10.0f}ns/object {results['bytes_per_object']:6} bytes/object "
+                  f"{results['ns_per_write']:8.0f}ns/write")
@@ -0,0 +1,70 @@
+'''
+Benchmark for the platform identification cache.  Compares the time to identify the platform
+with a cold cache (scan and import every platform file), a warm disk cache (new process) and
+a warm memory cache (same process).  Each sample runs in a fresh interpreter so module imports
+are included in the measurement.
+
+Usage:
+$ python3 -m sbc_gpio.benchmarks.platform_cache --iterations 20
+'''
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from statistics import mean, median
+
+SAMPLE_CODE = '''
+import time, sys
+start = time.perf_counter_ns()
+import sbc_gpio
+sbc_gpio.PLATFORM_CACHE_FILE = sys.argv[1]
+if sys.argv[2] == 'cold':
+    sbc_gpio.clear_platform_cache()
+try:
+    sbc_gpio.SBCPlatform(log_level='CRITICAL')
+except ImportError:
+    pass
+first = time.perf_counter_ns()
+try:
+    sbc_gpio.SBCPlatform(log_level='CRITICAL')
+except ImportError:
+    pass
+second = time.perf_counter_ns()
+print(first - start, second - first)
+'''
+
+
+def run_sample(cache_file:str, mode:str) -> tuple:
+    ''' Run a single identification in a new interpreter, returns (first call ns, second call ns) '''
+    out = subprocess.run([sys.executable, '-c', SAMPLE_CODE, cache_file, mode], capture_output=True, check=True)
+    first, second = out.stdout.decode('utf-8').split()
+    return int(first), int(second)
+
+
+def print_results(name:str, samples:list) -> None:
+    ''' Print the summary for a list of samples in ns '''
+    print(f"{name:<22} mean: {mean(samples) / 1e6:8.2f}ms  median: {median(samples) / 1e6:8.2f}ms  " \
+          f"min: {min(samples) / 1e6:8.2f}ms  max: {max(samples) / 1e6:8.2f}ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare cold and warm platform identification time")
+    parser.add_argument('--iterations', required=False, type=int, default=10, help="(10) Number of processes to start per test")
+    parser.add_argument('--cache-file', dest='cache_file', required=False, type=str, default=None,
+                        help="Cache file to use (default is a temporary file)")
+    args = parser.parse_args()
+
+    cache_file = args.cache_file if args.cache_file is not None else os.path.join(tempfile.mkdtemp(), 'platform_cache.json')
+    cold, warm_disk, warm_memory = [], [], []
+    for _ in range(args.iterations):
+        cold.append(run_sample(cache_file, 'cold')[0])
+    for _ in range(args.iterations):
+        first, second = run_sample(cache_file, 'warm')
+        warm_disk.append(first)
+        warm_memory.append(second)
+    if not os.path.exists(cache_file):
+        print('NOTE: Platform was not identified (or cache not writable), warm results did not use the cache.')
+    print_results('Cold (scan)', cold)
+    print_results('Warm (disk cache)', warm_disk)
+    print_results('Warm (memory cache)', warm_memory)
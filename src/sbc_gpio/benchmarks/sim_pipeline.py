@@ -0,0 +1,107 @@
+'''
+Benchmark for the throughput and latency of the whole input event pipeline on the simulated platform (no
+hardware needed).  Each simulated output is wired to an input on the other simulated chip, so every write
+goes through the event pipe, the shared event dispatcher, the edge filter and the callback executor.  The
+latency is the time from the synthetic edge timestamp (the time of the write) to the callback.  Bounce is
+only injected for the throughput test (the bounce edges have timestamps after the write).
+
+Usage:
+$ python3 -m sbc_gpio.benchmarks.sim_pipeline
+$ python3 -m sbc_gpio.benchmarks.sim_pipeline --pins 8 --events 2000 --burst 1000 --executor ordered --bounce 2
+'''
+import argparse
+import os
+import threading
+from time import monotonic_ns, perf_counter_ns, process_time_ns, sleep
+import sbc_gpio
+from sbc_gpio.gpio_libs._executor import CallbackExecutor, INLINE, POOL, ORDERED
+
+
+def setup(pins:int, executor:CallbackExecutor, callback) -> tuple:
+    ''' Select the simulated platform and wire output gpio n to input gpio 32 + n.  Returns (outputs, inputs) '''
+    os.environ[sbc_gpio.PLATFORM_SIM_ENV] = '1'
+    platform = sbc_gpio.SBCPlatform(log_level='CRITICAL', use_cache=False)
+    from sbc_gpio.gpio_libs.sim import SIMULATOR
+    SIMULATOR.reset()
+    outputs, inputs = [], []
+    for pin in range(pins):
+        SIMULATOR.connect(platform.gpio_tuple(pin), platform.gpio_tuple(32 + pin))
+        outputs.append(platform.get_gpio_out(pin, log_level='CRITICAL'))
+        gpio_in = platform.get_gpio_in(32 + pin, debounce_ms=0, callback=callback, log_level='CRITICAL')
+        gpio_in.executor = executor
+        inputs.append(gpio_in)
+    return outputs, inputs
+
+
+def latency(outputs:list, events:int, received:threading.Event, latencies:list) -> dict:
+    ''' Write one edge at a time and wait for the callback '''
+    for count in range(events):
+        received.clear()
+        gpio_out = outputs[count % len(outputs)]
+        gpio_out.set_low() if (count // len(outputs)) & 1 else gpio_out.set_high()
+        received.wait(1)
+    ordered = sorted(latencies)
+    return {'latency_p50_us': ordered[len(ordered) // 2] / 1000 if len(ordered) > 0 else None,
+            'latency_p99_us': ordered[int(len(ordered) * 0.99)] / 1000 if len(ordered) > 0 else None,
+            'latency_max_us': ordered[-1] / 1000 if len(ordered) > 0 else None}
+
+
+def throughput(inputs:list, outputs:list, burst:int, bounce:int, callbacks:list, timeout=10.0) -> dict:
+    ''' Write burst edges per output as fast as possible and wait until the callbacks stop arriving '''
+    from sbc_gpio.gpio_libs.sim import SIMULATOR
+    for gpio_in in inputs:
+        SIMULATOR.set_bounce((gpio_in.gpio_chip, gpio_in.gpio_pin), edges=bounce, interval_us=5)
+    edges = burst * len(outputs) * (2 * bounce + 1)
+    expected = callbacks[0] + edges
+    # every write changes the output
+    writes = [(gpio_out.set_high, gpio_out.set_low) if gpio_out.state == 0 else (gpio_out.set_low, gpio_out.set_high) for gpio_out in outputs]
+    cpu_start, start = process_time_ns(), perf_counter_ns()
+    for count in range(burst):
+        for first, second in writes:
+            (second if count & 1 else first)()
+    write_ns = perf_counter_ns() - start
+    deadline = monotonic_ns() + int(timeout * 1e9)
+    last = -1
+    while callbacks[0] < expected and monotonic_ns() < deadline:
+        if callbacks[0] == last:
+            # no progress, the remaining events were dropped
+            break
+        last = callbacks[0]
+        sleep(0.05)
+    elapsed_ns = perf_counter_ns() - start
+    delivered = callbacks[0] - (expected - edges)
+    return {'writes_per_sec': burst * len(outputs) / (write_ns / 1e9), 'callbacks_per_sec': delivered / (elapsed_ns / 1e9),
+            'delivered': delivered, 'cpu_us_per_event': (process_time_ns() - cpu_start) / 1000 / max(delivered, 1)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure the event pipeline throughput and latency with the simulated GPIO library")
+    parser.add_argument('--pins', required=False, type=int, default=4, help="(4) Number of output/input pairs (max 32)")
+    parser.add_argument('--events', required=False, type=int, default=1000, help="(1000) Number of edges for the latency test")
+    parser.add_argument('--burst', required=False, type=int, default=1000, help="(1000) Edges per pin for the throughput test")
+    parser.add_argument('--executor', required=False, type=str, default=INLINE, choices=(INLINE, POOL, ORDERED), help=f"({INLINE}) Callback executor mode")
+    parser.add_argument('--bounce', required=False, type=int, default=0, help="(0) Extra edge pairs injected on every change of an input")
+    args = parser.parse_args()
+
+    received, latencies, callbacks, lock = threading.Event(), [], [0], threading.Lock()
+
+    def on_edge(event, timestamp, state, gpio):
+        latency_ns = monotonic_ns() - int(timestamp * 1e9)
+        with lock:
+            latencies.append(latency_ns)
+            callbacks[0] += 1
+        received.set()
+
+    executor = CallbackExecutor(mode=args.executor, max_queue=args.burst * args.pins * (2 * args.bounce + 1), log_level='CRITICAL')
+    outputs, inputs = setup(min(args.pins, 32), executor, on_edge)
+    sleep(0.1)
+    results = latency(outputs, args.events, received, latencies)
+    print(f"latency     p50 {results['latency_p50_us']:8.1f}us  p99 {results['latency_p99_us']:8.1f}us  max {results['latency_max_us']:8.1f}us")
+    results = throughput(inputs, outputs, args.burst, args.bounce, callbacks)
+    print(f"throughput  {results['writes_per_sec']:10.0f} writes/sec  {results['callbacks_per_sec']:10.0f} callbacks/sec  "
+          f"{results['delivered']} delivered  {results['cpu_us_per_event']:.1f}us cpu/event")
+    from sbc_gpio.gpio_libs.sim import SIMULATOR
+    print(f"simulator   {SIMULATOR.stats()}")
+    print(f"executor    {executor.stats()}")
+    for gpio in outputs + inputs:
+        gpio.close()
@@ -0,0 +1,40 @@
+'''
+Benchmark for the software PWM engine.  Runs the engine with 1..N of the gpios (all at the same frequency
+and duty cycle) and reports the writes per second, the jitter from the deadline to the write and the CPU
+time used by the timing thread, to show how the cost scales with the number of channels.
+
+Usage:
+$ python3 -m sbc_gpio.benchmarks.soft_pwm --gpios 17 27 22 23
+$ python3 -m sbc_gpio.benchmarks.soft_pwm --gpios 17 27 22 23 --frequency 500 --duty 0.3 --seconds 5
+'''
+import argparse
+from time import sleep
+import sbc_gpio
+from sbc_gpio.soft_pwm import SoftPWM
+
+
+def run_pwm(platform, gpios:list, frequency_hz:float, duty_cycle:float, seconds:float) -> dict:
+    ''' Run the PWM engine on the gpios and return the engine stats '''
+    pwm = SoftPWM(platform, gpios, frequency_hz=frequency_hz, duty_cycle=duty_cycle, log_level='CRITICAL')
+    pwm.start()
+    sleep(seconds)
+    pwm.stop()
+    stats = pwm.stats()
+    pwm.close()
+    return stats
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure the software PWM jitter and CPU cost per channel count")
+    parser.add_argument('--gpios', required=True, nargs='+', help="Output GPIOs to drive (nothing should be connected)")
+    parser.add_argument('--frequency', required=False, type=float, default=200, help="(200) PWM frequency in Hz")
+    parser.add_argument('--duty', required=False, type=float, default=0.5, help="(0.5) PWM duty cycle 0.0-1.0")
+    parser.add_argument('--seconds', required=False, type=float, default=2, help="(2) Seconds to run each channel count")
+    args = parser.parse_args()
+
+    platform = sbc_gpio.SBCPlatform(log_level='CRITICAL')
+    for count in range(1, len(args.gpios) + 1):
+        stats = run_pwm(platform, args.gpios[:count], args.frequency, args.duty, args.seconds)
+        print(f"{count:3} channels: {stats['writes'] / args.seconds:10.0f} writes/sec {stats['edges'] / args.seconds:10.0f} edges/sec, "
+              f"jitter mean {stats['jitter_mean_ns'] / 1000:8.1f}us max {stats['jitter_max_ns'] / 1000:8.1f}us, "
+              f"cpu {stats['cpu_ns'] / 1e6 / args.seconds:6.1f}ms/sec, skipped {stats['skipped']}")
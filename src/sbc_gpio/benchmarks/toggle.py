@@ -0,0 +1,54 @@
+'''
+Benchmark for the output toggle rate of each GPIO library that can be imported on this device.  Reports
+the time per set_high/set_low call and the number of memory blocks still allocated after the loop (the
+uAPI and mmap_bcm libraries are expected to allocate nothing in the hot path).
+
+Usage:
+$ python3 -m sbc_gpio.benchmarks.toggle --gpio 17
+$ python3 -m sbc_gpio.benchmarks.toggle --gpio 17 --count 100000 --libs lib_uapi lib_gpiod2
+'''
+import argparse
+import sys
+from time import perf_counter_ns
+import sbc_gpio
+from sbc_gpio.platforms._base import load_gpio_lib
+
+GPIO_LIBS = ('lib_gpiod2', 'lib_gpiod', 'lib_uapi', 'rpi_gpio', 'mmap_bcm')
+
+
+def toggle(gpio_lib, gpio_tuple:tuple, count:int) -> dict:
+    ''' Toggle the output count times and return the time per write and the memory blocks allocated '''
+    gpio = gpio_lib.GpioOut(gpio_tuple[1], gpio_tuple[0], log_level='CRITICAL')
+    set_high, set_low = gpio.set_high, gpio.set_low
+    for _ in range(100):
+        set_high()
+        set_low()
+    blocks = sys.getallocatedblocks()
+    start = perf_counter_ns()
+    for _ in range(count):
+        set_high()
+        set_low()
+    elapsed = perf_counter_ns() - start
+    blocks = sys.getallocatedblocks() - blocks
+    gpio.close()
+    return {'ns_per_write': elapsed / count / 2, 'writes_per_sec': count * 2 / (elapsed / 1e9), 'allocated_blocks': blocks}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the output toggle rate of the GPIO libraries")
+    parser.add_argument('--gpio', required=True, type=str, help="Output GPIO to toggle (nothing should be connected)")
+    parser.add_argument('--count', required=False, type=int, default=20000, help="(20000) Number of high/low cycles")
+    parser.add_argument('--libs', required=False, nargs='+', default=GPIO_LIBS, help=f"({' '.join(GPIO_LIBS)}) GPIO libraries to test")
+    args = parser.parse_args()
+
+    platform = sbc_gpio.SBCPlatform(log_level='CRITICAL')
+    gpio_tuple = tuple(platform.gpio_tuple(args.gpio))
+    for lib_name in args.libs:
+        try:
+            gpio_lib = load_gpio_lib(f'sbc_gpio.gpio_libs.{lib_name}')
+        except ImportError as e:
+            print(f"{lib_name:12} not available: {e}")
+            continue
+        results = toggle(gpio_lib, gpio_tuple, args.count)
+        print(f"{lib_name:12} {results['ns_per_write']:10.0f}ns/write {results['writes_per_sec']:12.0f} writes/sec, "
+              f"allocated blocks {results['allocated_blocks']}")
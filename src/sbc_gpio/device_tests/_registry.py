@@ -0,0 +1,134 @@
+'''
+Registry of the device tests that can be run from the CLI.  Test modules are only imported when the
+config file includes the key for the test, so the platform info path does not load lirc, pyserial,
+RPLCD, smbus2 or the SPI sensor libraries.
+
+Third party tests are discovered through the "sbc_gpio.device_tests" entry point group.  The entry
+point name is the config key and the entry point must load a callable with the following signature
+that returns a DevTest_Base derived test (or None if the test is unable to run):
+
+    def create_test(platform, config:dict, log_level, logger) -> DevTest_Base | None
+
+i.e. in pyproject.toml:
+    [project.entry-points."sbc_gpio.device_tests"]
+    my_sensor = "my_package.sbc_test:create_test"
+'''
+from importlib import import_module
+
+ENTRY_POINT_GROUP = 'sbc_gpio.device_tests'
+
+# config key: (module, class) - module is imported when the key is in the config
+DEVICE_TESTS = {
+    'led': ('sbc_gpio.device_tests.led_gpiod', 'DevTest_LED'),
+    'btn': ('sbc_gpio.device_tests.button_gpiod', 'DevTest_Button'),
+    'dht': ('sbc_gpio.device_tests.dht_spi', 'DevTest_DHT'),
+    'bmx': ('sbc_gpio.device_tests.bmx_spi', 'DevTest_BMX'),
+    'i2c': ('sbc_gpio.device_tests.i2c_display', 'DevTest_I2CDisp'),
+    'ir': ('sbc_gpio.device_tests.ir', 'DevTest_IR'),
+    'uart_dev': ('sbc_gpio.device_tests.uart', 'DevTest_UART'),
+}
+
+# config keys that are parameters for another test and not a test on their own
+TEST_PARAMETERS = ('dht_spi', 'dht22', 'bmx_spi', 'spi_cs', 'usb_dev')
+
+
+def load_test_class(key:str):
+    ''' Import the module for a built in test and return the test class '''
+    module_name, class_name = DEVICE_TESTS[key]
+    return getattr(import_module(module_name), class_name)
+
+
+def load_entry_point(key:str):
+    ''' Return the test factory registered by a third party package for the config key, or None '''
+    from importlib.metadata import entry_points
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        if entry_point.name == key:
+            return entry_point.load()
+    return None
+
+
+def _create_led(platform, config, log_level, logger):
+    led = config['led']
+    if platform.gpio_is_valid(led):
+        return load_test_class('led')(gpio=platform.get_gpio_out(led), log_level=log_level)
+    logger.error('Unable to run LED test. %s not a valid GPIO (%s)', led, platform.gpio_valid_values)
+    return None
+
+
+def _create_btn(platform, config, log_level, logger):
+    btn = config['btn']
+    if platform.gpio_is_valid(btn):
+        return load_test_class('btn')(gpio=platform.get_gpio_in(btn), log_level=log_level)
+    logger.error('Unable to run BTN test. %s not a valid GPIO (%s)', btn, platform.gpio_valid_values)
+    return None
+
+
+def _create_dht(platform, config, log_level, logger):
+    dht, dht_spi, spi_cs = config['dht'], config.get('dht_spi'), config.get('spi_cs')
+    if not isinstance(dht_spi, int):
+        return None
+    if platform.gpio_is_valid(dht):
+        return load_test_class('dht')(spi_bus=dht_spi, dht22=config.get('dht22', False), gpio_tuple=platform.gpio_tuple(dht),
+                                      log_level=log_level, spi_cs=spi_cs if spi_cs is not None else 0)
+    logger.error('Unable to run DHT test. %s not a valid GPIO (%s)', dht, platform.gpio_valid_values)
+    return None
+
+
+def _create_bmx(platform, config, log_level, logger):
+    bmx, bmx_spi, spi_cs = config['bmx'], config.get('bmx_spi'), config.get('spi_cs')
+    if not isinstance(bmx_spi, int):
+        return None
+    if platform.gpio_is_valid(bmx):
+        return load_test_class('bmx')(spi_bus=bmx_spi, gpio_tuple=platform.gpio_tuple(bmx), log_level=log_level,
+                                      spi_cs=spi_cs if spi_cs is not None else 0)
+    logger.error('Unable to run BMX test. %s not a valid GPIO (%s)', bmx, platform.gpio_valid_values)
+    return None
+
+
+def _create_i2c(platform, config, log_level, logger):
+    i2c = config['i2c']
+    if isinstance(i2c, int) and i2c in platform.i2c_buses():
+        return load_test_class('i2c')(port=i2c, log_level=log_level)
+    logger.error(f'Unable to run i2c test.  {i2c} not in {platform.i2c_buses()}')
+    return None
+
+
+def _create_ir(platform, config, log_level, logger):
+    if isinstance(config['ir'], bool) and config['ir']:
+        return load_test_class('ir')(log_level=log_level)
+    return None
+
+
+def _create_uart(platform, config, log_level, logger):
+    if config.get('usb_dev') is not None:
+        return load_test_class('uart_dev')(config['uart_dev'], config['usb_dev'], log_level=log_level)
+    return None
+
+
+_TEST_FACTORIES = {
+    'led': _create_led,
+    'btn': _create_btn,
+    'dht': _create_dht,
+    'bmx': _create_bmx,
+    'i2c': _create_i2c,
+    'ir': _create_ir,
+    'uart_dev': _create_uart,
+}
+
+
+def create_tests(platform, config:dict, log_level, logger) -> list:
+    ''' Create the tests for each test key in the config.  Only keys with a value that is not None or '' are run '''
+    tests = []
+    for key, value in config.items():
+        if value is None or value == '' or key in TEST_PARAMETERS:
+            continue
+        factory = _TEST_FACTORIES.get(key)
+        if factory is None:
+            factory = load_entry_point(key)
+        if factory is None:
+            logger.error(f"Unknown test '{key}' in config.  Built in tests: {list(DEVICE_TESTS.keys())}, entry point group: {ENTRY_POINT_GROUP}")
+            continue
+        test = factory(platform, config, log_level, logger)
+        if test is not None:
+            tests.append(test)
+    return tests
@@ -0,0 +1,210 @@
+'''
+Quadrature (rotary) encoder decoder.
+
+Both encoder lines are requested together with one GPIO uAPI v2 line request, so the kernel delivers the
+edges of both lines in order on a single fd with the kernel timestamps.  The fd is watched by the shared
+event dispatcher and each edge is decoded with a table lookup (no debounce, every transition counts).
+If the lines are on different chips (or the kernel does not support uAPI v2) two GpioIn's from the
+platform gpio library are used with their raw edges passed to the decoder.
+
+Usage:
+    encoder = RotaryEncoder(platform, 'GPIO17', 'GPIO27', steps_per_count=4)
+    print(encoder.position, encoder.velocity)
+    async for event in encoder.events():
+        print(event.position, event.delta)
+'''
+from collections import namedtuple
+from time import monotonic_ns
+from logging_handler import create_logger, INFO
+from sbc_gpio import EVENT, PULL
+from sbc_gpio.gpio_libs import _uapi
+from sbc_gpio.gpio_libs._dispatcher import get_dispatcher
+from sbc_gpio.gpio_libs._executor import get_executor
+
+# Position change delivered to asyncio consumers and the callback (timestamp in seconds, velocity in counts/sec)
+ENCODER_EVENT = namedtuple('ENCODER_EVENT', ('position', 'delta', 'timestamp', 'velocity', 'encoder'))
+
+# Quadrature transitions indexed by (previous state << 2) | new state, where state = (A << 1) | B.
+# Forward is 00 -> 10 -> 11 -> 01 -> 00.  Both lines changing at once (a missed edge) counts as 0.
+_STEPS = (0, -1, 1, 0,
+          1, 0, 0, -1,
+          -1, 0, 0, 1,
+          0, 1, -1, 0)
+
+_BIAS_FLAGS = {PULL.UP: _uapi.GPIO_V2_LINE_FLAG_BIAS_PULL_UP, PULL.DOWN: _uapi.GPIO_V2_LINE_FLAG_BIAS_PULL_DOWN,
+               PULL.NONE: _uapi.GPIO_V2_LINE_FLAG_BIAS_DISABLED}
+
+
+class RotaryEncoder:
+    ''' Decode a quadrature encoder on two gpios.  Position is the number of transitions divided by steps_per_count
+        (4 for most detent encoders) and velocity is in counts per second over velocity_window_ms.  The callback is
+        called with callback(position=, delta=, timestamp=, velocity=, encoder=) through the callback executor '''
+    def __init__(self, platform, pin_a, pin_b, name=None, pull=PULL.UP, steps_per_count=1, callback=None, velocity_window_ms=100,
+                 log_level=INFO):
+        self.name = name if name is not None else f"encoder:{pin_a},{pin_b}"
+        self._logger = create_logger(console_level=log_level, name=self.__class__.__name__)
+        self._request, self._gpios, self._dispatcher = None, [], None
+        if steps_per_count <= 0:
+            raise ValueError(f"{self.info_str}: steps_per_count must be greater than 0, not {steps_per_count}")
+        self.steps_per_count = steps_per_count
+        self.callback = callback
+        self.executor = None
+        self.transitions = 0
+        self.missed = 0
+        self.kernel_lost = 0
+        self._steps = 0
+        self._state = 0
+        self._last_seqno = 0
+        self._published = 0
+        self._last_step_ns = 0
+        self._velocity = 0.0
+        self._velocity_window_ns = int(velocity_window_ms * 1_000_000)
+        self._velocity_start = (0, 0)
+        self._async_queues = []
+        self._async_loop = None
+        (chip_a, line_a), (chip_b, line_b) = platform.gpio_tuple(pin_a), platform.gpio_tuple(pin_b)
+        if chip_a == chip_b:
+            try:
+                self._request = _uapi.LineRequest(chip_a, [line_a, line_b], _uapi.GPIO_V2_LINE_FLAG_INPUT | _uapi.GPIO_V2_LINE_FLAG_EDGE_RISING |
+                                                  _uapi.GPIO_V2_LINE_FLAG_EDGE_FALLING | _BIAS_FLAGS.get(pull, 0), self.name,
+                                                  event_buffer_size=256, max_events=64)
+            except OSError as e:
+                self._logger.info(f"{self.info_str}: Unable to request both lines with the GPIO uAPI, using the platform gpio library. Error: {e}")
+        if self._request is not None:
+            self._logger.info(f"{self.info_str}: Requested chip {chip_a} lines {line_a},{line_b} with one line request")
+            self._offsets = {line_a: 1, line_b: 0}
+            values = self._request.get_values()
+            self._state = ((values & 1) << 1) | ((values >> 1) & 1)
+            self._dispatcher = get_dispatcher()
+            self._dispatcher.register(self._request.fd, self._on_event_fd_ready)
+        else:
+            self._open_gpios(platform, (chip_a, line_a), (chip_b, line_b), pull, log_level)
+
+    def _open_gpios(self, platform, gpio_a:tuple, gpio_b:tuple, pull, log_level):
+        ''' Use a GpioIn per line from the platform gpio library.  The edges of the two lines are read from separate fds '''
+        try:
+            for bit, gpio_tuple in ((1, gpio_a), (0, gpio_b)):
+                gpio = platform.get_gpio_in(gpio_tuple, name=f"{self.name}-{'A' if bit else 'B'}", pull=pull, event=EVENT.BOTH, debounce_ms=0,
+                                            log_level=log_level, start_polling=False, kernel_debounce=False)
+                self._gpios.append(gpio)
+                if gpio._event_fd() is None:
+                    raise ValueError(f"{self.info_str}: The gpio library does not provide edge timestamps, unable to decode the encoder")
+                self._state |= (gpio.state & 1) << bit
+                gpio.edge_handler = lambda edge, timestamp_ns, bit=bit: self._on_gpio_edge(bit, edge, timestamp_ns)
+                gpio.start()
+        except Exception:
+            self.close()
+            raise
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        ''' Release the lines '''
+        if self._request is not None:
+            self._logger.info(f"{self.info_str}: Releasing GPIO lines...")
+            self._dispatcher.unregister(self._request.fd) # type: ignore
+            self._request.close()
+            self._request = None
+        for gpio in self._gpios:
+            gpio.close()
+        self._gpios = []
+
+    @property
+    def info_str(self):
+        ''' Returns the info string for the class (used in logging commands) '''
+        return f"{self.__class__.__name__} ({self.name})"
+
+    @property
+    def position(self) -> int:
+        ''' Return the current position in counts '''
+        return self._steps // self.steps_per_count
+
+    @property
+    def velocity(self) -> float:
+        ''' Return the velocity in counts per second (0 if there were no transitions in the velocity window) '''
+        if monotonic_ns() - self._last_step_ns > self._velocity_window_ns:
+            return 0.0
+        return self._velocity
+
+    def reset(self, position=0):
+        ''' Set the current position '''
+        self._steps = self._published = position * self.steps_per_count
+        self._velocity_start = (self._last_step_ns, self._steps)
+
+    def stats(self) -> dict:
+        ''' Return the decoder counters.  Missed are transitions where the line was already at the new level (an edge
+            was lost), kernel_lost are events dropped from the full kernel event buffer '''
+        return {'transitions': self.transitions, 'missed': self.missed, 'kernel_lost': self.kernel_lost, 'steps': self._steps}
+
+    def _decode(self, bit:int, level:int, timestamp_ns:int):
+        ''' Decode one edge (bit 1 is line A, bit 0 is line B) '''
+        state = self._state
+        new_state = (state & ~(1 << bit)) | (level << bit)
+        if new_state == state:
+            self.missed += 1
+            return
+        self._state = new_state
+        self.transitions += 1
+        self._steps += _STEPS[(state << 2) | new_state]
+        self._last_step_ns = timestamp_ns
+        start_ns, start_steps = self._velocity_start
+        if timestamp_ns - start_ns >= self._velocity_window_ns:
+            self._velocity = (self._steps - start_steps) * 1e9 / (timestamp_ns - start_ns) / self.steps_per_count if start_ns else 0.0
+            self._velocity_start = (timestamp_ns, self._steps)
+
+    def _on_event_fd_ready(self):
+        ''' Called from the event dispatcher when the line request fd is readable '''
+        offsets, last_seqno = self._offsets, self._last_seqno
+        for timestamp_ns, event_id, offset, seqno, _ in self._request.read_events(): # type: ignore
+            if last_seqno and seqno > last_seqno + 1:
+                self.kernel_lost += seqno - last_seqno - 1
+            last_seqno = seqno
+            self._decode(offsets[offset], 1 if event_id == _uapi.GPIO_V2_LINE_EVENT_RISING_EDGE else 0, timestamp_ns)
+        self._last_seqno = last_seqno
+        self._publish()
+
+    def _on_gpio_edge(self, bit:int, edge:str, timestamp_ns:int):
+        ''' Raw edge from one of the GpioIn's '''
+        self._decode(bit, 1 if edge == EVENT.RISING else 0, timestamp_ns)
+        self._publish()
+
+    def _publish(self):
+        ''' Send one ENCODER_EVENT per batch of edges if the position changed '''
+        position = self._steps // self.steps_per_count
+        delta = position - self._published // self.steps_per_count
+        if delta == 0:
+            return
+        self._published = self._steps
+        if self.callback is None and len(self._async_queues) == 0:
+            return
+        encoder_event = ENCODER_EVENT(position, delta, self._last_step_ns / 1e9, self.velocity, self.name)
+        if self.callback is not None:
+            (self.executor if self.executor is not None else get_executor()).submit(self, self.callback, encoder_event._asdict())
+        if self._async_loop is not None:
+            self._async_loop.call_soon_threadsafe(self._put_async_queues, encoder_event)
+
+    def _put_async_queues(self, encoder_event:ENCODER_EVENT):
+        ''' Add the event to each asyncio consumer queue, the oldest event is dropped if a queue is full '''
+        for queue in self._async_queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(encoder_event)
+
+    async def events(self, max_queue=64):
+        ''' Async iterator of ENCODER_EVENT's, one per batch of edges that changed the position.
+            i.e.  async for event in encoder.events(): ... '''
+        from asyncio import get_running_loop, Queue
+        loop = get_running_loop()
+        if self._async_loop is not None and self._async_loop is not loop:
+            raise RuntimeError(f"{self.info_str}: Events are already being consumed from a different event loop")
+        queue = Queue(maxsize=max_queue)
+        self._async_queues.append(queue)
+        self._async_loop = loop
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._async_queues.remove(queue)
+            if len(self._async_queues) == 0:
+                self._async_loop = None
@@ -0,0 +1,123 @@
+'''
+Single event dispatcher thread shared by all GpioIn pins.  Each pin registers the event file descriptor
+of its line request and the dispatcher waits on all of them with selectors (epoll on Linux).  Debounce
+timers are handled by the same thread, so an idle pin costs no thread, no stack and no timer wakeups.
+'''
+import os
+import selectors
+from threading import Thread, Lock
+from time import monotonic, thread_time_ns
+from logging_handler import create_logger, INFO
+
+
+class EventDispatcher:
+    ''' Dispatch readable file descriptors and timers to callbacks from one background thread '''
+    def __init__(self, name='gpio-event-dispatcher', log_level=INFO):
+        self.name = name
+        self._logger = create_logger(console_level=log_level, name=self.__class__.__name__)
+        self._selector = selectors.DefaultSelector()
+        self._lock = Lock()
+        self._timers = {}
+        self._thread = None
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+        os.set_blocking(self._wake_write, False)
+        self._selector.register(self._wake_read, selectors.EVENT_READ, None)
+        self._wakeups = 0
+        self._events = 0
+        self._timers_fired = 0
+        self._cpu_ns = 0
+
+    @property
+    def info_str(self):
+        ''' Returns the info string for the class (used in logging commands) '''
+        return f"{self.__class__.__name__} ({self.name})"
+
+    def register(self, fd:int, callback) -> None:
+        ''' Call the callback (no arguments) from the dispatcher thread each time the fd is readable '''
+        with self._lock:
+            self._selector.register(fd, selectors.EVENT_READ, callback)
+            if self._thread is None or not self._thread.is_alive():
+                self._logger.info(f"{self.info_str}: Starting dispatcher thread...")
+                self._thread = Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._wake()
+
+    def unregister(self, fd:int) -> None:
+        ''' Stop watching the fd '''
+        with self._lock:
+            try:
+                self._selector.unregister(fd)
+            except (KeyError, ValueError):
+                pass
+        self._wake()
+
+    def call_later(self, key, delay:float, callback) -> None:
+        ''' Call the callback after delay seconds.  Scheduling with an existing key replaces the pending timer '''
+        with self._lock:
+            self._timers[key] = (monotonic() + delay, callback)
+        self._wake()
+
+    def cancel(self, key) -> None:
+        ''' Cancel a pending timer '''
+        with self._lock:
+            self._timers.pop(key, None)
+
+    def stats(self) -> dict:
+        ''' Return the dispatcher statistics '''
+        with self._lock:
+            return {'registered': len(self._selector.get_map()) - 1, 'timers': len(self._timers), 'wakeups': self._wakeups,
+                    'events': self._events, 'timers_fired': self._timers_fired, 'cpu_ns': self._cpu_ns,
+                    'running': self._thread is not None and self._thread.is_alive()}
+
+    def _wake(self):
+        ''' Wake the dispatcher thread so registrations and timers are picked up '''
+        try:
+            os.write(self._wake_write, b'\x00')
+        except BlockingIOError:
+            pass
+
+    def _run(self):
+        ''' Dispatcher thread.  Blocks until an fd is readable or the next timer is due '''
+        while True:
+            with self._lock:
+                timeout = max(0, min(deadline for deadline, _ in self._timers.values()) - monotonic()) if len(self._timers) > 0 else None
+            ready = self._selector.select(timeout)
+            self._wakeups += 1
+            for key, _ in ready:
+                if key.data is None:
+                    try:
+                        os.read(self._wake_read, 4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._events += 1
+                try:
+                    key.data()
+                except Exception as e:
+                    self._logger.error(f"{self.info_str}: Error in event callback for fd {key.fd}: {e}")
+            if len(self._timers) > 0:
+                now = monotonic()
+                with self._lock:
+                    due = [key for key, (deadline, _) in self._timers.items() if deadline <= now]
+                    callbacks = [self._timers.pop(key)[1] for key in due]
+                for callback in callbacks:
+                    self._timers_fired += 1
+                    try:
+                        callback()
+                    except Exception as e:
+                        self._logger.error(f"{self.info_str}: Error in timer callback: {e}")
+            self._cpu_ns = thread_time_ns()
+
+
+_dispatcher = None
+_dispatcher_lock = Lock()
+
+
+def get_dispatcher() -> EventDispatcher:
+    ''' Return the process wide event dispatcher '''
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = EventDispatcher()
+        return _dispatcher
@@ -0,0 +1,97 @@
+'''
+Fixed size ring of edge events.  Each record is (timestamp ns, edge, line seqno) stored in preallocated
+arrays, so recording an event does not allocate.  The kernel line sequence number is used to count
+events lost in the kernel event FIFO (a gap in the sequence numbers); events overwritten in the ring
+before they are drained are counted as dropped.
+'''
+from array import array
+from threading import Lock
+from sbc_gpio import EVENT
+
+# edge codes stored in the ring (the same values as the GPIO uAPI v2 event ids)
+EDGE_RISING = 1
+EDGE_FALLING = 2
+EDGE_CODES = {EVENT.RISING: EDGE_RISING, EVENT.FALLING: EDGE_FALLING}
+EDGE_NAMES = {EDGE_RISING: EVENT.RISING, EDGE_FALLING: EVENT.FALLING}
+
+
+class EventRing:
+    ''' Ring buffer of edge events.  When the ring is full the oldest event is overwritten '''
+    def __init__(self, size=1024):
+        if size <= 0:
+            raise ValueError(f"Event ring size must be greater than 0, not {size}")
+        self.size = size
+        self.timestamps = array('Q', bytes(8 * size))
+        self.edges = array('B', bytes(size))
+        self.seqnos = array('L', bytes(array('L').itemsize * size))
+        self._timestamps_view, self._edges_view, self._seqnos_view = memoryview(self.timestamps), memoryview(self.edges), memoryview(self.seqnos)
+        self._lock = Lock()
+        self._read = 0
+        self._count = 0
+        self._last_seqno = 0
+        self.recorded = 0
+        self.dropped = 0
+        self.kernel_gaps = 0
+        self.kernel_lost = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def record(self, timestamp_ns:int, edge:int, line_seqno=0) -> None:
+        ''' Add an event (edge is EDGE_RISING or EDGE_FALLING).  A line_seqno of 0 means the backend does not
+            provide sequence numbers '''
+        with self._lock:
+            if line_seqno:
+                if self._last_seqno and line_seqno > self._last_seqno + 1:
+                    self.kernel_gaps += 1
+                    self.kernel_lost += line_seqno - self._last_seqno - 1
+                self._last_seqno = line_seqno
+            if self._count == self.size:
+                # overwrite the oldest event
+                self._read = (self._read + 1) % self.size
+                self._count -= 1
+                self.dropped += 1
+            index = (self._read + self._count) % self.size
+            self.timestamps[index] = timestamp_ns
+            self.edges[index] = edge
+            self.seqnos[index] = line_seqno
+            self._count += 1
+            self.recorded += 1
+            if self._count > self.max_depth:
+                self.max_depth = self._count
+
+    def drain_into(self, timestamps:array, edges:array, seqnos:array|None=None) -> int:
+        ''' Copy the events into the caller's arrays (typecodes 'Q', 'B' and 'L') without creating python objects for
+            each event.  Returns the number of events moved, which is limited by the length of the arrays '''
+        with self._lock:
+            count = min(self._count, len(timestamps), len(edges), len(seqnos) if seqnos is not None else self._count)
+            start = self._read
+            first = min(count, self.size - start)
+            targets = [(memoryview(timestamps), self._timestamps_view), (memoryview(edges), self._edges_view)]
+            if seqnos is not None:
+                targets.append((memoryview(seqnos), self._seqnos_view))
+            for target, source in targets:
+                target[:first] = source[start:start + first]
+                target[first:count] = source[:count - first]
+            self._read = (start + count) % self.size
+            self._count -= count
+            return count
+
+    def drain(self, max_events:int|None=None) -> list:
+        ''' Remove and return the events as a list of (timestamp ns, EVENT.RISING/FALLING, line seqno) '''
+        with self._lock:
+            count = self._count if max_events is None else min(max_events, self._count)
+            events = []
+            for offset in range(count):
+                index = (self._read + offset) % self.size
+                events.append((self.timestamps[index], EDGE_NAMES.get(self.edges[index]), self.seqnos[index]))
+            self._read = (self._read + count) % self.size
+            self._count -= count
+            return events
+
+    def stats(self) -> dict:
+        ''' Return the ring counters '''
+        with self._lock:
+            return {'size': self.size, 'depth': self._count, 'max_depth': self.max_depth, 'recorded': self.recorded,
+                    'dropped': self.dropped, 'kernel_gaps': self.kernel_gaps, 'kernel_lost': self.kernel_lost}
@@ -0,0 +1,184 @@
+'''
+Executor for GpioIn event callbacks.  Callbacks are run inline in the event thread, on a shared bounded
+thread pool, or on per-pin ordered queues served by the pool (default).  Every queue has a depth limit
+and a policy for when the limit is reached, so a fast signal cannot create unbounded threads or memory.
+
+Modes:
+    INLINE  - call the callback in the event dispatcher thread (lowest latency, blocks other events)
+    POOL    - any worker runs the next callback (no ordering between callbacks for the same pin)
+    ORDERED - callbacks for the same pin are run in order, one at a time, pins run in parallel
+
+Policies when the queue is full:
+    DROP_NEWEST - discard the new callback
+    DROP_OLDEST - discard the oldest queued callback
+    COALESCE    - replace the newest queued callback for the same pin with the new callback
+'''
+from collections import deque
+from threading import Thread, Lock, Condition
+from logging_handler import create_logger, INFO
+
+INLINE = 'inline'
+POOL = 'pool'
+ORDERED = 'ordered'
+
+DROP_NEWEST = 'drop_newest'
+DROP_OLDEST = 'drop_oldest'
+COALESCE = 'coalesce'
+
+
+class CallbackExecutor:
+    ''' Run event callbacks with a bounded number of threads and bounded queues '''
+    def __init__(self, mode=ORDERED, max_workers=4, max_queue=64, policy=DROP_OLDEST, name='gpio-callback', log_level=INFO):
+        if mode not in (INLINE, POOL, ORDERED):
+            raise ValueError(f"Invalid executor mode {mode}. Must be one of {(INLINE, POOL, ORDERED)}")
+        if policy not in (DROP_NEWEST, DROP_OLDEST, COALESCE):
+            raise ValueError(f"Invalid executor policy {policy}. Must be one of {(DROP_NEWEST, DROP_OLDEST, COALESCE)}")
+        self.mode, self.max_workers, self.max_queue, self.policy, self.name = mode, max_workers, max_queue, policy, name
+        self._logger = create_logger(console_level=log_level, name=self.__class__.__name__)
+        self._lock = Lock()
+        self._work = Condition(self._lock)
+        self._queue = deque()           # POOL: (key, callback, kwargs)
+        self._pin_queues = {}           # ORDERED: key -> deque of (callback, kwargs)
+        self._ready = deque()           # ORDERED: keys with queued callbacks and no worker running them
+        self._workers = []
+        self._shutdown = False
+        self._submitted = 0
+        self._executed = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._errors = 0
+        self._max_depth = 0
+
+    @property
+    def info_str(self):
+        ''' Returns the info string for the class (used in logging commands) '''
+        return f"{self.__class__.__name__} ({self.name}, {self.mode})"
+
+    def submit(self, key, callback, kwargs:dict) -> bool:
+        ''' Queue the callback for the key (the pin).  Returns False if the callback was dropped '''
+        if self.mode == INLINE:
+            with self._lock:
+                self._submitted += 1
+            success = self._run(callback, kwargs)
+            with self._lock:
+                self._executed += 1
+                self._errors += 0 if success else 1
+            return True
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError(f"{self.info_str}: Executor is shut down")
+            self._submitted += 1
+            if self.mode == POOL:
+                queued = self._enqueue(self._queue, key, (key, callback, kwargs), lambda item: item[0] == key)
+            else:
+                pin_queue = self._pin_queues.get(key)
+                if pin_queue is None:
+                    pin_queue = self._pin_queues[key] = deque()
+                    self._ready.append(key)
+                queued = self._enqueue(pin_queue, key, (callback, kwargs), lambda item: True)
+            if queued:
+                self._work.notify()
+            if len(self._workers) < self.max_workers and (len(self._ready) > 0 or len(self._queue) > 0):
+                self._start_worker()
+        return queued
+
+    def _enqueue(self, queue:deque, key, item, same_key) -> bool:
+        ''' Add the item to the queue applying the policy if the queue is full (lock must be held) '''
+        if len(queue) >= self.max_queue:
+            if self.policy == COALESCE:
+                for index in range(len(queue) - 1, -1, -1):
+                    if same_key(queue[index]):
+                        queue[index] = item
+                        self._coalesced += 1
+                        return True
+            if self.policy == DROP_NEWEST:
+                self._dropped += 1
+                return False
+            queue.popleft()
+            self._dropped += 1
+        queue.append(item)
+        self._max_depth = max(self._max_depth, len(queue))
+        return True
+
+    def _start_worker(self):
+        ''' Start another worker thread (lock must be held) '''
+        worker = Thread(target=self._worker, name=f"{self.name}-{len(self._workers)}", daemon=True)
+        self._workers.append(worker)
+        worker.start()
+
+    def _next(self) -> tuple:
+        ''' Wait for the next (key, callback, kwargs).  Returns None when shut down (lock must be held) '''
+        while True:
+            if self.mode == POOL and len(self._queue) > 0:
+                return self._queue.popleft()
+            if self.mode == ORDERED and len(self._ready) > 0:
+                key = self._ready.popleft()
+                callback, kwargs = self._pin_queues[key].popleft()
+                return key, callback, kwargs
+            if self._shutdown:
+                return None
+            self._work.wait()
+
+    def _worker(self):
+        ''' Worker thread.  In ORDERED mode a key is only handed to one worker at a time '''
+        with self._lock:
+            item = self._next()
+        while item is not None:
+            key, callback, kwargs = item
+            success = self._run(callback, kwargs)
+            with self._lock:
+                self._executed += 1
+                self._errors += 0 if success else 1
+                if self.mode == ORDERED:
+                    if len(self._pin_queues[key]) > 0:
+                        self._ready.append(key)
+                    else:
+                        del self._pin_queues[key]
+                item = self._next()
+
+    def _run(self, callback, kwargs:dict) -> bool:
+        ''' Run a single callback.  Returns False if the callback raised an exception '''
+        try:
+            callback(**kwargs)
+            return True
+        except Exception as e:
+            self._logger.error(f"{self.info_str}: Error in callback {callback}: {e}")
+            return False
+
+    def stats(self) -> dict:
+        ''' Return the executor counters '''
+        with self._lock:
+            depth = len(self._queue) + sum(len(pin_queue) for pin_queue in self._pin_queues.values())
+            return {'mode': self.mode, 'workers': len(self._workers), 'submitted': self._submitted, 'executed': self._executed,
+                    'dropped': self._dropped, 'coalesced': self._coalesced, 'errors': self._errors,
+                    'depth': depth, 'max_depth': self._max_depth}
+
+    def shutdown(self, wait=True):
+        ''' Stop the worker threads after the queued callbacks have run '''
+        with self._lock:
+            self._shutdown = True
+            self._work.notify_all()
+            workers = list(self._workers)
+        if wait:
+            for worker in workers:
+                worker.join()
+
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor() -> CallbackExecutor:
+    ''' Return the default executor used by GpioIn pins that do not have their own executor '''
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = CallbackExecutor()
+        return _executor
+
+
+def set_default_executor(executor:CallbackExecutor) -> None:
+    ''' Replace the default executor.  Pins that already queued callbacks keep using the previous executor until they finish '''
+    global _executor
+    with _executor_lock:
+        _executor = executor
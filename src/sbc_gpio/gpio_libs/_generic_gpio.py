@@ -3,15 +3,46 @@ Base GPIO classes used to represent a in and out GPIO and provide common functio
 across all gpio libraries.
 '''
 from logging_handler import create_logger
+from logging import DEBUG, INFO
 from threading import Thread, Lock
-from sbc_gpio import EVENT
-from time import time
+from operator import mul
+from sbc_gpio import EVENT, PULL
+from ._dispatcher import get_dispatcher
+from ._executor import get_executor
+from ._event_ring import EventRing, EDGE_CODES
+from ._measure import PulseMeter, PULSE_STATS
+from ._shadow import OutputShadow, ShadowGpioOut, ShadowGpioOutGroup, shadow_class
+from time import time, monotonic_ns
+from collections import namedtuple
+
+# Edge event delivered to asyncio consumers (timestamp in seconds, state is the triggered state)
+EDGE_EVENT = namedtuple('EDGE_EVENT', ('event', 'timestamp', 'state', 'gpio'))
+
+# {logger name: (logger, log level)}
+_class_loggers = {}
+
+
+def class_logger(name:str, log_level):
+    ''' Return the logger shared by all instances of a class.  create_logger() replaces the handlers on every call so the
+        logger is only created again if the log level changes.  The logger level is set to the console level so
+        isEnabledFor() is False for the messages that would be dropped by the handler '''
+    entry = _class_loggers.get(name)
+    if entry is not None and entry[1] == log_level:
+        return entry[0]
+    logger = create_logger(console_level=log_level, name=name)
+    logger.setLevel(logger.handlers[0].level)
+    _class_loggers[name] = (logger, log_level)
+    return logger
+
 
 class Gpio:
-    ''' Base GPIO functions that can be used for all input or output GPIO's '''
+    ''' Base GPIO functions that can be used for all input or output GPIO's.  The gpio classes use __slots__, subclasses
+        in the libraries list their own attributes '''
+    __slots__ = ('name', '_logger', '__weakref__')
+
     def __init__(self, name, log_level):
-        self.name = name if name is not None else f"Generic GPIO"
-        self._logger = create_logger(console_level=log_level, name=self.__class__.__name__)
+        self.name = name if name is not None else "Generic GPIO"
+        self._logger = class_logger(self.__class__.__name__, log_level)
 
     def __del__(self):
         self.close()
@@ -24,8 +55,14 @@ class Gpio:
         ''' Returns the info string for the class (used in logging commands) '''
         return f"{self.__class__.__name__} ({self.name})"
 
+    def __str__(self):
+        # log messages pass the gpio as an argument so the info string is only built if the message is logged
+        return self.info_str
+
 class GpioOut(Gpio):
     ''' Base GPIO class to represent a GPIO configured for output '''
+    __slots__ = ('pull', 'shadow')
+
     def __init__(self, name, log_level, pull):
         super().__init__(name, log_level)
         self.pull = pull
@@ -45,13 +82,185 @@ class GpioOut(Gpio):
     set_0 = set_low
     set_off = set_low
 
+    def enable_shadow(self, verify_interval:float|None=1.0) -> OutputShadow:
+        ''' Keep the output state in a write-through shadow register.  Writes that do not change the output are skipped,
+            state is returned from memory and the hardware is read back every verify_interval seconds (None to never
+            read back).  The counters are in self.shadow '''
+        if isinstance(self, ShadowGpioOut):
+            return self.shadow # type: ignore
+        self.shadow = OutputShadow(self.state, verify_interval)
+        self.__class__ = shadow_class(self.__class__, ShadowGpioOut)
+        return self.shadow
+
+    def disable_shadow(self):
+        ''' Remove the shadow register, all writes go to the hardware '''
+        if isinstance(self, ShadowGpioOut):
+            self.__class__ = self._shadow_base # type: ignore
+            del self.shadow
+
+    def play_waveform(self, steps, wait=True):
+        ''' Play a sequence of (delta_ns, 0/1) steps from a dedicated thread (see sbc_gpio.waveform).  Returns the
+            WAVEFORM_RESULT with the timing error per step, or the Waveform (call wait() for the result) if wait is False '''
+        from sbc_gpio.waveform import Waveform
+        waveform = steps if isinstance(steps, Waveform) else Waveform(steps)
+        result = waveform.play(self, wait=wait)
+        return result if wait else waveform
+
+
+class GpioOutGroup(Gpio):
+    ''' Base GPIO class to represent a group of GPIO's configured for output that are written together.
+        Values are integer bit patterns, bit 0 is the first gpio in the group. '''
+    __slots__ = ('pull', 'gpio_tuples', '_value', 'shadow')
+
+    def __init__(self, name, log_level, pull):
+        super().__init__(name, log_level)
+        self.pull = pull
+        self.gpio_tuples = ()
+        self._value = 0
+
+    def __len__(self):
+        return len(self.gpio_tuples)
+
+    @property
+    def state(self) -> int:
+        ''' Return the last value written to the group '''
+        return self._value
+
+    value = state
+
+    def set_value(self, value:int):
+        ''' Write the integer bit pattern to all gpios in the group '''
+        pass
+
+    write = set_value
+
+    def set_values(self, bits:int, mask:int):
+        ''' Write only the gpios in the mask to the values in bits, other gpios keep the current value '''
+        self.set_value((self._value & ~mask) | (bits & mask))
+
+    def _read_value(self) -> int|None:
+        ''' Read the output values back from the hardware, None if not supported by the library '''
+        return None
+
+    def enable_shadow(self, verify_interval:float|None=1.0) -> OutputShadow:
+        ''' Keep the group value in a write-through shadow register.  Writes that do not change any gpio are skipped and
+            the hardware is read back every verify_interval seconds (if supported by the library).  The counters are in
+            self.shadow '''
+        if isinstance(self, ShadowGpioOutGroup):
+            return self.shadow # type: ignore
+        hardware_value = self._read_value()
+        self.shadow = OutputShadow(self._value if hardware_value is None else hardware_value, verify_interval)
+        self._value = self.shadow.value
+        self.__class__ = shadow_class(self.__class__, ShadowGpioOutGroup)
+        return self.shadow
+
+    def disable_shadow(self):
+        ''' Remove the shadow register, all writes go to the hardware '''
+        if isinstance(self, ShadowGpioOutGroup):
+            self.__class__ = self._shadow_base # type: ignore
+            del self.shadow
+
+    def play_waveform(self, steps, wait=True):
+        ''' Play a sequence of (delta_ns, bitmask) steps from a dedicated thread, one write per step for all gpios (see
+            sbc_gpio.waveform).  Returns the WAVEFORM_RESULT, or the Waveform (call wait() for the result) if wait is False '''
+        from sbc_gpio.waveform import Waveform
+        waveform = steps if isinstance(steps, Waveform) else Waveform(steps)
+        result = waveform.play(self, wait=wait)
+        return result if wait else waveform
+
+    async def write_async(self, value:int):
+        ''' Write the integer bit pattern from a coroutine.  The write is a single non-blocking ioctl per chip so it is
+            done directly on the event loop (no executor thread), then yields to the other tasks on the loop '''
+        from asyncio import sleep as async_sleep
+        self.set_value(value)
+        await async_sleep(0)
+
+    def set_high(self):
+        ''' Set all pins in the group to on/high '''
+        self.set_value((1 << len(self)) - 1)
+
+    def set_low(self):
+        ''' Set all pins in the group to off/low '''
+        self.set_value(0)
+
+
+class GpioInGroup(Gpio):
+    ''' Base GPIO class to represent a group of GPIO's configured for input that are read together.
+        Values are integer bit patterns, bit 0 is the first gpio in the group. '''
+    __slots__ = ('pull', 'gpio_tuples', '_weights')
+
+    def __init__(self, name, log_level, pull):
+        super().__init__(name, log_level)
+        self.pull = pull
+        self.gpio_tuples = ()
+        self._weights = None
+
+    def __len__(self):
+        return len(self.gpio_tuples)
+
+    def get_values(self) -> list:
+        ''' Return the values of all pins in the group as a list (first gpio first) '''
+        pass
+
+    def read(self) -> int:
+        ''' Return the values of all pins in the group packed in an integer '''
+        if self._weights is None:
+            self._weights = [1 << bit for bit in range(len(self.gpio_tuples))]
+        return sum(map(mul, self.get_values(), self._weights))
+
+    @property
+    def state(self) -> int:
+        ''' Return the values of all pins in the group packed in an integer '''
+        return self.read()
+
+    def snapshot(self, buffer=None) -> bytearray:
+        ''' Return the values of all pins in the group, one byte per pin.  If a buffer (bytearray or memoryview)
+            is passed the values are written to the buffer and no new buffer is allocated '''
+        if buffer is None:
+            buffer = bytearray(len(self.gpio_tuples))
+        if isinstance(buffer, bytearray):
+            buffer[:len(self.gpio_tuples)] = self.get_values()
+        else:
+            # a memoryview slice only accepts a bytes-like object, the values are written one at a time
+            for index, value in enumerate(self.get_values()):
+                buffer[index] = value
+        return buffer
+
 
 class GpioIn(Gpio):
-    ''' Base GPIO class to represent a GPIO configured for input '''
+    ''' Base GPIO class to represent a GPIO configured for input.  Backends that provide an event file descriptor
+        are watched by the shared event dispatcher, other backends use a background thread per pin. '''
+    __slots__ = ('_edge_thread', '_stop_thread', '_dispatcher', '_event_fd_registered', '_pending_event', '_triggered',
+                 '_kernel_debounce', 'executor', 'event_ring', 'pulse_meter', 'edge_handler', '_pulse_deadline_ns',
+                 '_async_queues', '_async_loop', '_async_reader', '_async_debounce', '_level', '_level_lock',
+                 'state_version', 'last_change_ns', 'event', 'callback', 'debounce_ms', 'pull')
+
     def __init__(self, name, log_level, event, callback, debounce_ms, pull):
         super().__init__(name, log_level)
         self._edge_thread = None
         self._stop_thread = False
+        self._dispatcher = None
+        self._event_fd_registered = None
+        self._pending_event = None
+        self._triggered = False
+        self._kernel_debounce = False
+        self.executor = None
+        self.event_ring = None
+        self.pulse_meter = None
+        # called with (edge, timestamp ns) for each raw edge from the event fd, replaces the debounce and callback
+        self.edge_handler = None
+        self._pulse_deadline_ns = 0
+        self._async_queues = []
+        self._async_loop = None
+        self._async_reader = None
+        self._async_debounce = None
+        # level cache maintained from the edges read from the event fd (None when not valid).  state_version is
+        # incremented for every edge and last_change_ns is the kernel timestamp of the last edge.  The lock is only
+        # taken to update the cache, so a hardware read can not overwrite the level from a newer edge
+        self._level = None
+        self._level_lock = Lock()
+        self.state_version = 0
+        self.last_change_ns = 0
         self.event = event
         self.callback = callback
         self.debounce_ms = debounce_ms
@@ -59,8 +268,17 @@ class GpioIn(Gpio):
 
     def stop(self):
         ''' Stop background event polling '''
+        if self._dispatcher is not None:
+            self._logger.info("%s: Removing from event dispatcher...", self)
+            self._dispatcher.unregister(self._event_fd_registered)
+            self._dispatcher.cancel(self)
+            self._dispatcher, self._event_fd_registered, self._pending_event = None, None, None
+        if self._async_reader is None:
+            self._level = None
+        if self.pulse_meter is not None:
+            self.stop_pulse_measure()
         if isinstance(self._edge_thread, Thread) and self._edge_thread.is_alive():
-            self._logger.info(f"{self.info_str}: Stopping event thread...")
+            self._logger.info("%s: Stopping event thread...", self)
             self._stop_thread = True
             self._edge_thread.join()
 
@@ -68,30 +286,286 @@ class GpioIn(Gpio):
         ''' Start background event polling '''
         self.stop()
         if self.event == EVENT.RISING or self.event == EVENT.FALLING or self.event == EVENT.BOTH:
-            self._logger.info(f"{self.info_str}: Starting event thread...")
-            self._edge_thread = Thread(target=self._event_thread, name=f'gpiod-in-thread', daemon=True)
-            self._edge_thread.start()
+            self._triggered = False
+            event_fd = self._event_fd()
+            if event_fd is not None:
+                self._logger.info("%s: Adding to event dispatcher...", self)
+                self._dispatcher, self._event_fd_registered = get_dispatcher(), event_fd
+                if self._async_reader is None:
+                    self._dispatcher.register(event_fd, self._on_event_fd_ready)
+            else:
+                self._logger.info("%s: Starting event thread...", self)
+                self._edge_thread = Thread(target=self._event_thread, name=f'gpiod-in-thread', daemon=True)
+                self._edge_thread.start()
 
     @property
     def state(self) -> int:
-        ''' Return current state of the input pin '''
+        ''' Return current state of the input pin.  While the event fd is watched the level is kept up to date from
+            the edges, so no hardware read is needed.  Use read_state() to force a hardware read '''
+        level = self._level
+        if level is not None:
+            return level
+        version = self.state_version
+        level = self.read_state()
+        if self._dispatcher is not None or self._async_reader is not None:
+            with self._level_lock:
+                # only cache the read if no edge was handled since (the edge level is newer)
+                if self.state_version == version:
+                    self._level = level
+        return level
+
+    def read_state(self) -> int:
+        ''' Read the current state from the hardware '''
         pass
 
+    def _set_kernel_debounce(self, debounce_ms:int) -> bool:
+        ''' Change the kernel debounce period of the line request.  Returns False if not supported by the library '''
+        return False
+
+    @property
+    def state_cached(self) -> bool:
+        ''' Return True if state is answered from the edge maintained level cache '''
+        return self._level is not None
+
     @property
     def event_thread_running(self):
-        ''' Return True/False if the background event thread is running '''
+        ''' Return True/False if the pin is watched for events (by the event dispatcher or a background thread) '''
+        if self._dispatcher is not None:
+            return True
         if isinstance(self._edge_thread, Thread) and self._edge_thread.is_alive():
             return True
         return False
-    
+
+    def _event_fd(self) -> int|None:
+        ''' Return the file descriptor that is readable when an edge event is pending, or None if not supported '''
+        return None
+
+    def _read_events(self) -> list:
+        ''' Read the pending edge events from the event fd.  Returns a list of (EVENT.RISING/FALLING, timestamp ns, line seqno).
+            The line seqno is 0 if the backend does not provide the kernel sequence numbers '''
+        return []
+
+    def _on_event_fd_ready(self):
+        ''' Called from the event dispatcher when the event fd is readable '''
+        event_ring, edge_handler = self.event_ring, self.edge_handler
+        events = self._read_events()
+        if len(events) > 0:
+            # the kernel always reports both edges on the event fd, so the last edge is the current level (also if
+            # older events were dropped on an overflow)
+            edge, timestamp_ns, _ = events[-1]
+            with self._level_lock:
+                self._level = 1 if edge == EVENT.RISING else 0
+                self.state_version += len(events)
+                self.last_change_ns = timestamp_ns
+        for edge, timestamp_ns, line_seqno in events:
+            if event_ring is not None:
+                event_ring.record(timestamp_ns, EDGE_CODES[edge], line_seqno)
+            if edge_handler is not None:
+                edge_handler(edge, timestamp_ns)
+            else:
+                self._handle_edge(edge, timestamp_ns)
+
+    def enable_event_ring(self, size=1024) -> EventRing:
+        ''' Record every edge read from the kernel (before debounce and filtering) in a fixed size ring buffer.
+            The events are read with drain_events() or event_ring.drain_into() '''
+        self.event_ring = EventRing(size)
+        return self.event_ring
+
+    def drain_events(self, max_events:int|None=None) -> list:
+        ''' Remove and return the recorded events as a list of (timestamp ns, EVENT.RISING/FALLING, line seqno) '''
+        if self.event_ring is None:
+            raise ValueError(f"{self.info_str}: Event ring is not enabled.  Call enable_event_ring() first")
+        return self.event_ring.drain(max_events)
+
+    def start_pulse_measure(self, window_ms=100, callback=None) -> PulseMeter:
+        ''' Count pulses and measure the frequency and duty cycle from the kernel edge timestamps.  While measuring, the
+            edges are not debounced (the kernel debounce is switched off until stop_pulse_measure) and the edge callback
+            is not called, instead a PULSE_STATS tuple is published every window_ms to callback(stats=PULSE_STATS) and
+            saved in pulse_meter.stats '''
+        if self._event_fd() is None:
+            raise ValueError(f"{self.info_str}: Pulse measurement requires a GPIO library with an event fd (gpiod or uapi)")
+        if self.event != EVENT.BOTH:
+            raise ValueError(f"{self.info_str}: Pulse measurement requires event=EVENT.BOTH, not '{self.event}'")
+        if self.pulse_meter is not None:
+            # restart, the kernel debounce is already off
+            get_dispatcher().cancel(self.pulse_meter)
+            self.pulse_meter, self.edge_handler = None, None
+        elif self._kernel_debounce:
+            # switch off the debounce before starting, a failure leaves the line as it was
+            try:
+                debounce_changed = self._set_kernel_debounce(0)
+            except OSError as e:
+                raise ValueError(f"{self.info_str}: Error switching off the kernel debounce for pulse measurement. Error: {e}") from e
+            if not debounce_changed:
+                raise ValueError(f"{self.info_str}: The kernel debounce can not be changed, request the gpio with kernel_debounce=False for pulse measurement")
+        if not self.event_thread_running:
+            self.start()
+        self._logger.info("%s: Starting pulse measurement, window %sms...", self, window_ms)
+        pulse_meter = PulseMeter(self.name, window_ms=window_ms, callback=callback)
+        self._pulse_deadline_ns = monotonic_ns() + pulse_meter.window_ns
+        self.pulse_meter, self.edge_handler = pulse_meter, pulse_meter.edge
+        get_dispatcher().call_later(pulse_meter, pulse_meter.window_ns / 1e9, self._pulse_window_expired)
+        return pulse_meter
+
+    def stop_pulse_measure(self) -> PULSE_STATS|None:
+        ''' Stop the pulse measurement and return to edge events.  Returns the stats of the last full window '''
+        pulse_meter, self.pulse_meter = self.pulse_meter, None
+        if pulse_meter is None:
+            return None
+        if self._kernel_debounce:
+            try:
+                self._set_kernel_debounce(self.debounce_ms)
+            except OSError as e:
+                self._logger.warning("%s: Error restoring the kernel debounce, using userspace debounce. Error: %s", self, e)
+                self._kernel_debounce = False
+        self.edge_handler = None
+        self._logger.info("%s: Stopping pulse measurement...", self)
+        get_dispatcher().cancel(pulse_meter)
+        return pulse_meter.stats
+
+    def _pulse_window_expired(self):
+        ''' Called from the event dispatcher at the end of each window to publish the pulse stats '''
+        pulse_meter = self.pulse_meter
+        if pulse_meter is None:
+            return
+        stats = pulse_meter.publish()
+        if pulse_meter.callback is not None:
+            (self.executor if self.executor is not None else get_executor()).submit(pulse_meter, pulse_meter.callback, {'stats': stats})
+        # schedule against the deadline so the windows do not drift
+        self._pulse_deadline_ns += pulse_meter.window_ns
+        get_dispatcher().call_later(pulse_meter, max(0, self._pulse_deadline_ns - monotonic_ns()) / 1e9, self._pulse_window_expired)
+
+    def _handle_edge(self, edge:str, timestamp_ns:int):
+        ''' Debounce an edge.  The edge is only used if there are no more edges within the debounce interval.
+            Edges from lines debounced by the kernel are used directly '''
+        if self._kernel_debounce:
+            self._filter_edge(edge, timestamp_ns)
+        elif self.debounce_ms and self._async_reader is not None:
+            self._pending_event = (edge, timestamp_ns)
+            if self._async_debounce is not None:
+                self._async_debounce.cancel()
+            self._async_debounce = self._async_loop.call_later(self.debounce_ms / 1000, self._debounce_expired) # type: ignore
+        elif self.debounce_ms and self._dispatcher is not None:
+            self._pending_event = (edge, timestamp_ns)
+            self._dispatcher.call_later(self, self.debounce_ms / 1000, self._debounce_expired)
+        else:
+            self._filter_edge(edge, timestamp_ns)
+
+    def _debounce_expired(self):
+        ''' Called from the event dispatcher (or event loop) when no edges were seen for the debounce interval '''
+        pending_event, self._pending_event = self._pending_event, None
+        if pending_event is not None:
+            self._filter_edge(*pending_event)
+
+    def _filter_edge(self, edge:str, timestamp_ns:int):
+        ''' Filter a debounced edge based on the event type and call the event '''
+        # if monitoring for event rising or event falling ONLY, just send the event
+        if self.event != EVENT.BOTH:
+            if self.event == edge:
+                self._triggered = True
+                self._call_event(timestamp=timestamp_ns / 1e9, event=edge, triggered=self._triggered)
+        # otherwise need to track when we are triggered so we don't alert to a release if there was no press!
+        elif (edge == EVENT.RISING and self.pull == PULL.DOWN) or (edge == EVENT.FALLING and self.pull != PULL.DOWN):
+            self._triggered = True
+            self._call_event(timestamp=timestamp_ns / 1e9, event=edge, triggered=self._triggered)
+        elif self._triggered:
+            self._triggered = False
+            self._call_event(timestamp=timestamp_ns / 1e9, event=edge, triggered=self._triggered)
+
     def _event_thread(self):
         ''' Backgroun thread to watch for rising or falling edges '''
         pass
 
+    def _callback_kwargs(self, timestamp:float, event:str, triggered:bool) -> dict:
+        ''' Return the keyword arguments passed to the callback.  The timestamp is the kernel edge time in seconds on the
+            monotonic clock (gpiod, uAPI and sim, compare with time.monotonic()), not the time() epoch '''
+        return {'event': event, 'timestamp': timestamp, 'state': triggered, 'gpio': self.name}
+
     def _call_event(self, timestamp:float, event:str, triggered:bool):
+        ''' Queue the callback on the pin executor (or the default executor).  Callbacks for a pin run in order '''
+        if len(self._async_queues) > 0:
+            self._put_async(EDGE_EVENT(event, timestamp, triggered, self.name))
         if self.callback is not None:
-            self._logger.debug(f"{self.info_str}: {event.upper()} state: {triggered}")
-            Thread(target=self.callback, kwargs={'event': event,
-                    'timestamp': timestamp, 'state': triggered, 'gpio': self.name}).start()
+            if self._logger.isEnabledFor(DEBUG):
+                self._logger.debug("%s: %s state: %s", self, event.upper(), triggered)
+            (self.executor if self.executor is not None else get_executor()).submit(self, self.callback,
+                                                                                   self._callback_kwargs(timestamp, event, triggered))
+        elif len(self._async_queues) == 0 and self._logger.isEnabledFor(INFO):
+            self._logger.info("%s: %s state: %s", self, event.upper(), triggered)
+
+    def _put_async(self, edge_event:EDGE_EVENT):
+        ''' Deliver the edge event to the asyncio consumers.  Events from a backend thread are passed to the loop '''
+        if self._async_reader is None and self._async_loop is not None:
+            self._async_loop.call_soon_threadsafe(self._put_async_queues, edge_event)
         else:
-            self._logger.info(f"{self.info_str}: {event.upper()} state: {triggered}")
+            self._put_async_queues(edge_event)
+
+    def _put_async_queues(self, edge_event:EDGE_EVENT):
+        ''' Add the edge event to each asyncio consumer queue, the oldest event is dropped if a queue is full '''
+        for queue in self._async_queues:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(edge_event)
+
+    def _async_subscribe(self, max_queue:int):
+        ''' Add an asyncio consumer queue.  The first consumer moves the event fd from the event dispatcher to the loop '''
+        from asyncio import get_running_loop, Queue
+        loop = get_running_loop()
+        if self._async_loop is not None and self._async_loop is not loop:
+            raise RuntimeError(f"{self.info_str}: Events are already being consumed from a different event loop")
+        queue = Queue(maxsize=max_queue)
+        self._async_queues.append(queue)
+        if len(self._async_queues) == 1:
+            self._async_loop = loop
+            event_fd = self._event_fd()
+            if event_fd is not None:
+                if self._dispatcher is not None:
+                    self._dispatcher.unregister(self._event_fd_registered)
+                    self._dispatcher.cancel(self)
+                loop.add_reader(event_fd, self._on_event_fd_ready)
+                self._async_reader = event_fd
+            elif not self.event_thread_running:
+                self.start()
+        return queue
+
+    def _async_unsubscribe(self, queue):
+        ''' Remove an asyncio consumer queue.  The last consumer returns the event fd to the event dispatcher '''
+        self._async_queues.remove(queue)
+        if len(self._async_queues) == 0:
+            if self._async_reader is not None:
+                self._async_loop.remove_reader(self._async_reader) # type: ignore
+                if self._async_debounce is not None:
+                    self._async_debounce.cancel()
+                    self._async_debounce = None
+                if self._dispatcher is not None:
+                    self._dispatcher.register(self._event_fd_registered, self._on_event_fd_ready) # type: ignore
+                else:
+                    self._level = None
+            self._async_reader, self._async_loop = None, None
+
+    async def events(self, max_queue=64):
+        ''' Async iterator of EDGE_EVENT's for the pin (the same events passed to the callback).
+            i.e.  async for event in gpio_in.events(): ... '''
+        queue = self._async_subscribe(max_queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._async_unsubscribe(queue)
+
+    async def wait_for_edge(self, edge=EVENT.BOTH, timeout:float|None=None) -> EDGE_EVENT|None:
+        ''' Wait for the next EVENT.RISING, EVENT.FALLING or EVENT.BOTH edge event.  Returns None on timeout '''
+        from asyncio import wait_for, TimeoutError as AsyncTimeoutError
+        queue = self._async_subscribe(64)
+
+        async def next_edge():
+            while True:
+                edge_event = await queue.get()
+                if edge == EVENT.BOTH or edge_event.event == edge:
+                    return edge_event
+        try:
+            return await wait_for(next_edge(), timeout)
+        except AsyncTimeoutError:
+            return None
+        finally:
+            self._async_unsubscribe(queue)
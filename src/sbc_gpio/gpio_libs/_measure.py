@@ -0,0 +1,63 @@
+'''
+Pulse counting and measurement for GpioIn (flow sensors, fan tachometers, etc).  Edges are fed to the
+PulseMeter from the event dispatcher with the kernel timestamp and only a few integer operations are done
+per edge.  The aggregates for each window (i.e. every 100ms) are published as a PULSE_STATS tuple instead
+of a callback per edge.
+'''
+from collections import namedtuple
+from time import monotonic_ns
+from sbc_gpio import EVENT
+
+# period_ns/high_ns are averages over the window, duty_cycle is 0.0-1.0 (None if not measured in the window)
+PULSE_STATS = namedtuple('PULSE_STATS', ('gpio', 'window_ns', 'pulses', 'total_pulses', 'frequency_hz', 'period_ns',
+                                         'high_ns', 'duty_cycle', 'edges'))
+
+
+class PulseMeter:
+    ''' Count rising edges and measure the period and high time of a pulse train from edge timestamps '''
+    def __init__(self, gpio_name:str, window_ms=100, callback=None):
+        self.gpio_name = gpio_name
+        self.window_ns = int(window_ms * 1_000_000)
+        self.callback = callback
+        self.stats = None
+        self.total_pulses = 0
+        self._last_rising_ns = 0
+        self._window_start_ns = monotonic_ns()
+        self._reset_window()
+
+    def _reset_window(self):
+        self._pulses = 0
+        self._edges = 0
+        self._period_sum = 0
+        self._periods = 0
+        self._high_sum = 0
+        self._highs = 0
+
+    def edge(self, edge:str, timestamp_ns:int) -> None:
+        ''' Add an edge (EVENT.RISING or EVENT.FALLING) with the kernel timestamp '''
+        self._edges += 1
+        if edge is EVENT.RISING or edge == EVENT.RISING:
+            if self._last_rising_ns:
+                self._period_sum += timestamp_ns - self._last_rising_ns
+                self._periods += 1
+            self._last_rising_ns = timestamp_ns
+            self._pulses += 1
+        elif self._last_rising_ns and timestamp_ns > self._last_rising_ns:
+            self._high_sum += timestamp_ns - self._last_rising_ns
+            self._highs += 1
+
+    def publish(self, now_ns:int|None=None) -> PULSE_STATS:
+        ''' Close the current window and return (and save) the aggregates for the window '''
+        now_ns = monotonic_ns() if now_ns is None else now_ns
+        window_ns, self._window_start_ns = now_ns - self._window_start_ns, now_ns
+        self.total_pulses += self._pulses
+        period_ns = self._period_sum // self._periods if self._periods else None
+        high_ns = self._high_sum // self._highs if self._highs else None
+        if period_ns:
+            frequency_hz = 1e9 / period_ns
+        else:
+            frequency_hz = self._pulses * 1e9 / window_ns if window_ns > 0 else 0.0
+        self.stats = PULSE_STATS(self.gpio_name, window_ns, self._pulses, self.total_pulses, frequency_hz, period_ns, high_ns,
+                                 high_ns / period_ns if period_ns and high_ns is not None else None, self._edges)
+        self._reset_window()
+        return self.stats
@@ -0,0 +1,159 @@
+'''
+Write-through shadow register for GpioOut and GpioOutGroup (enabled with enable_shadow()).  The last
+written value is kept in memory so writes that do not change the output are skipped and state is
+answered without reading the hardware.  Every verify_interval seconds the hardware is read back (on the
+next write or state) to detect changes made outside of this object (another process, a reset).
+
+The shadow is added by changing the class of the gpio to a subclass of the library class with the
+shadow methods, so there is no cost for gpios without a shadow.
+'''
+from time import monotonic_ns
+
+
+class OutputShadow:
+    ''' Shadow value and counters.  Hits are writes that were skipped, misses are writes sent to the hardware and
+        external_changes are hardware read backs that did not match the shadow value '''
+    def __init__(self, value:int, verify_interval:float|None=1.0):
+        self.value = value
+        self.hits = 0
+        self.misses = 0
+        self.verifies = 0
+        self.external_changes = 0
+        self.verify_interval_ns = int(verify_interval * 1e9) if verify_interval else None
+        self.verify_at_ns = monotonic_ns() + self.verify_interval_ns if self.verify_interval_ns else None
+
+    def due(self) -> bool:
+        ''' Return True if the hardware should be read back '''
+        return self.verify_at_ns is not None and monotonic_ns() >= self.verify_at_ns
+
+    def verified(self, hardware_value:int|None) -> int:
+        ''' Update the shadow from a hardware read back and return the current value '''
+        if self.verify_interval_ns:
+            self.verify_at_ns = monotonic_ns() + self.verify_interval_ns
+        if hardware_value is not None:
+            self.verifies += 1
+            if hardware_value != self.value:
+                self.external_changes += 1
+                self.value = hardware_value
+        return self.value
+
+    def stats(self) -> dict:
+        ''' Return the shadow counters '''
+        return {'value': self.value, 'hits': self.hits, 'misses': self.misses, 'verifies': self.verifies,
+                'external_changes': self.external_changes}
+
+
+class ShadowGpioOut:
+    ''' GpioOut methods with the shadow register, mixed in before the library class '''
+    __slots__ = ()
+
+    def verify_shadow(self) -> int:
+        ''' Read the output back from the hardware and update the shadow.  Returns the current value '''
+        return self.shadow.verified(super().state) # type: ignore
+
+    @property
+    def state(self):
+        ''' Return the output state from the shadow register '''
+        shadow = self.shadow # type: ignore
+        return self.verify_shadow() if shadow.due() else shadow.value
+
+    def set_high(self):
+        ''' Set the pin to on/high (skipped if the shadow is already high) '''
+        shadow = self.shadow # type: ignore
+        if shadow.value == 1 and (not shadow.due() or self.verify_shadow() == 1):
+            shadow.hits += 1
+            return
+        super().set_high() # type: ignore
+        shadow.value = 1
+        shadow.misses += 1
+
+    set_1 = set_high
+    set_on = set_high
+
+    def set_low(self):
+        ''' Set the pin to off/low (skipped if the shadow is already low) '''
+        shadow = self.shadow # type: ignore
+        if shadow.value == 0 and (not shadow.due() or self.verify_shadow() == 0):
+            shadow.hits += 1
+            return
+        super().set_low() # type: ignore
+        shadow.value = 0
+        shadow.misses += 1
+
+    set_0 = set_low
+    set_off = set_low
+
+
+class ShadowGpioOutGroup:
+    ''' GpioOutGroup methods with the shadow register, mixed in before the library class '''
+    __slots__ = ()
+
+    def verify_shadow(self) -> int:
+        ''' Read the outputs back from the hardware (if supported by the library) and update the shadow '''
+        value = self.shadow.verified(self._read_value()) # type: ignore
+        self._value = value
+        return value
+
+    @property
+    def state(self) -> int:
+        ''' Return the group value from the shadow register '''
+        shadow = self.shadow # type: ignore
+        return self.verify_shadow() if shadow.due() else shadow.value
+
+    value = state
+
+    def set_value(self, value:int):
+        ''' Write the integer bit pattern to the group (skipped if no gpio changes) '''
+        shadow = self.shadow # type: ignore
+        if shadow.due():
+            self.verify_shadow()
+        if value == shadow.value:
+            shadow.hits += 1
+            return
+        super().set_value(value) # type: ignore
+        shadow.value = value
+        shadow.misses += 1
+
+    write = set_value
+
+    def set_values(self, bits:int, mask:int):
+        ''' Write only the gpios in the mask (skipped if none of them change) '''
+        shadow = self.shadow # type: ignore
+        if shadow.due():
+            self.verify_shadow()
+        value = (shadow.value & ~mask) | (bits & mask)
+        if value == shadow.value:
+            shadow.hits += 1
+            return
+        if masked_writes(self._shadow_base): # type: ignore
+            # masked write, the gpios outside the mask are not written from the shadow
+            super().set_values(bits, mask) # type: ignore
+        else:
+            # the library writes the whole group, call its set_value directly (not the shadow set_value, the miss is counted here)
+            super().set_value((self._value & ~mask) | (bits & mask)) # type: ignore
+        shadow.value = value
+        shadow.misses += 1
+
+
+_shadow_classes = {}
+_masked_writes = {}
+
+
+def masked_writes(cls) -> bool:
+    ''' Return (cached) True if the library group class has its own masked set_values, False if it uses the generic
+        set_values that writes the whole group with set_value '''
+    masked = _masked_writes.get(cls)
+    if masked is None:
+        from ._generic_gpio import GpioOutGroup
+        masked = _masked_writes[cls] = cls.set_values is not GpioOutGroup.set_values
+    return masked
+
+
+def shadow_class(cls, mixin) -> type:
+    ''' Return the (cached) subclass of the library class with the shadow methods.  The subclass adds no slots so the
+        class of an existing gpio can be changed '''
+    shadow_cls = _shadow_classes.get(cls)
+    if shadow_cls is None:
+        shadow_cls = type(f"Shadow{cls.__name__}", (mixin, cls), {'__slots__': (), '_shadow_base': cls})
+        _shadow_classes[cls] = shadow_cls
+    return shadow_cls
@@ -0,0 +1,24 @@
+'''
+Timing helpers for the output engines (software PWM, waveform playback).  Waits are to an absolute
+monotonic deadline so errors do not accumulate: the thread sleeps until spin_ns before the deadline
+(the scheduler wakeup latency) and busy waits the rest.
+'''
+from time import monotonic_ns, sleep
+
+# default time before the deadline to stop sleeping and busy wait
+SPIN_NS = 200_000
+
+
+def wait_until_ns(deadline_ns:int, spin_ns=SPIN_NS, stop_event=None) -> bool:
+    ''' Wait until the monotonic clock reaches deadline_ns.  If a stop_event (threading.Event) is passed the sleep
+        is interrupted when it is set.  Returns False if stopped, True at the deadline '''
+    remaining_ns = deadline_ns - monotonic_ns() - spin_ns
+    if remaining_ns > 0:
+        if stop_event is not None:
+            if stop_event.wait(remaining_ns / 1e9):
+                return False
+        else:
+            sleep(remaining_ns / 1e9)
+    while monotonic_ns() < deadline_ns:
+        pass
+    return stop_event is None or not stop_event.is_set()
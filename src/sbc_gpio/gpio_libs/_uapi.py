@@ -0,0 +1,179 @@
+'''
+GPIO character device uAPI v2 (linux/gpio.h) structures and ioctls.  Used to request lines directly from
+/dev/gpiochipN without a gpiod binding, i.e. for kernel debounce (debounce_period_us) which the libgpiod
+1.x bindings do not expose.  Requires Linux 5.10+.
+
+All buffers for a request are allocated once so reading and writing values does not allocate.  The
+module level ioctl function can be replaced (i.e. for tests with a fake ioctl layer).
+'''
+import os
+import struct
+from ctypes import Structure, Union, c_uint32, c_int32, c_uint64, c_char, sizeof
+from fcntl import ioctl as _fcntl_ioctl
+
+GPIO_V2_LINES_MAX = 64
+GPIO_MAX_NAME_SIZE = 32
+GPIO_V2_LINE_NUM_ATTRS_MAX = 10
+
+# enum gpio_v2_line_flag
+GPIO_V2_LINE_FLAG_USED = 1 << 0
+GPIO_V2_LINE_FLAG_ACTIVE_LOW = 1 << 1
+GPIO_V2_LINE_FLAG_INPUT = 1 << 2
+GPIO_V2_LINE_FLAG_OUTPUT = 1 << 3
+GPIO_V2_LINE_FLAG_EDGE_RISING = 1 << 4
+GPIO_V2_LINE_FLAG_EDGE_FALLING = 1 << 5
+GPIO_V2_LINE_FLAG_OPEN_DRAIN = 1 << 6
+GPIO_V2_LINE_FLAG_OPEN_SOURCE = 1 << 7
+GPIO_V2_LINE_FLAG_BIAS_PULL_UP = 1 << 8
+GPIO_V2_LINE_FLAG_BIAS_PULL_DOWN = 1 << 9
+GPIO_V2_LINE_FLAG_BIAS_DISABLED = 1 << 10
+GPIO_V2_LINE_FLAG_EVENT_CLOCK_REALTIME = 1 << 11
+
+# enum gpio_v2_line_attr_id
+GPIO_V2_LINE_ATTR_ID_FLAGS = 1
+GPIO_V2_LINE_ATTR_ID_OUTPUT_VALUES = 2
+GPIO_V2_LINE_ATTR_ID_DEBOUNCE = 3
+
+# enum gpio_v2_line_event_id
+GPIO_V2_LINE_EVENT_RISING_EDGE = 1
+GPIO_V2_LINE_EVENT_FALLING_EDGE = 2
+
+
+class gpio_v2_line_attribute_value(Union):
+    _fields_ = [('flags', c_uint64), ('values', c_uint64), ('debounce_period_us', c_uint32)]
+
+
+class gpio_v2_line_attribute(Structure):
+    _fields_ = [('id', c_uint32), ('padding', c_uint32), ('value', gpio_v2_line_attribute_value)]
+
+
+class gpio_v2_line_config_attribute(Structure):
+    _fields_ = [('attr', gpio_v2_line_attribute), ('mask', c_uint64)]
+
+
+class gpio_v2_line_config(Structure):
+    _fields_ = [('flags', c_uint64), ('num_attrs', c_uint32), ('padding', c_uint32 * 5),
+                ('attrs', gpio_v2_line_config_attribute * GPIO_V2_LINE_NUM_ATTRS_MAX)]
+
+
+class gpio_v2_line_request(Structure):
+    _fields_ = [('offsets', c_uint32 * GPIO_V2_LINES_MAX), ('consumer', c_char * GPIO_MAX_NAME_SIZE),
+                ('config', gpio_v2_line_config), ('num_lines', c_uint32), ('event_buffer_size', c_uint32),
+                ('padding', c_uint32 * 5), ('fd', c_int32)]
+
+
+class gpio_v2_line_values(Structure):
+    _fields_ = [('bits', c_uint64), ('mask', c_uint64)]
+
+
+# struct gpio_v2_line_event: timestamp_ns, id, offset, seqno, line_seqno, padding[6]
+LINE_EVENT = struct.Struct('=QIIII24x')
+
+
+def _IOWR(nr:int, size:int) -> int:
+    ''' Return the ioctl request number for _IOWR(0xB4, nr, size) '''
+    return (3 << 30) | (size << 16) | (0xB4 << 8) | nr
+
+
+GPIO_V2_GET_LINE_IOCTL = _IOWR(0x07, sizeof(gpio_v2_line_request))
+GPIO_V2_LINE_SET_CONFIG_IOCTL = _IOWR(0x0D, sizeof(gpio_v2_line_config))
+GPIO_V2_LINE_GET_VALUES_IOCTL = _IOWR(0x0E, sizeof(gpio_v2_line_values))
+GPIO_V2_LINE_SET_VALUES_IOCTL = _IOWR(0x0F, sizeof(gpio_v2_line_values))
+
+GPIO_DEV_DIR = '/dev'
+
+ioctl = _fcntl_ioctl
+
+
+def chip_path(gpio_chip) -> str:
+    ''' Return the character device for the chip number '''
+    return os.path.join(GPIO_DEV_DIR, f"gpiochip{int(gpio_chip)}")
+
+
+def line_config(config:gpio_v2_line_config, flags:int, debounce_us=0, output_values:int|None=None, num_lines=1) -> gpio_v2_line_config:
+    ''' Fill a line config for all lines in the request with the flags, debounce period and output values '''
+    all_lines = (1 << num_lines) - 1
+    config.flags = flags
+    config.num_attrs = 0
+    if debounce_us:
+        config.attrs[config.num_attrs].attr.id = GPIO_V2_LINE_ATTR_ID_DEBOUNCE
+        config.attrs[config.num_attrs].attr.value.debounce_period_us = int(debounce_us)
+        config.attrs[config.num_attrs].mask = all_lines
+        config.num_attrs += 1
+    if output_values is not None:
+        config.attrs[config.num_attrs].attr.id = GPIO_V2_LINE_ATTR_ID_OUTPUT_VALUES
+        config.attrs[config.num_attrs].attr.value.values = output_values
+        config.attrs[config.num_attrs].mask = all_lines
+        config.num_attrs += 1
+    return config
+
+
+class LineRequest:
+    ''' Lines requested from one gpiochip with GPIO_V2_GET_LINE_IOCTL.  Raises OSError if the kernel rejects the request
+        (i.e. ENOTTY/EINVAL on kernels without uAPI v2 or debounce support) '''
+    def __init__(self, gpio_chip, offsets, flags:int, consumer:str, debounce_us=0, output_values:int|None=None, event_buffer_size=0,
+                 max_events=16):
+        if len(offsets) == 0 or len(offsets) > GPIO_V2_LINES_MAX:
+            raise ValueError(f"Between 1 and {GPIO_V2_LINES_MAX} lines can be requested from a chip, not {len(offsets)}")
+        self.gpio_chip, self.offsets = int(gpio_chip), tuple(int(offset) for offset in offsets)
+        self.all_lines = (1 << len(self.offsets)) - 1
+        request = gpio_v2_line_request()
+        for index, offset in enumerate(self.offsets):
+            request.offsets[index] = offset
+        request.consumer = consumer.encode('utf-8')[:GPIO_MAX_NAME_SIZE - 1]
+        request.num_lines = len(self.offsets)
+        request.event_buffer_size = event_buffer_size
+        line_config(request.config, flags, debounce_us=debounce_us, output_values=output_values, num_lines=len(self.offsets))
+        chip_fd = os.open(chip_path(self.gpio_chip), os.O_RDWR | os.O_CLOEXEC)
+        try:
+            ioctl(chip_fd, GPIO_V2_GET_LINE_IOCTL, request)
+        finally:
+            os.close(chip_fd)
+        self.fd = request.fd
+        self.flags = flags
+        # preallocated buffers for the hot path
+        self._values = gpio_v2_line_values()
+        self._config = gpio_v2_line_config()
+        self._events = bytearray(LINE_EVENT.size * max_events)
+        self._events_view = memoryview(self._events)
+
+    def get_values(self) -> int:
+        ''' Return the values of all lines as a bit pattern (bit 0 is the first offset) '''
+        values = self._values
+        values.mask = self.all_lines
+        ioctl(self.fd, GPIO_V2_LINE_GET_VALUES_IOCTL, values)
+        return values.bits
+
+    def get_value(self) -> int:
+        ''' Return the value of the first line '''
+        values = self._values
+        values.mask = 1
+        ioctl(self.fd, GPIO_V2_LINE_GET_VALUES_IOCTL, values)
+        return values.bits & 1
+
+    def set_values(self, bits:int, mask:int|None=None) -> None:
+        ''' Set the lines in the mask (default all lines) to the bit pattern '''
+        values = self._values
+        values.bits = bits
+        values.mask = self.all_lines if mask is None else mask
+        ioctl(self.fd, GPIO_V2_LINE_SET_VALUES_IOCTL, values)
+
+    def reconfigure(self, flags:int, debounce_us=0, output_values:int|None=None) -> None:
+        ''' Change the flags (direction, bias, edges) and debounce of all lines without releasing them '''
+        ioctl(self.fd, GPIO_V2_LINE_SET_CONFIG_IOCTL, line_config(self._config, flags, debounce_us=debounce_us,
+                                                                output_values=output_values, num_lines=len(self.offsets)))
+        self.flags = flags
+
+    def read_events(self) -> list:
+        ''' Read the pending edge events.  Returns a list of (timestamp ns, event id, offset, seqno, line seqno) '''
+        length = os.readv(self.fd, [self._events])
+        return list(LINE_EVENT.iter_unpack(self._events_view[:length - length % LINE_EVENT.size]))
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def close(self) -> None:
+        ''' Release the lines '''
+        if self.fd is not None and self.fd >= 0:
+            os.close(self.fd)
+        self.fd = None
@@ -3,11 +3,15 @@ GPIO library:  gpiod
 Supported platforms: Most modern SBC devices that support the libgpiod kernel driver
 '''
 import gpiod
-from threading import Thread
-from time import time
+if not hasattr(gpiod, 'chip'):
+    raise ImportError(f"gpiod python binding {getattr(gpiod, '__version__', '')} is not 1.x, use sbc_gpio.gpio_libs.lib_gpiod2")
+from threading import Thread, Lock
+from time import monotonic_ns
 from datetime import timedelta, datetime
 from sbc_gpio import PULL, EVENT
-from ._generic_gpio import GpioIn as Generic_GpioIn, GpioOut as Generic_GpioOut
+from . import _uapi
+from ._generic_gpio import GpioIn as Generic_GpioIn, GpioOut as Generic_GpioOut, GpioOutGroup as Generic_GpioOutGroup, \
+    GpioInGroup as Generic_GpioInGroup
 from logging_handler import INFO
 
 
@@ -15,15 +19,59 @@ NAME = 'gpiod'
 VERSION = (1,0,0)
 
 
+class ChipPool:
+    ''' Process wide pool of open gpiod chips.  Each chip is opened once, shared by all lines on the chip
+        and closed when the last line is released. '''
+    def __init__(self):
+        self._lock = Lock()
+        self._chips = {}
+
+    def acquire(self, gpio_chip) -> gpiod.chip:
+        ''' Return the open chip (opening it if needed) and add a line reference '''
+        with self._lock:
+            entry = self._chips.get(int(gpio_chip))
+            if entry is None:
+                entry = self._chips[int(gpio_chip)] = [gpiod.chip(str(gpio_chip), gpiod.chip.OPEN_BY_NUMBER), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def release(self, gpio_chip) -> None:
+        ''' Remove a line reference from the chip, the chip is closed when there are no lines left '''
+        with self._lock:
+            entry = self._chips.get(int(gpio_chip))
+            if entry is None:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del self._chips[int(gpio_chip)]
+                entry[0].reset()
+
+    def stats(self) -> dict:
+        ''' Return the pool statistics -> {'open_chips': <int>, 'lines': {<chip>: <line count>}} '''
+        with self._lock:
+            return {'open_chips': len(self._chips), 'lines': {chip: entry[1] for chip, entry in self._chips.items()}}
+
+
+CHIP_POOL = ChipPool()
+
+
+def chip_pool_stats() -> dict:
+    ''' Return the statistics for the process wide chip pool '''
+    return CHIP_POOL.stats()
+
+
 class GpioOut(Generic_GpioOut):
     ''' Class to represent an abstracted GPIO pin using the gpiod '''
+    __slots__ = ('gpio_pin', 'gpio_chip', '_chip', '_pin')
+
     def __init__(self, gpio_pin, gpio_chip, name=None, pull=PULL.NONE, log_level=INFO, initial_state=0):
         super().__init__(name=name, log_level=log_level, pull=pull)
         self.name = name if name is not None else f"chip:{gpio_chip},pin:{gpio_pin}"
         self.gpio_pin, self.gpio_chip = gpio_pin, gpio_chip
-        # initialize the chip and pin
+        self._chip, self._pin = None, None
+        # initialize the chip (shared from the chip pool) and pin
+        chip = self._chip = CHIP_POOL.acquire(gpio_chip)
         try:
-            chip = gpiod.chip(int(gpio_chip), gpiod.chip.OPEN_BY_NUMBER)
             self._pin = chip.get_line(int(self.gpio_pin))
             pin_config = gpiod.line_request()
             pin_config.consumer = name if name is not None else f'{self.info_str}-OUT'
@@ -34,17 +82,20 @@ class GpioOut(Generic_GpioOut):
                 pin_config.flags = gpiod.line_request.FLAG_BIAS_PULL_DOWN
             else:
                 pin_config.flags = gpiod.line_request.FLAG_BIAS_DISABLE
-            self._logger.info(f"{self.info_str}: Requesting GPIO...")
+            self._logger.info("%s: Requesting GPIO...", self)
             self._pin.request(pin_config)
         except Exception as e:
-            self._logger.warning(f"{self.info_str}: Error aquiring pin, attempting without pull UP/DOWN bias. Error: {e}")
-            chip = gpiod.chip(int(gpio_chip), gpiod.chip.OPEN_BY_NUMBER)
-            self._pin = chip.get_line(int(self.gpio_pin))
-            pin_config = gpiod.line_request()
-            pin_config.consumer = name if name is not None else f'{self.info_str}-OUT'
-            pin_config.request_type = gpiod.line_request.DIRECTION_OUTPUT
-            self._logger.info(f"{self.info_str}: Requesting GPIO without pull UP/DOWN bias...")
-            self._pin.request(pin_config)
+            self._logger.warning("%s: Error aquiring pin, attempting without pull UP/DOWN bias. Error: %s", self, e)
+            try:
+                self._pin = chip.get_line(int(self.gpio_pin))
+                pin_config = gpiod.line_request()
+                pin_config.consumer = name if name is not None else f'{self.info_str}-OUT'
+                pin_config.request_type = gpiod.line_request.DIRECTION_OUTPUT
+                self._logger.info("%s: Requesting GPIO without pull UP/DOWN bias...", self)
+                self._pin.request(pin_config)
+            except Exception:
+                self._release_chip()
+                raise
 
         if initial_state == 0:
             self.set_0()
@@ -52,8 +103,16 @@ class GpioOut(Generic_GpioOut):
             self.set_1()
 
     def close(self):
-        self._logger.info(f"{self.info_str}: Releasing GPIO...")
-        self._pin.release()
+        if self._chip is not None:
+            self._logger.info("%s: Releasing GPIO...", self)
+            self._pin.release()
+            self._release_chip()
+
+    def _release_chip(self):
+        ''' Return the chip to the chip pool '''
+        if self._chip is not None:
+            self._chip = None
+            CHIP_POOL.release(self.gpio_chip)
 
     @property
     def state(self):
@@ -74,15 +133,164 @@ class GpioOut(Generic_GpioOut):
     set_0 = set_low
     set_off = set_low
 
+class _BulkGroup:
+    ''' Line bulk handling shared by the gpiod group classes.  The lines for each chip are requested as one
+        line bulk so each chip is read or written with a single call (one ioctl per chip). '''
+    __slots__ = ()
+
+    def _request_bulks(self, gpio_tuples, name, pull, request_type, initial_value=None):
+        ''' Request the lines for all chips in the group '''
+        self._bulks = {}
+        self.gpio_tuples = tuple((int(gpio_chip), int(gpio_pin)) for gpio_chip, gpio_pin in gpio_tuples)
+        self.name = name if name is not None else f"group:{','.join(f'{chip}-{pin}' for chip, pin in self.gpio_tuples)}"
+        # group the lines per chip -> {chip: [bit positions in the group value]}
+        self._chip_bits = {}
+        for bit, (gpio_chip, _) in enumerate(self.gpio_tuples):
+            self._chip_bits.setdefault(gpio_chip, []).append(bit)
+        try:
+            for gpio_chip, bits in self._chip_bits.items():
+                self._bulks[gpio_chip] = self._request_bulk(gpio_chip, bits, name, pull, request_type, initial_value)
+        except Exception:
+            self.close()
+            raise
+
+    def _request_bulk(self, gpio_chip, bits, name, pull, request_type, initial_value):
+        ''' Request the lines for one chip in the group as a line bulk '''
+        chip = CHIP_POOL.acquire(gpio_chip)
+        for _ in bits[1:]:
+            CHIP_POOL.acquire(gpio_chip)
+        try:
+            bulk = chip.get_lines([self.gpio_tuples[bit][1] for bit in bits])
+            default_vals = [(initial_value >> bit) & 1 for bit in bits] if initial_value is not None else []
+            pin_config = gpiod.line_request()
+            pin_config.consumer = name if name is not None else f"{self.info_str}-{'OUT' if request_type == gpiod.line_request.DIRECTION_OUTPUT else 'IN'}"
+            pin_config.request_type = request_type
+            if pull == PULL.UP:
+                pin_config.flags = gpiod.line_request.FLAG_BIAS_PULL_UP
+            elif pull == PULL.DOWN:
+                pin_config.flags = gpiod.line_request.FLAG_BIAS_PULL_DOWN
+            else:
+                pin_config.flags = gpiod.line_request.FLAG_BIAS_DISABLE
+            self._logger.info("%s: Requesting GPIO chip %s lines %s...", self, gpio_chip, [self.gpio_tuples[bit][1] for bit in bits])
+            try:
+                bulk.request(pin_config, default_vals)
+            except Exception as e:
+                self._logger.warning("%s: Error aquiring lines, attempting without pull UP/DOWN bias. Error: %s", self, e)
+                pin_config.flags = 0
+                bulk.request(pin_config, default_vals)
+        except Exception:
+            for _ in bits:
+                CHIP_POOL.release(gpio_chip)
+            raise
+        return bulk
+
+    def _read_value(self) -> int:
+        ''' Return the values of all lines packed in an integer (bit 0 is the first gpio), one get_values per chip '''
+        value = 0
+        for gpio_chip, bulk in self._bulks.items():
+            for bit, line_value in zip(self._chip_bits[gpio_chip], bulk.get_values()):
+                value |= line_value << bit
+        return value
+
+    def close(self):
+        for gpio_chip, bulk in self._bulks.items():
+            self._logger.info("%s: Releasing GPIO chip %s lines...", self, gpio_chip)
+            bulk.release()
+            for _ in self._chip_bits[gpio_chip]:
+                CHIP_POOL.release(gpio_chip)
+        self._bulks = {}
+
+
+class GpioOutGroup(_BulkGroup, Generic_GpioOutGroup):
+    ''' Class to represent a group of output pins using gpiod line bulk requests.  All lines on the same chip
+        are written with a single set_values call (one ioctl per chip). '''
+    __slots__ = ('_chip_bits', '_bulks')
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.NONE, log_level=INFO, initial_value=0):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self._request_bulks(gpio_tuples, name, pull, gpiod.line_request.DIRECTION_OUTPUT, initial_value)
+        self._value = initial_value
+
+    def set_value(self, value:int):
+        ''' Write the integer bit pattern to the group, one set_values call per chip '''
+        for gpio_chip, bulk in self._bulks.items():
+            bulk.set_values([(value >> bit) & 1 for bit in self._chip_bits[gpio_chip]])
+        self._value = value
+
+    write = set_value
+
+
+class GpioInGroup(_BulkGroup, Generic_GpioInGroup):
+    ''' Class to represent a group of input pins using gpiod line bulk requests.  All lines on the same chip
+        are read with a single get_values call (one ioctl per chip). '''
+    __slots__ = ('_chip_bits', '_bulks', '_values', '_single_bulk')
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.DOWN, log_level=INFO):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self._request_bulks(gpio_tuples, name, pull, gpiod.line_request.DIRECTION_INPUT)
+        self._values = [0] * len(self.gpio_tuples)
+        # lines on a single chip are already in group order
+        self._single_bulk = self._bulks[self.gpio_tuples[0][0]] if len(self._bulks) == 1 else None
+
+    def get_values(self) -> list:
+        ''' Return the values of all pins in the group as a list (first gpio first) '''
+        if self._single_bulk is not None:
+            return self._single_bulk.get_values()
+        values = self._values
+        for gpio_chip, bulk in self._bulks.items():
+            for bit, value in zip(self._chip_bits[gpio_chip], bulk.get_values()):
+                values[bit] = value
+        return values
+
+
 class GpioIn(Generic_GpioIn):
-    ''' Class to represent an abstracted GPIO pin using the gpiod '''
-    def __init__(self, gpio_pin, gpio_chip, name=None, pull=PULL.DOWN, event=EVENT.BOTH, debounce_ms=100, callback=None, log_level=INFO, start_polling=True):
+    ''' Class to represent an abstracted GPIO pin using the gpiod.  If kernel_debounce is True and debounce_ms is set the
+        line is requested with the GPIO uAPI v2 debounce_period_us so the kernel filters bounces and only clean edges
+        (with kernel timestamps) are read.  Falls back to the gpiod request and userspace debounce if not supported '''
+    __slots__ = ('gpio_pin', 'gpio_chip', '_chip', '_line_request', '_pin')
+
+    def __init__(self, gpio_pin, gpio_chip, name=None, pull=PULL.DOWN, event=EVENT.BOTH, debounce_ms=100, callback=None, log_level=INFO, start_polling=True,
+                 kernel_debounce=True):
         super().__init__(name=name, log_level=log_level, event=event, callback=callback, debounce_ms=debounce_ms, pull=pull)
         self.name = name if name is not None else f"chip:{gpio_chip},pin:{gpio_pin}"
         self.gpio_pin, self.gpio_chip = gpio_pin, gpio_chip
-        # initialize the chip and pin
+        self._chip, self._pin = None, None
+        self._line_request = None
+        if kernel_debounce and debounce_ms:
+            self._line_request = self._request_kernel_debounce(name if name is not None else f'{self.info_str}-IN')
+        if self._line_request is None:
+            self._request_line(name)
+
+        self._stop_thread = False
+        self._edge_thread = None
+        if start_polling:
+            self.start()
+
+    def _request_kernel_debounce(self, consumer:str) -> _uapi.LineRequest|None:
+        ''' Request the line with kernel debounce.  Returns None if not supported by the kernel '''
+        # default (monotonic) event clock, the same clock as the gpiod 1.x events.  The realtime clock needs Linux 5.11
+        flags = _uapi.GPIO_V2_LINE_FLAG_INPUT | _uapi.GPIO_V2_LINE_FLAG_EDGE_RISING | _uapi.GPIO_V2_LINE_FLAG_EDGE_FALLING
+        if self.pull == PULL.UP:
+            flags |= _uapi.GPIO_V2_LINE_FLAG_BIAS_PULL_UP
+        elif self.pull == PULL.DOWN:
+            flags |= _uapi.GPIO_V2_LINE_FLAG_BIAS_PULL_DOWN
+        else:
+            flags |= _uapi.GPIO_V2_LINE_FLAG_BIAS_DISABLED
+        try:
+            self._logger.info("%s: Requesting GPIO with kernel debounce %sms...", self, self.debounce_ms)
+            line_request = _uapi.LineRequest(self.gpio_chip, [self.gpio_pin], flags, consumer, debounce_us=self.debounce_ms * 1000)
+        except OSError as e:
+            self._logger.info("%s: Kernel debounce not available, using userspace debounce. Error: %s", self, e)
+            return None
+        self._kernel_debounce = True
+        return line_request
+
+    def _request_line(self, name):
+        ''' Request the line from gpiod (shared chip from the chip pool) '''
+        gpio_chip, pull = self.gpio_chip, self.pull
+        # initialize the chip (shared from the chip pool) and pin
+        chip = self._chip = CHIP_POOL.acquire(gpio_chip)
         try:
-            chip = gpiod.chip(str(gpio_chip), gpiod.chip.OPEN_BY_NUMBER)
             self._pin = chip.get_line(int(self.gpio_pin))
             pin_config = gpiod.line_request()
             pin_config.consumer = name if name is not None else f'{self.info_str}-IN'
@@ -95,71 +303,87 @@ class GpioIn(Generic_GpioIn):
                 pin_config.flags = gpiod.line_request.FLAG_BIAS_PULL_DOWN
             else:
                 pin_config.flags = gpiod.line_request.FLAG_BIAS_DISABLE
-            self._logger.info(f"{self.info_str}: Requesting GPIO...")
+            self._logger.info("%s: Requesting GPIO...", self)
             self._pin.request(pin_config)
         except Exception as e:
-            self._logger.warning(f"{self.info_str}: Error aquiring pin, attempting without pull UP/DOWN bias. Error: {e}")
-            chip = gpiod.chip(str(gpio_chip), gpiod.chip.OPEN_BY_NUMBER)
-            self._pin = chip.get_line(int(self.gpio_pin))
-            pin_config = gpiod.line_request()
-            pin_config.consumer = name if name is not None else f'{self.info_str}-IN'
-            pin_config.request_type = gpiod.line_request.DIRECTION_INPUT
-            # set edge request - filter in loop
-            pin_config.request_type = gpiod.line_request.EVENT_BOTH_EDGES
-            self._logger.info(f"{self.info_str}: Requesting GPIO (without pull UP/DOWN bias)...")
-            self._pin.request(pin_config)
-
-        self._stop_thread = False
-        self._edge_thread = None
-        if start_polling:
-            self.start()
+            self._logger.warning("%s: Error aquiring pin, attempting without pull UP/DOWN bias. Error: %s", self, e)
+            try:
+                self._pin = chip.get_line(int(self.gpio_pin))
+                pin_config = gpiod.line_request()
+                pin_config.consumer = name if name is not None else f'{self.info_str}-IN'
+                pin_config.request_type = gpiod.line_request.DIRECTION_INPUT
+                # set edge request - filter in loop
+                pin_config.request_type = gpiod.line_request.EVENT_BOTH_EDGES
+                self._logger.info("%s: Requesting GPIO (without pull UP/DOWN bias)...", self)
+                self._pin.request(pin_config)
+            except Exception:
+                self._release_chip()
+                raise
 
     def close(self):
         self.stop()
-        self._logger.info(f"{self.info_str}: Releasing GPIO...")
-        self._pin.release()
+        if self._line_request is not None:
+            self._logger.info("%s: Releasing GPIO...", self)
+            self._line_request.close()
+            self._line_request = None
+        if self._chip is not None:
+            self._logger.info("%s: Releasing GPIO...", self)
+            self._pin.release()
+            self._release_chip()
 
-    @property
-    def state(self):
-        ''' Return current CS state '''
+    def _release_chip(self):
+        ''' Return the chip to the chip pool '''
+        if self._chip is not None:
+            self._chip = None
+            CHIP_POOL.release(self.gpio_chip)
+
+    def read_state(self) -> int:
+        ''' Read the current state from the hardware '''
+        if self._line_request is not None:
+            return self._line_request.get_value()
         return self._pin.get_value()
+
+    def _set_kernel_debounce(self, debounce_ms:int) -> bool:
+        ''' Change the kernel debounce period without releasing the line (only for lines requested with kernel debounce) '''
+        if self._line_request is None:
+            return False
+        self._line_request.reconfigure(self._line_request.flags, debounce_us=debounce_ms * 1000)
+        return True
     
-    def _event_thread(self): # type: ignore
-        ''' Background thread to watch for rising or falling edge '''
-        triggered = False
+    def _event_fd(self) -> int|None:
+        ''' Return the line event fd so the pin is watched by the shared event dispatcher '''
+        if self._line_request is not None:
+            return self._line_request.fd
+        try:
+            return self._pin.event_get_fd()
+        except Exception as e:
+            self._logger.debug("%s: Event fd not available, using event thread. Error: %s", self, e)
+            return None
 
+    def _read_events(self) -> list:
+        ''' Read the pending line event and return [(EVENT.RISING/FALLING, timestamp ns, line seqno)].  The gpiod 1.x
+            binding does not provide the sequence numbers (line seqno 0) '''
+        if self._line_request is not None:
+            return [(EVENT.RISING if event_id == _uapi.GPIO_V2_LINE_EVENT_RISING_EDGE else EVENT.FALLING, timestamp_ns, line_seqno)
+                    for timestamp_ns, event_id, _, _, line_seqno in self._line_request.read_events()]
+        event = self._pin.event_read()
+        return [(EVENT.RISING if event.event_type == gpiod.line_event.RISING_EDGE else EVENT.FALLING,
+                 int(datetime.timestamp(event.timestamp) * 1e6) * 1000 if event.timestamp is not None else monotonic_ns(), 0)]
 
+    def _event_thread(self): # type: ignore
+        ''' Background thread to watch for rising or falling edge (used if the event fd is not available) '''
         while True and not self._stop_thread:
             try:
                 event_triggered = self._pin.event_wait(timedelta(seconds=1))
                 if event_triggered:
-                    event = self._pin.event_read()
+                    events = self._read_events()
                     # check for another event within the debounce interval
-                    bounce_event_triggered = self._pin.event_wait(timedelta(milliseconds=self.debounce_ms))
+                    bounce_event_triggered = self._pin.event_wait(timedelta(milliseconds=self.debounce_ms)) if not self._kernel_debounce else False
                     if not bounce_event_triggered:
-                        # if monitoring for event rising or event falling ONLY, just send the event
-                        if self.event != EVENT.BOTH:
-                            if (self.event == EVENT.RISING and event.event_type == gpiod.line_event.RISING_EDGE) or (self.event == EVENT.FALLING and event.event_type == gpiod.line_event.FALLING_EDGE):
-                                triggered = True
-                                self._call_event(timestamp=datetime.timestamp(event.timestamp) if event.timestamp is not None else time(),
-                                                 event=EVENT.RISING if event.event_type == gpiod.line_event.RISING_EDGE else EVENT.FALLING,
-                                                 triggered=triggered)
-                        # otherwise need to track when we are triggered so we don't alert to a release if there was no press!
-                        else:
-                            if (event.event_type == gpiod.line_event.RISING_EDGE and self.pull == PULL.DOWN) or (event.event_type == gpiod.line_event.FALLING_EDGE and self.pull != PULL.DOWN):
-                                triggered = True
-                                self._call_event(timestamp=datetime.timestamp(event.timestamp) if event.timestamp is not None else time(),
-                                                 event=EVENT.RISING if event.event_type == gpiod.line_event.RISING_EDGE else EVENT.FALLING,
-                                                 triggered=triggered)
-                            elif triggered:
-                                triggered = False
-                                self._call_event(timestamp=datetime.timestamp(event.timestamp) if event.timestamp is not None else time(),
-                                                 event=EVENT.RISING if event.event_type == gpiod.line_event.RISING_EDGE else EVENT.FALLING,
-                                                 triggered=triggered)
-                            
-                    event = None
+                        for edge, timestamp_ns, _ in events:
+                            self._filter_edge(edge, timestamp_ns)
             except Exception as e:
-                self._logger.error(f"{self.info_str}: Error in event thread: {e}. Restarting...")
-                triggered = False
+                self._logger.error("%s: Error in event thread: %s. Restarting...", self, e)
+                self._triggered = False
         # reset the stop thread variable
         self._stop_thread = False
@@ -0,0 +1,254 @@
+'''
+GPIO library:  gpiod (libgpiod 2.x python bindings)
+Supported platforms: Most modern SBC devices that support the libgpiod kernel driver
+
+Lines are requested with gpiod.request_lines, all lines of a group on the same chip are requested together
+and read/written with a single get_values/set_values call.  Settings that change at runtime (debounce,
+bias) are applied with reconfigure_lines so the lines are never released.
+'''
+import gpiod
+if not hasattr(gpiod, 'request_lines'):
+    raise ImportError(f"gpiod python binding {getattr(gpiod, '__version__', '1.x')} is not 2.x, use sbc_gpio.gpio_libs.lib_gpiod")
+from gpiod.line import Direction, Value, Bias, Edge
+from copy import copy
+from datetime import timedelta
+from sbc_gpio import PULL, EVENT
+from ._uapi import chip_path
+from ._generic_gpio import GpioIn as Generic_GpioIn, GpioOut as Generic_GpioOut, GpioOutGroup as Generic_GpioOutGroup, \
+    GpioInGroup as Generic_GpioInGroup
+from logging_handler import INFO
+
+
+NAME = 'gpiod2'
+VERSION = (1,0,0)
+
+_BIAS = {PULL.UP: Bias.PULL_UP, PULL.DOWN: Bias.PULL_DOWN, PULL.NONE: Bias.DISABLED}
+_VALUES = (Value.INACTIVE, Value.ACTIVE)
+
+
+def _line_settings(direction, pull, edge_detection=Edge.NONE, output_value=None) -> gpiod.LineSettings:
+    ''' Return the line settings for the direction and pull.  Edge events use the default (monotonic) clock '''
+    settings = gpiod.LineSettings(direction=direction, bias=_BIAS.get(pull, Bias.AS_IS), edge_detection=edge_detection)
+    if output_value is not None:
+        settings.output_value = _VALUES[1 if output_value else 0]
+    return settings
+
+
+def _request_lines(gpio, gpio_chip, offsets, consumer:str, settings:gpiod.LineSettings, output_values=None) -> tuple:
+    ''' Request the lines with one request.  If the bias is not supported the lines are requested without bias (with a
+        copy of the settings).  Returns (line request, settings used for the request) '''
+    gpio._logger.info("%s: Requesting GPIO chip %s lines %s...", gpio, gpio_chip, list(offsets))
+    try:
+        return gpiod.request_lines(chip_path(gpio_chip), consumer=consumer, config={tuple(offsets): settings}, output_values=output_values), settings
+    except OSError as e:
+        gpio._logger.warning("%s: Error aquiring lines, attempting without pull UP/DOWN bias. Error: %s", gpio, e)
+        settings = copy(settings)
+        settings.bias = Bias.AS_IS
+        return gpiod.request_lines(chip_path(gpio_chip), consumer=consumer, config={tuple(offsets): settings}, output_values=output_values), settings
+
+
+class GpioOut(Generic_GpioOut):
+    ''' Class to represent an abstracted GPIO pin using the gpiod 2.x bindings '''
+    __slots__ = ('gpio_pin', 'gpio_chip', '_offset', '_request')
+
+    def __init__(self, gpio_pin, gpio_chip, name=None, pull=PULL.NONE, log_level=INFO, initial_state=0):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self.name = name if name is not None else f"chip:{gpio_chip},pin:{gpio_pin}"
+        self.gpio_pin, self.gpio_chip = gpio_pin, gpio_chip
+        self._offset = int(gpio_pin)
+        self._request = None
+        # the initial state is set in the request so the line does not glitch
+        self._request, _ = _request_lines(self, gpio_chip, [self._offset], name if name is not None else f'{self.info_str}-OUT',
+                                          _line_settings(Direction.OUTPUT, pull, output_value=initial_state))
+
+    def close(self):
+        if self._request is not None:
+            self._logger.info("%s: Releasing GPIO...", self)
+            self._request.release()
+            self._request = None
+
+    @property
+    def state(self):
+        ''' Return current CS state '''
+        return self._request.get_value(self._offset).value # type: ignore
+
+    def set_high(self):
+        ''' Set the pin to on/high '''
+        self._request.set_value(self._offset, Value.ACTIVE) # type: ignore
+
+    set_1 = set_high
+    set_on = set_high
+
+    def set_low(self):
+        ''' Set the pin to off/low '''
+        self._request.set_value(self._offset, Value.INACTIVE) # type: ignore
+
+    set_0 = set_low
+    set_off = set_low
+
+
+class _RequestGroup:
+    ''' Line request handling shared by the gpiod 2.x group classes.  The lines for each chip are requested with
+        one request so each chip is read or written with a single call (one ioctl per chip). '''
+    __slots__ = ()
+
+    def _request_groups(self, gpio_tuples, name, pull, direction, initial_value=None):
+        ''' Request the lines for all chips in the group '''
+        self.gpio_tuples = tuple((int(gpio_chip), int(gpio_pin)) for gpio_chip, gpio_pin in gpio_tuples)
+        self.name = name if name is not None else f"group:{','.join(f'{chip}-{pin}' for chip, pin in self.gpio_tuples)}"
+        # group the lines per chip -> {chip: [(bit position in the group value, line offset)]}
+        self._chip_lines = {}
+        for bit, (gpio_chip, gpio_pin) in enumerate(self.gpio_tuples):
+            self._chip_lines.setdefault(gpio_chip, []).append((bit, gpio_pin))
+        self._requests = {}
+        try:
+            for gpio_chip, lines in self._chip_lines.items():
+                output_values = {offset: _VALUES[(initial_value >> bit) & 1] for bit, offset in lines} if initial_value is not None else None
+                self._requests[gpio_chip], _ = _request_lines(self, gpio_chip, [offset for _, offset in lines],
+                                                              name if name is not None else f"{self.info_str}-{'OUT' if direction == Direction.OUTPUT else 'IN'}",
+                                                              _line_settings(direction, pull), output_values=output_values)
+        except Exception:
+            self.close()
+            raise
+
+    def _read_value(self) -> int:
+        ''' Return the values of all lines packed in an integer (bit 0 is the first gpio), one get_values per chip '''
+        value = 0
+        for gpio_chip, request in self._requests.items():
+            lines = self._chip_lines[gpio_chip]
+            for (bit, _), line_value in zip(lines, request.get_values([offset for _, offset in lines])):
+                value |= (1 if line_value == Value.ACTIVE else 0) << bit
+        return value
+
+    def close(self):
+        for gpio_chip, request in self._requests.items():
+            self._logger.info("%s: Releasing GPIO chip %s lines...", self, gpio_chip)
+            request.release()
+        self._requests = {}
+
+
+class GpioOutGroup(_RequestGroup, Generic_GpioOutGroup):
+    ''' Class to represent a group of output pins using gpiod 2.x line requests.  All lines on the same chip
+        are written with a single set_values call (one ioctl per chip). '''
+    __slots__ = ('_chip_lines', '_requests')
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.NONE, log_level=INFO, initial_value=0):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self._request_groups(gpio_tuples, name, pull, Direction.OUTPUT, initial_value)
+        self._value = initial_value
+
+    def set_value(self, value:int):
+        ''' Write the integer bit pattern to the group, one set_values call per chip '''
+        for gpio_chip, request in self._requests.items():
+            request.set_values({offset: _VALUES[(value >> bit) & 1] for bit, offset in self._chip_lines[gpio_chip]})
+        self._value = value
+
+    write = set_value
+
+    def set_values(self, bits:int, mask:int):
+        ''' Write only the gpios in the mask, the other lines are not included in the request '''
+        for gpio_chip, request in self._requests.items():
+            values = {offset: _VALUES[(bits >> bit) & 1] for bit, offset in self._chip_lines[gpio_chip] if (mask >> bit) & 1}
+            if len(values) > 0:
+                request.set_values(values)
+        self._value = (self._value & ~mask) | (bits & mask)
+
+
+class GpioInGroup(_RequestGroup, Generic_GpioInGroup):
+    ''' Class to represent a group of input pins using gpiod 2.x line requests.  All lines on the same chip
+        are read with a single get_values call (one ioctl per chip). '''
+    __slots__ = ('_chip_lines', '_requests', '_values', '_chip_offsets')
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.DOWN, log_level=INFO):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self._request_groups(gpio_tuples, name, pull, Direction.INPUT)
+        self._values = [0] * len(self.gpio_tuples)
+        self._chip_offsets = {gpio_chip: [offset for _, offset in lines] for gpio_chip, lines in self._chip_lines.items()}
+
+    def get_values(self) -> list:
+        ''' Return the values of all pins in the group as a list (first gpio first) '''
+        values = self._values
+        for gpio_chip, request in self._requests.items():
+            for (bit, _), value in zip(self._chip_lines[gpio_chip], request.get_values(self._chip_offsets[gpio_chip])):
+                values[bit] = value.value
+        return values
+
+
+class GpioIn(Generic_GpioIn):
+    ''' Class to represent an abstracted GPIO pin using the gpiod 2.x bindings.  If kernel_debounce is True the debounce
+        period is set on the line request so only clean edges are read, otherwise (or if not supported) the edges are
+        debounced in userspace '''
+    __slots__ = ('gpio_pin', 'gpio_chip', '_offset', '_request', '_settings')
+
+    def __init__(self, gpio_pin, gpio_chip, name=None, pull=PULL.DOWN, event=EVENT.BOTH, debounce_ms=100, callback=None, log_level=INFO, start_polling=True,
+                 kernel_debounce=True):
+        super().__init__(name=name, log_level=log_level, event=event, callback=callback, debounce_ms=debounce_ms, pull=pull)
+        self.name = name if name is not None else f"chip:{gpio_chip},pin:{gpio_pin}"
+        self.gpio_pin, self.gpio_chip = gpio_pin, gpio_chip
+        self._offset = int(gpio_pin)
+        self._request = None
+        self._settings = None
+        # the settings without the bias are kept if the bias is not supported (used for reconfigure_lines)
+        self._request, self._settings = _request_lines(self, gpio_chip, [self._offset], name if name is not None else f'{self.info_str}-IN',
+                                                       _line_settings(Direction.INPUT, pull, edge_detection=Edge.BOTH))
+        if kernel_debounce and debounce_ms:
+            self.set_debounce(debounce_ms)
+
+        self._stop_thread = False
+        self._edge_thread = None
+        if start_polling:
+            self.start()
+
+    def set_debounce(self, debounce_ms:int, kernel_debounce=True):
+        ''' Change the debounce.  The kernel debounce is changed with reconfigure_lines so no edges are lost.
+            If the kernel debounce is not supported the edges are debounced in userspace '''
+        self.debounce_ms = debounce_ms
+        try:
+            self._set_kernel_debounce(debounce_ms if kernel_debounce else 0)
+            self._kernel_debounce = kernel_debounce and debounce_ms > 0
+        except OSError as e:
+            self._logger.info("%s: Kernel debounce not available, using userspace debounce. Error: %s", self, e)
+            self._settings.debounce_period = timedelta(0)
+            self._kernel_debounce = False
+
+    def _set_kernel_debounce(self, debounce_ms:int) -> bool:
+        ''' Change the kernel debounce period with reconfigure_lines (the line is not released) '''
+        self._settings.debounce_period = timedelta(milliseconds=debounce_ms)
+        self._request.reconfigure_lines(config={self._offset: self._settings}) # type: ignore
+        return True
+
+    def close(self):
+        self.stop()
+        if self._request is not None:
+            self._logger.info("%s: Releasing GPIO...", self)
+            self._request.release()
+            self._request = None
+
+    def read_state(self) -> int:
+        ''' Read the current state from the hardware '''
+        return self._request.get_value(self._offset).value # type: ignore
+
+    def _event_fd(self) -> int|None:
+        ''' Return the line request fd so the pin is watched by the shared event dispatcher '''
+        return self._request.fd # type: ignore
+
+    def _read_events(self) -> list:
+        ''' Read all pending edge events and return [(EVENT.RISING/FALLING, timestamp ns, line seqno)] '''
+        return [(EVENT.RISING if event.event_type == gpiod.EdgeEvent.Type.RISING_EDGE else EVENT.FALLING, event.timestamp_ns, event.line_seqno)
+                for event in self._request.read_edge_events()] # type: ignore
+
+    def _event_thread(self): # type: ignore
+        ''' Background thread to watch for rising or falling edge (used if the event fd is not available) '''
+        while True and not self._stop_thread:
+            try:
+                if self._request.wait_edge_events(timedelta(seconds=1)): # type: ignore
+                    events = self._read_events()
+                    # check for another event within the debounce interval
+                    if self._kernel_debounce or not self._request.wait_edge_events(timedelta(milliseconds=self.debounce_ms)): # type: ignore
+                        for edge, timestamp_ns, _ in events:
+                            self._filter_edge(edge, timestamp_ns)
+            except Exception as e:
+                self._logger.error("%s: Error in event thread: %s. Restarting...", self, e)
+                self._triggered = False
+        # reset the stop thread variable
+        self._stop_thread = False
@@ -0,0 +1,235 @@
+'''
+GPIO library:  GPIO character device uAPI v2 (no python bindings required)
+Supported platforms: Most modern SBC devices running Linux 5.10+
+
+Lines are requested from /dev/gpiochipN with GPIO_V2_GET_LINE_IOCTL.  Each request allocates its ioctl
+buffers once, so set_high/set_low/state are a single ioctl with no allocations.  Lines of a group on the
+same chip share one request (one ioctl per chip) and inputs use the kernel debounce.
+'''
+from sbc_gpio import PULL, EVENT
+from . import _uapi
+from ._uapi import LineRequest, GPIO_V2_LINE_SET_VALUES_IOCTL, GPIO_V2_LINE_GET_VALUES_IOCTL
+from ._generic_gpio import GpioIn as Generic_GpioIn, GpioOut as Generic_GpioOut, GpioOutGroup as Generic_GpioOutGroup, \
+    GpioInGroup as Generic_GpioInGroup
+from logging_handler import INFO
+
+
+NAME = 'uapi'
+VERSION = (1,0,0)
+
+_BIAS_FLAGS = {PULL.UP: _uapi.GPIO_V2_LINE_FLAG_BIAS_PULL_UP, PULL.DOWN: _uapi.GPIO_V2_LINE_FLAG_BIAS_PULL_DOWN,
+               PULL.NONE: _uapi.GPIO_V2_LINE_FLAG_BIAS_DISABLED}
+_BIAS_MASK = _uapi.GPIO_V2_LINE_FLAG_BIAS_PULL_UP | _uapi.GPIO_V2_LINE_FLAG_BIAS_PULL_DOWN | _uapi.GPIO_V2_LINE_FLAG_BIAS_DISABLED
+# default (monotonic) event clock, the realtime clock needs Linux 5.11 and jumps when the time is set
+_EDGE_FLAGS = _uapi.GPIO_V2_LINE_FLAG_EDGE_RISING | _uapi.GPIO_V2_LINE_FLAG_EDGE_FALLING
+
+
+def _request_lines(gpio, gpio_chip, offsets, consumer:str, flags:int, pull, **kwargs) -> LineRequest:
+    ''' Request the lines.  If the bias is not supported the lines are requested without bias '''
+    gpio._logger.info("%s: Requesting GPIO chip %s lines %s...", gpio, gpio_chip, list(offsets))
+    try:
+        return LineRequest(gpio_chip, offsets, flags | _BIAS_FLAGS.get(pull, 0), consumer, **kwargs)
+    except OSError as e:
+        gpio._logger.warning("%s: Error aquiring lines, attempting without pull UP/DOWN bias. Error: %s", gpio, e)
+        return LineRequest(gpio_chip, offsets, flags & ~_BIAS_MASK, consumer, **kwargs)
+
+
+class GpioOut(Generic_GpioOut):
+    ''' Class to represent an abstracted GPIO pin using the GPIO uAPI v2 '''
+    __slots__ = ('gpio_pin', 'gpio_chip', '_request', '_fd', '_high', '_low', '_read')
+
+    def __init__(self, gpio_pin, gpio_chip, name=None, pull=PULL.NONE, log_level=INFO, initial_state=0):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self.name = name if name is not None else f"chip:{gpio_chip},pin:{gpio_pin}"
+        self.gpio_pin, self.gpio_chip = gpio_pin, gpio_chip
+        self._request = None
+        self._request = _request_lines(self, gpio_chip, [gpio_pin], name if name is not None else f'{self.info_str}-OUT',
+                                       _uapi.GPIO_V2_LINE_FLAG_OUTPUT, pull, output_values=1 if initial_state else 0)
+        # preallocated ioctl buffers for the hot path
+        self._fd = self._request.fd
+        self._high, self._low, self._read = _uapi.gpio_v2_line_values(1, 1), _uapi.gpio_v2_line_values(0, 1), _uapi.gpio_v2_line_values(0, 1)
+
+    def close(self):
+        if self._request is not None:
+            self._logger.info("%s: Releasing GPIO...", self)
+            self._request.close()
+            self._request = None
+
+    @property
+    def state(self):
+        ''' Return current CS state '''
+        _uapi.ioctl(self._fd, GPIO_V2_LINE_GET_VALUES_IOCTL, self._read)
+        return self._read.bits & 1
+
+    def set_high(self):
+        ''' Set the pin to on/high '''
+        _uapi.ioctl(self._fd, GPIO_V2_LINE_SET_VALUES_IOCTL, self._high)
+
+    set_1 = set_high
+    set_on = set_high
+
+    def set_low(self):
+        ''' Set the pin to off/low '''
+        _uapi.ioctl(self._fd, GPIO_V2_LINE_SET_VALUES_IOCTL, self._low)
+
+    set_0 = set_low
+    set_off = set_low
+
+
+class _RequestGroup:
+    ''' Line request handling shared by the uAPI group classes.  The lines for each chip are requested with one
+        request so each chip is read or written with a single ioctl. '''
+    __slots__ = ()
+
+    def _request_groups(self, gpio_tuples, name, pull, flags, initial_value=None):
+        ''' Request the lines for all chips in the group '''
+        self.gpio_tuples = tuple((int(gpio_chip), int(gpio_pin)) for gpio_chip, gpio_pin in gpio_tuples)
+        self.name = name if name is not None else f"group:{','.join(f'{chip}-{pin}' for chip, pin in self.gpio_tuples)}"
+        # group the lines per chip -> {chip: [bit positions in the group value]}
+        chip_bits = {}
+        for bit, (gpio_chip, _) in enumerate(self.gpio_tuples):
+            chip_bits.setdefault(gpio_chip, []).append(bit)
+        # (request, group bits in request order, shift if the bits are contiguous in the group value else None)
+        self._requests = []
+        try:
+            for gpio_chip, bits in chip_bits.items():
+                request = _request_lines(self, gpio_chip, [self.gpio_tuples[bit][1] for bit in bits],
+                                         name if name is not None else f"{self.info_str}-{'OUT' if flags & _uapi.GPIO_V2_LINE_FLAG_OUTPUT else 'IN'}",
+                                         flags, pull, output_values=self._chip_value(initial_value, bits, None) if initial_value is not None else None)
+                self._requests.append((request, tuple(bits), bits[0] if bits == list(range(bits[0], bits[0] + len(bits))) else None))
+        except Exception:
+            self.close()
+            raise
+
+    @staticmethod
+    def _chip_value(value:int, bits, shift) -> int:
+        ''' Return the bits of the group value for one chip request '''
+        if shift is not None:
+            return (value >> shift) & ((1 << len(bits)) - 1)
+        chip_value = 0
+        for line, bit in enumerate(bits):
+            chip_value |= ((value >> bit) & 1) << line
+        return chip_value
+
+    def _read_value(self) -> int:
+        ''' Return the values of all lines packed in an integer (bit 0 is the first gpio), one ioctl per chip '''
+        value = 0
+        for request, bits, shift in self._requests:
+            chip_value = request.get_values()
+            if shift is not None:
+                value |= chip_value << shift
+            else:
+                for line, bit in enumerate(bits):
+                    value |= ((chip_value >> line) & 1) << bit
+        return value
+
+    def close(self):
+        for request, _, _ in self._requests:
+            self._logger.info("%s: Releasing GPIO chip %s lines...", self, request.gpio_chip)
+            request.close()
+        self._requests = []
+
+
+class GpioOutGroup(_RequestGroup, Generic_GpioOutGroup):
+    ''' Class to represent a group of output pins using the GPIO uAPI v2.  All lines on the same chip are written
+        with a single ioctl. '''
+    __slots__ = ('_requests',)
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.NONE, log_level=INFO, initial_value=0):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self._request_groups(gpio_tuples, name, pull, _uapi.GPIO_V2_LINE_FLAG_OUTPUT, initial_value)
+        self._value = initial_value
+
+    def set_value(self, value:int):
+        ''' Write the integer bit pattern to the group, one ioctl per chip '''
+        for request, bits, shift in self._requests:
+            request.set_values(self._chip_value(value, bits, shift))
+        self._value = value
+
+    write = set_value
+
+    def set_values(self, bits:int, mask:int):
+        ''' Write only the gpios in the mask, the other lines are masked out in the ioctl '''
+        for request, chip_bits, shift in self._requests:
+            chip_mask = self._chip_value(mask, chip_bits, shift)
+            if chip_mask:
+                request.set_values(self._chip_value(bits, chip_bits, shift), chip_mask)
+        self._value = (self._value & ~mask) | (bits & mask)
+
+
+class GpioInGroup(_RequestGroup, Generic_GpioInGroup):
+    ''' Class to represent a group of input pins using the GPIO uAPI v2.  All lines on the same chip are read
+        with a single ioctl. '''
+    __slots__ = ('_requests', '_values')
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.DOWN, log_level=INFO):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self._request_groups(gpio_tuples, name, pull, _uapi.GPIO_V2_LINE_FLAG_INPUT)
+        self._values = [0] * len(self.gpio_tuples)
+
+    def read(self) -> int:
+        ''' Return the values of all pins in the group packed in an integer (bit 0 is the first gpio) '''
+        return self._read_value()
+
+    def get_values(self) -> list:
+        ''' Return the values of all pins in the group as a list (first gpio first) '''
+        values = self._values
+        for request, bits, _ in self._requests:
+            chip_value = request.get_values()
+            for line, bit in enumerate(bits):
+                values[bit] = (chip_value >> line) & 1
+        return values
+
+
+class GpioIn(Generic_GpioIn):
+    ''' Class to represent an abstracted GPIO pin using the GPIO uAPI v2.  If kernel_debounce is True the debounce
+        period is set on the line request so only clean edges are read, otherwise (or if not supported by the kernel)
+        the edges are debounced in userspace '''
+    __slots__ = ('gpio_pin', 'gpio_chip', '_request')
+
+    def __init__(self, gpio_pin, gpio_chip, name=None, pull=PULL.DOWN, event=EVENT.BOTH, debounce_ms=100, callback=None, log_level=INFO, start_polling=True,
+                 kernel_debounce=True):
+        super().__init__(name=name, log_level=log_level, event=event, callback=callback, debounce_ms=debounce_ms, pull=pull)
+        self.name = name if name is not None else f"chip:{gpio_chip},pin:{gpio_pin}"
+        self.gpio_pin, self.gpio_chip = gpio_pin, gpio_chip
+        self._request = None
+        consumer = name if name is not None else f'{self.info_str}-IN'
+        flags = _uapi.GPIO_V2_LINE_FLAG_INPUT | _EDGE_FLAGS
+        if kernel_debounce and debounce_ms:
+            try:
+                self._request = _request_lines(self, gpio_chip, [gpio_pin], consumer, flags, pull, debounce_us=debounce_ms * 1000)
+                self._kernel_debounce = True
+            except OSError as e:
+                self._logger.info("%s: Kernel debounce not available, using userspace debounce. Error: %s", self, e)
+        if self._request is None:
+            self._request = _request_lines(self, gpio_chip, [gpio_pin], consumer, flags, pull)
+
+        self._stop_thread = False
+        self._edge_thread = None
+        if start_polling:
+            self.start()
+
+    def close(self):
+        self.stop()
+        if self._request is not None:
+            self._logger.info("%s: Releasing GPIO...", self)
+            self._request.close()
+            self._request = None
+
+    def read_state(self) -> int:
+        ''' Read the current state from the hardware '''
+        return self._request.get_value() # type: ignore
+
+    def _set_kernel_debounce(self, debounce_ms:int) -> bool:
+        ''' Change the kernel debounce period without releasing the line '''
+        self._request.reconfigure(self._request.flags, debounce_us=debounce_ms * 1000) # type: ignore
+        return True
+
+    def _event_fd(self) -> int|None:
+        ''' Return the line request fd so the pin is watched by the shared event dispatcher '''
+        return self._request.fd # type: ignore
+
+    def _read_events(self) -> list:
+        ''' Read all pending edge events and return [(EVENT.RISING/FALLING, timestamp ns, line seqno)] '''
+        return [(EVENT.RISING if event_id == _uapi.GPIO_V2_LINE_EVENT_RISING_EDGE else EVENT.FALLING, timestamp_ns, line_seqno)
+                for timestamp_ns, event_id, _, _, line_seqno in self._request.read_events()] # type: ignore
@@ -0,0 +1,280 @@
+'''
+GPIO library:  Broadcom GPIO registers memory mapped from /dev/gpiomem
+Supported platforms: Raspberry Pi (BCM2835/BCM2836/BCM2837/BCM2711)
+
+The GPIO register block is mapped once and the output classes write the GPSET/GPCLR registers directly,
+so set_high/set_low/state are a single 32 bit store or load with no system call.  Groups are written with
+one set and one clear bitmask per register bank.  Inputs use the GPIO uAPI (lib_uapi) for edge events
+and read the level register for the state.
+
+The registers are not locked against other processes, the GPSET/GPCLR registers only change the bits in
+the mask so concurrent writes to other pins are safe, but the function select and pull registers are
+read-modify-write.
+'''
+import os
+import mmap
+from time import sleep
+from sbc_gpio import PULL, EVENT
+from . import lib_uapi
+from ._generic_gpio import GpioOut as Generic_GpioOut, GpioOutGroup as Generic_GpioOutGroup, GpioInGroup as Generic_GpioInGroup
+from logging_handler import INFO
+
+
+NAME = 'mmap_bcm'
+VERSION = (1,0,0)
+
+GPIOMEM_FILE = os.environ.get('SBC_GPIO_GPIOMEM', '/dev/gpiomem')
+COMPATIBLE_FILE = '/sys/firmware/devicetree/base/compatible'
+BLOCK_SIZE = 4096
+GPIO_COUNT = 54
+
+# register offsets (bytes)
+GPFSEL0 = 0x00
+GPSET0 = 0x1C
+GPCLR0 = 0x28
+GPLEV0 = 0x34
+GPPUD = 0x94                     # BCM2835-BCM2837 pull control
+GPPUDCLK0 = 0x98
+GPIO_PUP_PDN_CNTRL_REG0 = 0xE4   # BCM2711 pull control, 2 bits per gpio
+
+FSEL_INPUT = 0b000
+FSEL_OUTPUT = 0b001
+
+if not os.access(GPIOMEM_FILE, os.R_OK | os.W_OK):
+    raise ImportError(f"{GPIOMEM_FILE} is not available, unable to map the GPIO registers")
+
+_fd = os.open(GPIOMEM_FILE, os.O_RDWR | os.O_SYNC | os.O_CLOEXEC)
+try:
+    _mmap = mmap.mmap(_fd, BLOCK_SIZE, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+finally:
+    os.close(_fd)
+# 32 bit registers, index = byte offset // 4
+_registers = memoryview(_mmap).cast('I')
+
+
+def _bcm2711() -> bool:
+    ''' Return True if the SoC is a BCM2711 (Pi 4) which has a different pull control register '''
+    try:
+        with open(COMPATIBLE_FILE, 'rb') as compatible_file:
+            return b'bcm2711' in compatible_file.read()
+    except OSError:
+        return False
+
+_BCM2711 = _bcm2711()
+
+
+def _check_gpio(gpio_pin, gpio_chip) -> int:
+    ''' Return the gpio number, raises ValueError if the gpio is not a BCM gpio '''
+    if int(gpio_chip) != 0 or not 0 <= int(gpio_pin) < GPIO_COUNT:
+        raise ValueError(f"GPIO chip {gpio_chip} pin {gpio_pin} is not a Broadcom GPIO (chip 0, pin 0-{GPIO_COUNT - 1})")
+    return int(gpio_pin)
+
+
+def set_function(gpio:int, function:int) -> None:
+    ''' Set the function select (3 bits) of a gpio '''
+    index, shift = (GPFSEL0 >> 2) + gpio // 10, (gpio % 10) * 3
+    _registers[index] = (_registers[index] & ~(0b111 << shift)) | (function << shift)
+
+
+def get_function(gpio:int) -> int:
+    ''' Return the function select of a gpio '''
+    return (_registers[(GPFSEL0 >> 2) + gpio // 10] >> ((gpio % 10) * 3)) & 0b111
+
+
+def set_pull(gpio:int, pull) -> None:
+    ''' Set the pull up/down resistor of a gpio '''
+    if _BCM2711:
+        index, shift = (GPIO_PUP_PDN_CNTRL_REG0 >> 2) + gpio // 16, (gpio % 16) * 2
+        value = {PULL.UP: 0b01, PULL.DOWN: 0b10}.get(pull, 0b00)
+        _registers[index] = (_registers[index] & ~(0b11 << shift)) | (value << shift)
+    else:
+        # BCM2835 sequence: set the control, wait 150 cycles, clock it into the gpio, wait 150 cycles, remove the clock
+        _registers[GPPUD >> 2] = {PULL.UP: 0b10, PULL.DOWN: 0b01}.get(pull, 0b00)
+        sleep(0.00001)
+        _registers[(GPPUDCLK0 >> 2) + gpio // 32] = 1 << (gpio % 32)
+        sleep(0.00001)
+        _registers[GPPUD >> 2] = 0
+        _registers[(GPPUDCLK0 >> 2) + gpio // 32] = 0
+
+
+def set_bits(mask0:int, mask1=0) -> None:
+    ''' Set the gpios in the masks high (bank 0 is gpio 0-31, bank 1 is gpio 32-53) '''
+    if mask0:
+        _registers[GPSET0 >> 2] = mask0
+    if mask1:
+        _registers[(GPSET0 >> 2) + 1] = mask1
+
+
+def clear_bits(mask0:int, mask1=0) -> None:
+    ''' Set the gpios in the masks low '''
+    if mask0:
+        _registers[GPCLR0 >> 2] = mask0
+    if mask1:
+        _registers[(GPCLR0 >> 2) + 1] = mask1
+
+
+def levels() -> int:
+    ''' Return the level of all gpios (bit n is gpio n) '''
+    return _registers[GPLEV0 >> 2] | (_registers[(GPLEV0 >> 2) + 1] << 32)
+
+
+class GpioOut(Generic_GpioOut):
+    ''' Class to represent an abstracted GPIO pin using the memory mapped GPIO registers '''
+    __slots__ = ('gpio_pin', 'gpio_chip', '_gpio', '_registers', '_bit', '_set', '_clr', '_lev')
+
+    def __init__(self, gpio_pin, gpio_chip=0, name=None, pull=PULL.NONE, log_level=INFO, initial_state=0):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self.name = name if name is not None else f"pin:{gpio_pin}"
+        self.gpio_pin, self.gpio_chip = gpio_pin, gpio_chip
+        self._gpio = _check_gpio(gpio_pin, gpio_chip)
+        # register indexes and bit for the hot path
+        self._registers, self._bit = _registers, 1 << (self._gpio % 32)
+        bank = self._gpio // 32
+        self._set, self._clr, self._lev = (GPSET0 >> 2) + bank, (GPCLR0 >> 2) + bank, (GPLEV0 >> 2) + bank
+        set_pull(self._gpio, pull)
+        # set the level before switching to output so the pin does not glitch
+        self._registers[self._set if initial_state else self._clr] = self._bit
+        self._logger.info("%s: Setting GPIO %s to output...", self, self._gpio)
+        set_function(self._gpio, FSEL_OUTPUT)
+
+    def close(self):
+        if getattr(self, '_registers', None) is not None:
+            self._logger.info("%s: Setting GPIO %s to input...", self, self._gpio)
+            set_function(self._gpio, FSEL_INPUT)
+            self._registers = None
+
+    @property
+    def state(self):
+        ''' Return current CS state '''
+        return 1 if self._registers[self._lev] & self._bit else 0 # type: ignore
+
+    def set_high(self):
+        ''' Set the pin to on/high '''
+        self._registers[self._set] = self._bit # type: ignore
+
+    set_1 = set_high
+    set_on = set_high
+
+    def set_low(self):
+        ''' Set the pin to off/low '''
+        self._registers[self._clr] = self._bit # type: ignore
+
+    set_0 = set_low
+    set_off = set_low
+
+
+class _RegisterGroup:
+    ''' Bit handling shared by the register group classes '''
+    __slots__ = ()
+
+    def _setup_group(self, gpio_tuples, name):
+        self.gpio_tuples = tuple((int(gpio_chip), int(gpio_pin)) for gpio_chip, gpio_pin in gpio_tuples)
+        self.name = name if name is not None else f"group:{','.join(str(pin) for _, pin in self.gpio_tuples)}"
+        self._gpios = tuple(_check_gpio(gpio_pin, gpio_chip) for gpio_chip, gpio_pin in self.gpio_tuples)
+        # if the gpios are contiguous in bank 0 the group value is shifted into place, otherwise bit by bit
+        first = self._gpios[0]
+        self._shift = first if self._gpios == tuple(range(first, first + len(self._gpios))) and first + len(self._gpios) <= 32 else None
+        self._all = (1 << len(self._gpios)) - 1
+
+    def _bank_masks(self, value:int) -> tuple:
+        ''' Return the (bank 0, bank 1) register masks for a group value '''
+        if self._shift is not None:
+            return (value & self._all) << self._shift, 0
+        masks = 0
+        for bit, gpio in enumerate(self._gpios):
+            if (value >> bit) & 1:
+                masks |= 1 << gpio
+        return masks & 0xFFFFFFFF, masks >> 32
+
+    def _read_value(self) -> int:
+        ''' Return the level of the group gpios from the level registers '''
+        return self._group_value(levels())
+
+    def _group_value(self, level:int) -> int:
+        ''' Return the group value from the 64 bit level of all gpios '''
+        if self._shift is not None:
+            return (level >> self._shift) & self._all
+        value = 0
+        for bit, gpio in enumerate(self._gpios):
+            value |= ((level >> gpio) & 1) << bit
+        return value
+
+
+class GpioOutGroup(_RegisterGroup, Generic_GpioOutGroup):
+    ''' Class to represent a group of output pins using the memory mapped GPIO registers.  Each write is one set and
+        one clear register store per bank '''
+    __slots__ = ('_gpios', '_shift', '_all')
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.NONE, log_level=INFO, initial_value=0):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self._setup_group(gpio_tuples, name)
+        for gpio in self._gpios:
+            set_pull(gpio, pull)
+        self.set_value(initial_value)
+        for gpio in self._gpios:
+            set_function(gpio, FSEL_OUTPUT)
+
+    def close(self):
+        for gpio in getattr(self, '_gpios', ()):
+            set_function(gpio, FSEL_INPUT)
+        self._gpios = ()
+
+    def set_value(self, value:int):
+        ''' Write the integer bit pattern to the group '''
+        set0, set1 = self._bank_masks(value)
+        clr0, clr1 = self._bank_masks(~value & self._all)
+        set_bits(set0, set1)
+        clear_bits(clr0, clr1)
+        self._value = value
+
+    write = set_value
+
+    def set_values(self, bits:int, mask:int):
+        ''' Write only the gpios in the mask, the set/clear registers do not change the other gpios '''
+        set0, set1 = self._bank_masks(bits & mask)
+        clr0, clr1 = self._bank_masks(~bits & mask & self._all)
+        set_bits(set0, set1)
+        clear_bits(clr0, clr1)
+        self._value = (self._value & ~mask) | (bits & mask)
+
+
+class GpioInGroup(_RegisterGroup, Generic_GpioInGroup):
+    ''' Class to represent a group of input pins using the memory mapped GPIO registers.  All pins are read from the
+        level registers '''
+    __slots__ = ('_gpios', '_shift', '_all', '_values')
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.DOWN, log_level=INFO):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self._setup_group(gpio_tuples, name)
+        for gpio in self._gpios:
+            set_pull(gpio, pull)
+            set_function(gpio, FSEL_INPUT)
+        self._values = [0] * len(self._gpios)
+
+    def read(self) -> int:
+        ''' Return the values of all pins in the group packed in an integer (bit 0 is the first gpio) '''
+        return self._read_value()
+
+    def get_values(self) -> list:
+        ''' Return the values of all pins in the group as a list (first gpio first) '''
+        level, values = levels(), self._values
+        for bit, gpio in enumerate(self._gpios):
+            values[bit] = (level >> gpio) & 1
+        return values
+
+
+class GpioIn(lib_uapi.GpioIn):
+    ''' Class to represent an abstracted GPIO pin.  Edge events (and kernel debounce) use the GPIO uAPI, the state is
+        read from the level register '''
+    __slots__ = ('_registers', '_lev', '_bit')
+
+    def __init__(self, gpio_pin, gpio_chip=0, name=None, pull=PULL.DOWN, event=EVENT.BOTH, debounce_ms=100, callback=None, log_level=INFO,
+                 start_polling=True, kernel_debounce=True):
+        gpio = _check_gpio(gpio_pin, gpio_chip)
+        self._registers, self._lev, self._bit = _registers, (GPLEV0 >> 2) + gpio // 32, 1 << (gpio % 32)
+        super().__init__(gpio_pin, gpio_chip, name=name, pull=pull, event=event, debounce_ms=debounce_ms, callback=callback,
+                         log_level=log_level, start_polling=start_polling, kernel_debounce=kernel_debounce)
+
+    def read_state(self) -> int:
+        ''' Read the current state from the hardware '''
+        return 1 if self._registers[self._lev] & self._bit else 0
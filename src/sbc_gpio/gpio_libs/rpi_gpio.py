@@ -4,9 +4,9 @@ Supported platforms: Raspberry Pi devices only
 '''
 import RPi.GPIO as GPIO
 from sbc_gpio import PULL, EVENT
-from ._generic_gpio import GpioIn as Generic_GpioIn, GpioOut as Generic_GpioOut
+from ._generic_gpio import GpioIn as Generic_GpioIn, GpioOut as Generic_GpioOut, GpioOutGroup as Generic_GpioOutGroup, \
+    GpioInGroup as Generic_GpioInGroup
 from logging_handler import INFO
-from threading import Thread
 from time import time, sleep
 from datetime import timedelta
 
@@ -19,9 +19,14 @@ VERSION = (1,0,0)
 GPIO.setmode(GPIO.BCM) # type: ignore
 GPIO.setwarnings(False) # type: ignore
 
+# RPi.GPIO only accepts the PUD_* ints for pull_up_down (not None)
+_PULL = {PULL.UP: GPIO.PUD_UP, PULL.DOWN: GPIO.PUD_DOWN} # type: ignore
+
 
 class GpioOut(Generic_GpioOut):
     ''' Class to represent an abstracted GPIO pin using the RPi.GPIO library '''
+    __slots__ = ('gpio_pin', 'gpio_chip')
+
     def __init__(self, gpio_pin, gpio_chip=0, name=None, pull=PULL.NONE, log_level=INFO, initial_state=0):
         super().__init__(name=name, log_level=log_level, pull=pull)
         self.name = name if name is not None else f"pin:{gpio_pin}"
@@ -51,14 +56,66 @@ class GpioOut(Generic_GpioOut):
     set_off = set_low
 
 
+class GpioOutGroup(Generic_GpioOutGroup):
+    ''' Class to represent a group of output pins using the RPi.GPIO library.  RPi.GPIO writes the
+        channels in a single call but one register write per pin. '''
+    __slots__ = ('_channels',)
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.NONE, log_level=INFO, initial_value=0):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self.gpio_tuples = tuple((int(gpio_chip), int(gpio_pin)) for gpio_chip, gpio_pin in gpio_tuples)
+        self.name = name if name is not None else f"group:{','.join(str(pin) for _, pin in self.gpio_tuples)}"
+        self._channels = [gpio_pin for _, gpio_pin in self.gpio_tuples]
+        # initial is parsed as an int by RPi.GPIO, so each channel is set up with its own initial value
+        for bit, channel in enumerate(self._channels):
+            GPIO.setup(channel, GPIO.OUT, initial=(initial_value >> bit) & 1) # type: ignore
+        self._value = initial_value
+
+    def close(self):
+        pass
+
+    def set_value(self, value:int):
+        ''' Write the integer bit pattern to the group '''
+        GPIO.output(self._channels, [(value >> bit) & 1 for bit in range(len(self._channels))]) # type: ignore
+        self._value = value
+
+    write = set_value
+
+    def _read_value(self) -> int:
+        ''' Return the output levels packed in an integer (bit 0 is the first gpio) '''
+        return sum(GPIO.input(channel) << bit for bit, channel in enumerate(self._channels)) # type: ignore
+
+
+class GpioInGroup(Generic_GpioInGroup):
+    ''' Class to represent a group of input pins using the RPi.GPIO library '''
+    __slots__ = ('_channels',)
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.DOWN, log_level=INFO):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self.gpio_tuples = tuple((int(gpio_chip), int(gpio_pin)) for gpio_chip, gpio_pin in gpio_tuples)
+        self.name = name if name is not None else f"group:{','.join(str(pin) for _, pin in self.gpio_tuples)}"
+        self._channels = [gpio_pin for _, gpio_pin in self.gpio_tuples]
+        GPIO.setup(self._channels, GPIO.IN, pull_up_down=_PULL.get(pull, GPIO.PUD_OFF)) # type: ignore
+
+    def close(self):
+        pass
+
+    def get_values(self) -> list:
+        ''' Return the values of all pins in the group as a list (first gpio first) '''
+        return [GPIO.input(channel) for channel in self._channels] # type: ignore
+
+
 class GpioIn(Generic_GpioIn):
-    ''' Class to represent an abstracted GPIO pin using the RPi.GPIO '''
-    def __init__(self, gpio_pin, gpio_chip=0, name=None, pull=PULL.DOWN, event=EVENT.BOTH, debounce_ms=100, callback=None, log_level=INFO, start_polling=True):
+    ''' Class to represent an abstracted GPIO pin using the RPi.GPIO (kernel_debounce is not supported, RPi.GPIO debounces) '''
+    __slots__ = ('gpio_pin', 'gpio_chip')
+
+    def __init__(self, gpio_pin, gpio_chip=0, name=None, pull=PULL.DOWN, event=EVENT.BOTH, debounce_ms=100, callback=None, log_level=INFO, start_polling=True,
+                 kernel_debounce=False):
         super().__init__(name=name, log_level=log_level, event=event, callback=callback, debounce_ms=debounce_ms, pull=pull)
         self.name = name if name is not None else f"chip:{gpio_chip},pin:{gpio_pin}"
         self.gpio_pin, self.gpio_chip = gpio_pin, gpio_chip
         # initialize the chip and pin
-        GPIO.setup(int(gpio_pin), GPIO.IN, pull_up_down=GPIO.PUD_UP if pull == PULL.UP else (GPIO.PUD_DOWN if pull == PULL.DOWN else None)) # type: ignore
+        GPIO.setup(int(gpio_pin), GPIO.IN, pull_up_down=_PULL.get(pull, GPIO.PUD_OFF)) # type: ignore
 
         if start_polling:
             self.start()
@@ -66,29 +123,26 @@ class GpioIn(Generic_GpioIn):
     def close(self):
         pass
 
-    @property
-    def state(self):
-        ''' Return current CS state '''
+    def read_state(self) -> int:
+        ''' Read the current state from the hardware '''
         return GPIO.input(self.gpio_pin) # type: ignore
     
+    def _callback_kwargs(self, timestamp:float, event:str, triggered:bool) -> dict:
+        ''' Return the keyword arguments passed to the callback (RPi.GPIO callbacks receive the time() epoch as 'time') '''
+        return {'event': event, 'time': timestamp, 'state': triggered}
+
     def _event_thread(self): # type: ignore
         ''' Background thread to watch for rising or falling edge '''
         # NOTE: The RPi.GPIO library includes a debounce however it doesn't include separate rising and falling
         triggered = False
 
         def call_event(event, triggered):
-            if self.callback is not None:
-                self._logger.debug(f"{self.info_str}: {'RISING' if event else 'FALLING'} state: {triggered}")
-                Thread(target=self.callback, kwargs={'event': EVENT.RISING if event else EVENT.FALLING,
-                        'time': time(), 'state': triggered}).start()
-            else:
-                self._logger.info(f"{self.info_str}: {'RISING' if event else 'FALLING'} state: triggered")
-
+            self._call_event(timestamp=time(), event=EVENT.RISING if event else EVENT.FALLING, triggered=triggered)
 
         while True and not self._stop_thread:
             try:
                 event_triggered = GPIO.wait_for_edge(self.gpio_pin, GPIO.BOTH, bouncetime=self.debounce_ms, timeout=1000) # type: ignore
-                triggered_state = self.state
+                triggered_state = self.read_state()
                 if event_triggered is not None:
                     # if monitoring for event rising or event falling ONLY, just send the event
                     if self.event != EVENT.BOTH:
@@ -104,7 +158,7 @@ class GpioIn(Generic_GpioIn):
                             call_event(triggered_state, triggered)
 
             except Exception as e:
-                self._logger.error(f"{self.info_str}: Error in rising event thread: {e}. Restarting...")
+                self._logger.error("%s: Error in rising event thread: %s. Restarting...", self, e)
                 triggered = False
                 sleep(.5)
 
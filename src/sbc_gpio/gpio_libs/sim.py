@@ -0,0 +1,450 @@
+'''
+GPIO library:  simulated GPIO (no hardware required)
+Supported platforms: Any Linux system, selected with the simulated platform (SBC_GPIO_SIM=1)
+
+The simulator has virtual chips of lines with a bias and a wiring table that connects an output to one or
+more inputs.  Writing an output changes the level of the wired inputs and each edge is written to a pipe
+per input request, so the inputs are watched by the shared event dispatcher like the uAPI backends.
+Edges have synthetic CLOCK_MONOTONIC timestamps (the time of the write), so the latency of the event
+pipeline can be measured against time.monotonic_ns().  Bounce (extra edges on every change of an input)
+and noise (glitch pulses that do not change the level) can be injected per line.
+
+The level of a line is the value of its own output request, else the value set with drive(), else the
+wired outputs (wired-OR), else the bias (PULL.UP is high, PULL.DOWN and PULL.NONE are low).
+
+Usage:
+    SIMULATOR.connect((0, 17), (0, 27), (1, 5))
+    SIMULATOR.set_bounce((0, 27), edges=3, interval_us=50)
+    SIMULATOR.inject_noise((1, 5), pulses=2, width_us=1)
+
+The wiring can also be set with SBC_GPIO_SIM_WIRING, i.e. "0-17:0-27,1-5;4:6" (output:input[,input] and lines as
+chip-line, or line on chip 0)
+'''
+import errno
+import os
+import struct
+from threading import RLock
+from time import monotonic_ns
+from sbc_gpio import PULL, EVENT, DIR
+from ._generic_gpio import GpioIn as Generic_GpioIn, GpioOut as Generic_GpioOut, GpioOutGroup as Generic_GpioOutGroup, \
+    GpioInGroup as Generic_GpioInGroup
+from logging_handler import INFO
+
+
+NAME = 'sim'
+VERSION = (1,0,0)
+
+# number of lines of each virtual chip (chip 0 and chip 1)
+DEFAULT_CHIPS = (32, 32)
+WIRING_ENV = 'SBC_GPIO_SIM_WIRING'
+# edge event record written to the input pipes (timestamp ns, 1 rising/0 falling, line seqno)
+EVENT_RECORD = struct.Struct('=QII')
+# records per pipe write, a write of up to PIPE_BUF bytes is never split
+_RECORDS_PER_WRITE = 4096 // EVENT_RECORD.size
+_READ_SIZE = EVENT_RECORD.size * 1024
+
+
+class SimLine:
+    ''' A line of a virtual chip '''
+    __slots__ = ('chip', 'offset', 'consumer', 'direction', 'bias', 'output', 'external', 'level', 'drivers', 'loads',
+                 'event_fds', 'seqno', 'bounce_edges', 'bounce_ns', 'events', 'dropped')
+
+    def __init__(self, chip:int, offset:int):
+        self.chip, self.offset = chip, offset
+        # consumer is None while the line is not requested
+        self.consumer = None
+        self.direction = None
+        self.bias = PULL.NONE
+        self.output = None
+        self.external = None
+        self.level = 0
+        # output lines wired to this line and input lines wired from this line
+        self.drivers = []
+        self.loads = []
+        # (read fd, write fd) of the event pipe for an input request with edge detection
+        self.event_fds = None
+        self.seqno = 0
+        self.bounce_edges = 0
+        self.bounce_ns = 0
+        self.events = 0
+        self.dropped = 0
+
+    def __repr__(self):
+        return f"SimLine({self.chip}-{self.offset})"
+
+    def resolve(self) -> int:
+        ''' Return the level of the line from the output, external drive, wired outputs and bias '''
+        if self.output is not None:
+            return self.output
+        if self.external is not None:
+            return self.external
+        driven = None
+        for driver in self.drivers:
+            if driver.output is not None:
+                driven = (driven or 0) | driver.output
+        if driven is not None:
+            return driven
+        return 1 if self.bias == PULL.UP else 0
+
+
+class Simulator:
+    ''' Process wide set of virtual chips and the wiring between the lines.  All changes are made with the lock held
+        so outputs can be written from any thread '''
+    def __init__(self, chips=DEFAULT_CHIPS):
+        self._lock = RLock()
+        self.chips = {}
+        for chip, ngpio in enumerate(chips):
+            self.add_chip(chip, ngpio)
+
+    def add_chip(self, chip:int, ngpio:int) -> None:
+        ''' Add (or replace) a virtual chip with ngpio lines '''
+        with self._lock:
+            self.chips[int(chip)] = tuple(SimLine(int(chip), offset) for offset in range(int(ngpio)))
+
+    def line(self, gpio) -> SimLine:
+        ''' Return the line for a (chip, line) tuple.  Raises ValueError if the line does not exist '''
+        gpio_chip, gpio_pin = gpio
+        lines = self.chips.get(int(gpio_chip))
+        if lines is None or not 0 <= int(gpio_pin) < len(lines):
+            chips = {chip: len(chip_lines) for chip, chip_lines in self.chips.items()}
+            raise ValueError(f"Simulated GPIO chip {gpio_chip} line {gpio_pin} does not exist.  Chips (lines): {chips}")
+        return lines[int(gpio_pin)]
+
+    def reset(self) -> None:
+        ''' Remove the wiring, bounce and external drive from all lines.  Requested lines stay requested '''
+        with self._lock:
+            now_ns = monotonic_ns()
+            for lines in self.chips.values():
+                for line in lines:
+                    line.drivers, line.loads = [], []
+                    line.external, line.bounce_edges, line.bounce_ns = None, 0, 0
+            for lines in self.chips.values():
+                for line in lines:
+                    self._update(line, now_ns)
+
+    def connect(self, output, *inputs) -> None:
+        ''' Wire an output (chip, line) to one or more inputs.  The inputs follow the output level '''
+        with self._lock:
+            driver = self.line(output)
+            now_ns = monotonic_ns()
+            for gpio in inputs:
+                load = self.line(gpio)
+                if load not in driver.loads:
+                    driver.loads.append(load)
+                    load.drivers.append(driver)
+                self._update(load, now_ns)
+
+    def disconnect(self, output, *inputs) -> None:
+        ''' Remove the wires from an output to the inputs (all inputs if none are passed) '''
+        with self._lock:
+            driver = self.line(output)
+            loads = [self.line(gpio) for gpio in inputs] if len(inputs) > 0 else list(driver.loads)
+            now_ns = monotonic_ns()
+            for load in loads:
+                if load in driver.loads:
+                    driver.loads.remove(load)
+                    load.drivers.remove(driver)
+                self._update(load, now_ns)
+
+    @property
+    def wiring(self) -> dict:
+        ''' Return the wiring table -> {(chip, line): [(chip, line) of the inputs]} '''
+        with self._lock:
+            return {(line.chip, line.offset): [(load.chip, load.offset) for load in line.loads]
+                    for lines in self.chips.values() for line in lines if len(line.loads) > 0}
+
+    def load_wiring(self, wiring:str) -> None:
+        ''' Connect the lines in a wiring string, i.e. "0-17:0-27,1-5;4:6" (output:input[,input] separated by ";") '''
+        def parse(gpio:str) -> tuple:
+            chip, _, pin = gpio.strip().rpartition('-')
+            return int(chip or 0), int(pin)
+        for wire in wiring.split(';'):
+            if ':' not in wire:
+                continue
+            output, inputs = wire.split(':', 1)
+            self.connect(parse(output), *[parse(gpio) for gpio in inputs.split(',') if gpio.strip() != ''])
+
+    def request(self, gpio, consumer:str, direction:str, bias=PULL.NONE, value:int|None=None, edge_detection=False) -> SimLine:
+        ''' Request a line as an input or output.  Raises OSError (EBUSY) if the line is already requested '''
+        with self._lock:
+            line = self.line(gpio)
+            if line.consumer is not None:
+                raise OSError(errno.EBUSY, f"Simulated GPIO chip {line.chip} line {line.offset} is already requested by '{line.consumer}'")
+            line.consumer, line.direction, line.bias = consumer, direction, bias
+            line.output = (1 if value else 0) if direction == DIR.OUT else None
+            if edge_detection:
+                line.event_fds = os.pipe()
+                os.set_blocking(line.event_fds[0], False)
+                os.set_blocking(line.event_fds[1], False)
+            # set the current level without edges
+            line.level = line.resolve()
+            self._update_loads(line, monotonic_ns())
+            return line
+
+    def release(self, line:SimLine) -> None:
+        ''' Release a requested line.  An output stops driving the wired inputs '''
+        with self._lock:
+            if line.event_fds is not None:
+                for fd in line.event_fds:
+                    os.close(fd)
+                line.event_fds = None
+            line.consumer, line.direction, line.output = None, None, None
+            now_ns = monotonic_ns()
+            self._update(line, now_ns)
+            self._update_loads(line, now_ns)
+
+    def write(self, line:SimLine, value:int) -> None:
+        ''' Set the value of an output line '''
+        with self._lock:
+            if line.output == value:
+                return
+            line.output = value
+            now_ns = monotonic_ns()
+            self._update(line, now_ns)
+            self._update_loads(line, now_ns)
+
+    def write_lines(self, lines, value:int, mask:int=-1) -> None:
+        ''' Set the output lines to the bits of value (bit 0 is the first line), only the lines in the mask are changed '''
+        with self._lock:
+            now_ns = monotonic_ns()
+            for bit, line in enumerate(lines):
+                if (mask >> bit) & 1 and line.output != (value >> bit) & 1:
+                    line.output = (value >> bit) & 1
+                    self._update(line, now_ns)
+                    self._update_loads(line, now_ns)
+
+    def drive(self, gpio, value:int|None) -> None:
+        ''' Drive a line from outside (a test stimulus).  None stops driving the line '''
+        with self._lock:
+            line = self.line(gpio)
+            line.external = None if value is None else (1 if value else 0)
+            self._update(line, monotonic_ns())
+
+    def set_bias(self, line:SimLine, bias) -> None:
+        ''' Change the bias of a line '''
+        with self._lock:
+            line.bias = bias
+            self._update(line, monotonic_ns())
+
+    def set_bounce(self, gpio, edges=0, interval_us=50) -> None:
+        ''' Add edges extra pairs of edges interval_us apart to every level change of an input (0 to disable) '''
+        with self._lock:
+            line = self.line(gpio)
+            line.bounce_edges, line.bounce_ns = int(edges), int(interval_us * 1000)
+
+    def inject_noise(self, gpio, pulses=1, width_us=1, interval_us=100) -> None:
+        ''' Generate glitch pulses (an edge and the edge back after width_us) on an input, the level does not change.
+            Noise is only seen by edge detection '''
+        with self._lock:
+            line = self.line(gpio)
+            now_ns, level = monotonic_ns(), line.level
+            events = []
+            for pulse in range(int(pulses)):
+                start_ns = now_ns + pulse * int(interval_us * 1000)
+                events.append((start_ns, 1 - level))
+                events.append((start_ns + int(width_us * 1000), level))
+            self._write_events(line, events)
+
+    def stats(self) -> dict:
+        ''' Return the simulator statistics.  Dropped are edges lost because an event pipe was full '''
+        with self._lock:
+            lines = [line for lines in self.chips.values() for line in lines]
+            return {'chips': {chip: len(chip_lines) for chip, chip_lines in self.chips.items()},
+                    'requested': sum(1 for line in lines if line.consumer is not None),
+                    'wires': sum(len(line.loads) for line in lines),
+                    'events': sum(line.events for line in lines), 'dropped': sum(line.dropped for line in lines)}
+
+    def _update_loads(self, line:SimLine, now_ns:int) -> None:
+        for load in line.loads:
+            self._update(load, now_ns)
+
+    def _update(self, line:SimLine, now_ns:int) -> None:
+        ''' Update the level of a line and write the edge (with bounce) if it changed '''
+        level = line.resolve()
+        if level == line.level:
+            return
+        previous, line.level = line.level, level
+        if line.event_fds is None:
+            return
+        if line.bounce_edges == 0:
+            self._write_events(line, ((now_ns, level),))
+        else:
+            self._write_events(line, [(now_ns + edge * line.bounce_ns, previous if edge & 1 else level)
+                                      for edge in range(2 * line.bounce_edges + 1)])
+
+    def _write_events(self, line:SimLine, events) -> None:
+        ''' Write edge event records to the event pipe.  Records that do not fit in the pipe are dropped (the seqno
+            still counts them, like the kernel) '''
+        if line.event_fds is None:
+            return
+        records = []
+        for timestamp_ns, level in events:
+            line.seqno += 1
+            records.append(EVENT_RECORD.pack(timestamp_ns, level, line.seqno))
+        line.events += len(records)
+        for start in range(0, len(records), _RECORDS_PER_WRITE):
+            chunk = records[start:start + _RECORDS_PER_WRITE]
+            try:
+                os.write(line.event_fds[1], b''.join(chunk))
+            except BlockingIOError:
+                line.dropped += len(chunk)
+
+
+SIMULATOR = Simulator()
+SIMULATOR.load_wiring(os.environ.get(WIRING_ENV, ''))
+
+
+def _request_line(gpio, gpio_chip, gpio_pin, consumer:str, direction:str, pull, **kwargs) -> SimLine:
+    ''' Request a simulated line '''
+    gpio._logger.info("%s: Requesting simulated GPIO chip %s line %s...", gpio, gpio_chip, gpio_pin)
+    return SIMULATOR.request((gpio_chip, gpio_pin), consumer, direction, pull, **kwargs)
+
+
+class GpioOut(Generic_GpioOut):
+    ''' Class to represent an abstracted GPIO pin on a simulated chip '''
+    __slots__ = ('gpio_pin', 'gpio_chip', '_line')
+
+    def __init__(self, gpio_pin, gpio_chip=0, name=None, pull=PULL.NONE, log_level=INFO, initial_state=0):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self.name = name if name is not None else f"chip:{gpio_chip},pin:{gpio_pin}"
+        self.gpio_pin, self.gpio_chip = gpio_pin, gpio_chip
+        self._line = None
+        self._line = _request_line(self, gpio_chip, gpio_pin, name if name is not None else f'{self.info_str}-OUT', DIR.OUT, pull,
+                                   value=initial_state)
+
+    def close(self):
+        if self._line is not None:
+            self._logger.info("%s: Releasing GPIO...", self)
+            SIMULATOR.release(self._line)
+            self._line = None
+
+    @property
+    def state(self):
+        ''' Return current CS state '''
+        return self._line.level # type: ignore
+
+    def set_high(self):
+        ''' Set the pin to on/high '''
+        SIMULATOR.write(self._line, 1) # type: ignore
+
+    set_1 = set_high
+    set_on = set_high
+
+    def set_low(self):
+        ''' Set the pin to off/low '''
+        SIMULATOR.write(self._line, 0) # type: ignore
+
+    set_0 = set_low
+    set_off = set_low
+
+
+class _LineGroup:
+    ''' Line handling shared by the simulated group classes '''
+    __slots__ = ()
+
+    def _request_group(self, gpio_tuples, name, pull, direction, initial_value=None):
+        ''' Request the lines for all gpios in the group '''
+        self.gpio_tuples = tuple((int(gpio_chip), int(gpio_pin)) for gpio_chip, gpio_pin in gpio_tuples)
+        self.name = name if name is not None else f"group:{','.join(f'{chip}-{pin}' for chip, pin in self.gpio_tuples)}"
+        self._lines = ()
+        try:
+            for bit, (gpio_chip, gpio_pin) in enumerate(self.gpio_tuples):
+                self._lines += (_request_line(self, gpio_chip, gpio_pin, name if name is not None else f"{self.info_str}-{'OUT' if direction == DIR.OUT else 'IN'}",
+                                              direction, pull, value=(initial_value >> bit) & 1 if initial_value is not None else None),)
+        except Exception:
+            self.close()
+            raise
+
+    def _read_value(self) -> int:
+        ''' Return the level of all lines packed in an integer (bit 0 is the first gpio) '''
+        value = 0
+        for bit, line in enumerate(self._lines):
+            value |= line.level << bit
+        return value
+
+    def close(self):
+        if len(self._lines) > 0:
+            self._logger.info("%s: Releasing GPIO lines...", self)
+        for line in self._lines:
+            SIMULATOR.release(line)
+        self._lines = ()
+
+
+class GpioOutGroup(_LineGroup, Generic_GpioOutGroup):
+    ''' Class to represent a group of output pins on simulated chips.  All lines are changed with the same timestamp '''
+    __slots__ = ('_lines',)
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.NONE, log_level=INFO, initial_value=0):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self._request_group(gpio_tuples, name, pull, DIR.OUT, initial_value)
+        self._value = initial_value
+
+    def set_value(self, value:int):
+        ''' Write the integer bit pattern to the group '''
+        SIMULATOR.write_lines(self._lines, value)
+        self._value = value
+
+    write = set_value
+
+    def set_values(self, bits:int, mask:int):
+        ''' Write only the gpios in the mask '''
+        SIMULATOR.write_lines(self._lines, bits, mask)
+        self._value = (self._value & ~mask) | (bits & mask)
+
+
+class GpioInGroup(_LineGroup, Generic_GpioInGroup):
+    ''' Class to represent a group of input pins on simulated chips '''
+    __slots__ = ('_lines',)
+
+    def __init__(self, gpio_tuples, name=None, pull=PULL.DOWN, log_level=INFO):
+        super().__init__(name=name, log_level=log_level, pull=pull)
+        self._request_group(gpio_tuples, name, pull, DIR.IN)
+
+    def read(self) -> int:
+        ''' Return the values of all pins in the group packed in an integer (bit 0 is the first gpio) '''
+        return self._read_value()
+
+    def get_values(self) -> list:
+        ''' Return the values of all pins in the group as a list (first gpio first) '''
+        return [line.level for line in self._lines]
+
+
+class GpioIn(Generic_GpioIn):
+    ''' Class to represent an abstracted GPIO pin on a simulated chip.  The edges are read from the event pipe of the line
+        (kernel_debounce is not simulated, the edges are debounced in userspace) '''
+    __slots__ = ('gpio_pin', 'gpio_chip', '_line')
+
+    def __init__(self, gpio_pin, gpio_chip=0, name=None, pull=PULL.DOWN, event=EVENT.BOTH, debounce_ms=100, callback=None, log_level=INFO,
+                 start_polling=True, kernel_debounce=False):
+        super().__init__(name=name, log_level=log_level, event=event, callback=callback, debounce_ms=debounce_ms, pull=pull)
+        self.name = name if name is not None else f"chip:{gpio_chip},pin:{gpio_pin}"
+        self.gpio_pin, self.gpio_chip = gpio_pin, gpio_chip
+        self._line = None
+        self._line = _request_line(self, gpio_chip, gpio_pin, name if name is not None else f'{self.info_str}-IN', DIR.IN, pull,
+                                   edge_detection=True)
+        if start_polling:
+            self.start()
+
+    def close(self):
+        self.stop()
+        if self._line is not None:
+            self._logger.info("%s: Releasing GPIO...", self)
+            SIMULATOR.release(self._line)
+            self._line = None
+
+    def read_state(self) -> int:
+        ''' Read the current state from the simulated line '''
+        return self._line.level # type: ignore
+
+    def _event_fd(self) -> int|None:
+        ''' Return the read end of the line event pipe so the pin is watched by the shared event dispatcher '''
+        return self._line.event_fds[0] # type: ignore
+
+    def _read_events(self) -> list:
+        ''' Read the pending edge events and return [(EVENT.RISING/FALLING, timestamp ns, line seqno)] '''
+        try:
+            data = os.read(self._line.event_fds[0], _READ_SIZE) # type: ignore
+        except BlockingIOError:
+            return []
+        return [(EVENT.RISING if rising else EVENT.FALLING, timestamp_ns, line_seqno)
+                for timestamp_ns, rising, line_seqno in EVENT_RECORD.iter_unpack(data)]
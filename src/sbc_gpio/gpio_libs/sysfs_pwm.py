@@ -0,0 +1,189 @@
+'''
+PWM library:  Linux PWM sysfs interface (/sys/class/pwm)
+Supported platforms: Any SBC with a PWM controller enabled in the devicetree (i.e. dtoverlay=pwm-2chan on a Raspberry Pi)
+
+Each controller is a /sys/class/pwm/pwmchipN directory and the channels are exported as pwmchipN/pwmM.
+The chip numbers depend on the probe order, so platform definitions name the controller by its device
+(i.e. 'fe20c000.pwm') and the chip is found by the device link.  The period, duty_cycle and enable
+attribute files are opened once, so each update is a single os.pwrite.
+'''
+import os
+from time import sleep
+from ._generic_gpio import Gpio
+from logging_handler import INFO
+
+
+NAME = 'sysfs_pwm'
+VERSION = (1,0,0)
+
+PWM_SYSFS_DIR = '/sys/class/pwm'
+# time to wait for udev to set the permissions on a newly exported channel
+EXPORT_TIMEOUT = 1.0
+
+
+def pwm_chips() -> dict:
+    ''' Return the PWM controllers as {'pwmchipN': {'device': device name, 'npwm': number of channels}} '''
+    chips = {}
+    try:
+        chip_names = sorted(os.listdir(PWM_SYSFS_DIR))
+    except FileNotFoundError:
+        return chips
+    for chip_name in chip_names:
+        if not chip_name.startswith('pwmchip'):
+            continue
+        chip_dir = os.path.join(PWM_SYSFS_DIR, chip_name)
+        try:
+            with open(os.path.join(chip_dir, 'npwm'), 'r', encoding='utf-8') as npwm_file:
+                npwm = int(npwm_file.read().strip())
+        except (OSError, ValueError):
+            continue
+        chips[chip_name] = {'device': os.path.basename(os.path.realpath(os.path.join(chip_dir, 'device'))), 'npwm': npwm}
+    return chips
+
+
+def find_chip(chip) -> str:
+    ''' Return the pwmchipN name for a chip number, chip name or controller device name.  Raises ValueError if not found '''
+    chips = pwm_chips()
+    chip_name = f'pwmchip{chip}' if isinstance(chip, int) or str(chip).isdigit() else str(chip)
+    if chip_name in chips:
+        return chip_name
+    for chip_name, chip_info in chips.items():
+        if chip_info['device'] == chip:
+            return chip_name
+    raise ValueError(f"PWM chip '{chip}' not found.  Available PWM chips: {chips}")
+
+
+class PWM(Gpio):
+    ''' Class to represent a hardware PWM channel using the sysfs interface.  The channel is exported if needed and
+        unexported on close if it was exported by this class '''
+    __slots__ = ('_fds', '_exported', 'chip', 'channel', '_channel_dir', '_period_ns', '_duty_ns')
+
+    def __init__(self, chip, channel:int, name=None, frequency_hz:float|None=None, duty_cycle:float|None=None, polarity=None,
+                 log_level=INFO):
+        super().__init__(name=name, log_level=log_level)
+        self._fds = {}
+        self._exported = False
+        self.chip, self.channel = find_chip(chip), int(channel)
+        self.name = name if name is not None else f"{self.chip}:{self.channel}"
+        chip_dir = os.path.join(PWM_SYSFS_DIR, self.chip)
+        self._channel_dir = os.path.join(chip_dir, f'pwm{self.channel}')
+        if not os.path.isdir(self._channel_dir):
+            self._logger.info("%s: Exporting PWM channel...", self)
+            with open(os.path.join(chip_dir, 'export'), 'w', encoding='utf-8') as export_file:
+                export_file.write(str(self.channel))
+            self._exported = True
+        self._open_attributes()
+        self._period_ns = self._read('period')
+        self._duty_ns = self._read('duty_cycle')
+        if polarity is not None:
+            self.set_polarity(polarity)
+        if frequency_hz is not None:
+            self.set_frequency(frequency_hz)
+        if duty_cycle is not None:
+            self.set_duty_cycle(duty_cycle)
+
+    def _open_attributes(self):
+        ''' Open the attribute files, retrying until udev has set the permissions on a new channel '''
+        retries = int(EXPORT_TIMEOUT / 0.05)
+        for attribute in ('period', 'duty_cycle', 'enable'):
+            while True:
+                try:
+                    self._fds[attribute] = os.open(os.path.join(self._channel_dir, attribute), os.O_RDWR | os.O_CLOEXEC)
+                    break
+                except (FileNotFoundError, PermissionError):
+                    if retries <= 0:
+                        self.close()
+                        raise
+                    retries -= 1
+                    sleep(0.05)
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds = {}
+        if self._exported:
+            self._logger.info("%s: Unexporting PWM channel...", self)
+            try:
+                with open(os.path.join(PWM_SYSFS_DIR, self.chip, 'unexport'), 'w', encoding='utf-8') as unexport_file:
+                    unexport_file.write(str(self.channel))
+            except OSError as e:
+                self._logger.warning("%s: Unable to unexport PWM channel: %s", self, e)
+            self._exported = False
+
+    def _read(self, attribute:str) -> int:
+        ''' Read an integer attribute from the open fd '''
+        return int(os.pread(self._fds[attribute], 32, 0).strip() or 0)
+
+    def _write(self, attribute:str, value:int):
+        os.pwrite(self._fds[attribute], b'%d' % value, 0)
+
+    @property
+    def period_ns(self) -> int:
+        return self._period_ns
+
+    @property
+    def duty_ns(self) -> int:
+        return self._duty_ns
+
+    @property
+    def frequency(self) -> float:
+        ''' Return the frequency in Hz (0 if the period is not set) '''
+        return 1e9 / self._period_ns if self._period_ns else 0.0
+
+    @property
+    def duty_cycle(self) -> float:
+        ''' Return the duty cycle 0.0-1.0 '''
+        return self._duty_ns / self._period_ns if self._period_ns else 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self._read('enable') == 1
+
+    def set_period_ns(self, period_ns:int):
+        ''' Set the period, the duty cycle ratio is kept.  The kernel rejects a duty cycle longer than the period
+            so the duty cycle is written first when the period gets shorter '''
+        period_ns = int(period_ns)
+        if period_ns <= 0:
+            raise ValueError(f"{self.info_str}: Period must be greater than 0, not {period_ns}")
+        duty_ns = int(period_ns * self.duty_cycle)
+        if duty_ns < self._duty_ns:
+            self._write('duty_cycle', duty_ns)
+            self._write('period', period_ns)
+        else:
+            self._write('period', period_ns)
+            self._write('duty_cycle', duty_ns)
+        self._period_ns, self._duty_ns = period_ns, duty_ns
+
+    def set_frequency(self, frequency_hz:float):
+        ''' Set the frequency in Hz, the duty cycle ratio is kept '''
+        if frequency_hz <= 0:
+            raise ValueError(f"{self.info_str}: Frequency must be greater than 0, not {frequency_hz}")
+        self.set_period_ns(round(1e9 / frequency_hz))
+
+    def set_duty_ns(self, duty_ns:int):
+        ''' Set the high time in ns (a single pwrite) '''
+        if not 0 <= duty_ns <= self._period_ns:
+            raise ValueError(f"{self.info_str}: Duty cycle must be between 0 and the period {self._period_ns}ns, not {duty_ns}")
+        os.pwrite(self._fds['duty_cycle'], b'%d' % duty_ns, 0)
+        self._duty_ns = duty_ns
+
+    def set_duty_cycle(self, duty_cycle:float):
+        ''' Set the duty cycle 0.0-1.0 (a single pwrite) '''
+        if not 0.0 <= duty_cycle <= 1.0:
+            raise ValueError(f"{self.info_str}: Duty cycle must be between 0.0 and 1.0, not {duty_cycle}")
+        self.set_duty_ns(int(self._period_ns * duty_cycle))
+
+    def set_polarity(self, polarity:str):
+        ''' Set the polarity ('normal' or 'inversed'), only allowed while the channel is disabled '''
+        if polarity not in ('normal', 'inversed'):
+            raise ValueError(f"{self.info_str}: Polarity must be 'normal' or 'inversed', not '{polarity}'")
+        with open(os.path.join(self._channel_dir, 'polarity'), 'w', encoding='utf-8') as polarity_file:
+            polarity_file.write(polarity)
+
+    def enable(self):
+        ''' Start the PWM output '''
+        self._write('enable', 1)
+
+    def disable(self):
+        ''' Stop the PWM output '''
+        self._write('enable', 0)
@@ -5,11 +5,16 @@ from logging_handler import create_logger, INFO, DEBUG
 import os
 import re
 import subprocess
+from importlib import import_module
 from sbc_gpio import DIR, EVENT, PULL
-from sbc_gpio.gpio_libs._generic_gpio import GpioIn, GpioOut
+from sbc_gpio.gpio_libs._generic_gpio import GpioIn, GpioOut, GpioOutGroup, GpioInGroup
+from ._registry import get_registry
+from ._pinmap import PinMap, GPIO_PIN
 
-# select the gpio library for the platform
-import sbc_gpio.gpio_libs.lib_gpiod as lib_gpiod
+# GPIO libraries are referenced by module name and only imported the first time a GPIO is requested.
+# A tuple of module names is a list of preferences, the first library that imports is used.
+# gpiod libraries in order of preference (libgpiod 2.x bindings, libgpiod 1.x bindings, uAPI v2 without bindings)
+GPIO_LIB_GPIOD = ('sbc_gpio.gpio_libs.lib_gpiod2', 'sbc_gpio.gpio_libs.lib_gpiod', 'sbc_gpio.gpio_libs.lib_uapi')
 
 # List of dict - platforms supported by this definition
 SUPPORTED_PLATFORMS = [
@@ -17,7 +22,7 @@ SUPPORTED_PLATFORMS = [
         'model': 'abc123',
         'description': 'test abc123',
         'gpio_valid_values': [1,2,3,4,5,6,7,8,9,10],
-        'gpio_lib': lib_gpiod,
+        'gpio_lib': GPIO_LIB_GPIOD,
         'identifiers': [
             {'type': 'file', 'contents': 'abc123'}
         ],
@@ -25,6 +30,9 @@ SUPPORTED_PLATFORMS = [
     }
 ]
 
+# compiled pin maps, built once per platform definition
+_pin_maps = {}
+
 
 class Boot:
     ''' Class to represent the boot process.  Abstract for the different boot methods (uboot, extlinux)'''
@@ -66,13 +74,22 @@ class SbcPlatform_Base:
     gpio_re_format = ''
     gpio_prefix = []
     gpio_chip_offset = ()
+    gpio_header = None
+    # hardware PWM channels -> {name: (pwm controller device or pwmchip name, channel, gpio)}
+    pwm_channels = None
+    platform_index = None
 
-    def __init__(self, log_level=INFO, **kwargs):
+    def __init__(self, log_level=INFO, platform_index=None, **kwargs):
         self._logger = create_logger(console_level=log_level, name=self.info_str)
         for arg, value in kwargs.items():
             setattr(self, arg, value)
-        self._identify_platform()
-        self._set_serial()
+        if platform_index is not None:
+            # platform already identified (i.e. from the platform cache), skip the identifiers
+            self._set_platform(platform_index)
+        else:
+            self._identify_platform()
+        if self.serial is None:
+            self._set_serial()
 
 
     def __del__(self):
@@ -89,56 +106,82 @@ class SbcPlatform_Base:
         """ Returns the info string for the class (used in logging commands) """
         return f"{self.__class__.__name__}" + (f"({self.model})" if self.model is not None else '')
 
+    @property
+    def pin_map(self) -> PinMap:
+        ''' Return the compiled pin map for the platform.  The pin map is built once per platform definition '''
+        key = (self.__class__, id(self._platforms), self.platform_index)
+        pin_map = _pin_maps.get(key)
+        if pin_map is None:
+            pin_map = PinMap()
+            header_pins = {gpio: header_pin for header_pin, gpio in (self.gpio_header or {}).items()}
+            for gpio in (self.gpio_valid_values or []):
+                chip, line, names = self._gpio_spec(gpio)
+                pin_map.add(chip, line, gpio, header_pin=header_pins.get(gpio), names=names)
+            _pin_maps[key] = pin_map
+        return pin_map
+
+    def _gpio_spec(self, gpio:int) -> tuple:
+        ''' Return (chip, line, (names,)) for a valid global gpio number.  Override per device class '''
+        # Generic function to override per device class.  Return chip 0 with the integer value
+        return 0, gpio, ()
+
+    def gpio_resolve(self, gpio) -> GPIO_PIN:
+        ''' Return the GPIO_PIN (chip, line, gpio, header_pin) for a gpio in any supported format '''
+        pin = self.pin_map.resolve(gpio)
+        if pin is None:
+            if self.gpio_valid_values is None and str(gpio).isdigit():
+                # No list of valid gpios.  Must assume everything is ok
+                return GPIO_PIN(0, int(gpio), int(gpio), None)
+            self._logger.error(f"{self.info_str}: GPIO '{gpio}' is not valid. Valid values: {self.gpio_valid_values}")
+            raise ValueError(f"{self.info_str}: GPIO '{gpio}' is not valid. {self.gpio_format}")
+        return pin
+
+    def resolve_many(self, gpios) -> tuple:
+        ''' Return a tuple of GPIO_PIN for a list of gpios.  Raises a ValueError listing all gpios that are not valid '''
+        if self.gpio_valid_values is None:
+            return tuple(self.gpio_resolve(gpio) for gpio in gpios)
+        pins = self.pin_map.resolve_many(gpios)
+        if None in pins:
+            invalid = [gpio for gpio, pin in zip(gpios, pins) if pin is None]
+            self._logger.error(f"{self.info_str}: GPIOs {invalid} are not valid. Valid values: {self.gpio_valid_values}")
+            raise ValueError(f"{self.info_str}: GPIOs {invalid} are not valid. {self.gpio_format}")
+        return pins
+
     def gpio_valid(self, gpio) -> bool:
         ''' Check if a GPIO is valid on this platfom '''
         if self.gpio_valid_values is None:
             self._logger.warning(f"{self.info_str}: No list of valid GPIO values available. Assuming '{gpio}' is valid.")
             # No list of valid gpios.  Must assume everything is ok
             return True
-        if self.gpio_convert(gpio) in self.gpio_valid_values:
-            # GPIO (string or int) is valid
-            return True
-        return False
+        return gpio in self.pin_map
     gpio_is_valid = gpio_valid
-        
+
     def gpio_convert(self, gpio) -> int|None:
         ''' Return the GPIO converted to an integer '''
-        # Generic function to override per device class.  Make sure it is an int
-        if not isinstance(gpio, int) or (isinstance(gpio,str) and not gpio.isdigit()):
-            self._logger.error(f"{self.info_str}: Unable to convert '{gpio}' to an integer.")
-            raise ValueError(f"{self.info_str}: Unable to convert '{gpio}' to an integer.")
-        if not self.gpio_valid(int(gpio)):
-            self._logger.error(f"{self.info_str}: GPIO '{gpio}' is not in the list of valud values: {self.gpio_valid_values}")
-            raise ValueError(f"{self.info_str}: Unable to convert '{gpio}' to an integer.")
-        return int(gpio)
+        return self.gpio_resolve(gpio).gpio
 
     def gpio_tuple(self, gpio) -> tuple:
         ''' Return the GPIO converted to a gpio chip and pin (in tuple format with 2 fields)'''
-        # Generic function to override per device class.  Return chip 0 with the integer value
-        return 0, self.gpio_convert(gpio) 
+        pin = self.gpio_resolve(gpio)
+        return pin.chip, pin.line
 
     def _identify_platform(self):
-        ''' loop through the platforms supported by this definition and check for a match, return the matched platform or None '''
-        for platform in self._platforms:
-            self._logger.debug(f"{self.info_str}: Checking platform {platform.get('model')}")
-            for identifier in platform.get('identifiers', []):
-                self._logger.debug(f"{self.info_str}: {platform.get('model')}: Testing identifier: {identifier}")
-                if identifier.get('type', 'file') == 'file' and identifier.get('contents', None) is not None:
-                    if get_file_regex(identifier['file'], identifier['contents']):
-                        # save the values for the platform
-                        for item, value in platform.items():
-                            setattr(self, item, value)
-                        self._logger.debug(f"{self.info_str}: Identified platform as {self.model} using {identifier}")
-                        return
-                if identifier.get('type', 'file') == 'true':
-                    # This is a force to match
-                    # save the values for the platform
-                    for item, value in platform.items():
-                        setattr(self, item, value)
-                    self._logger.debug(f"{self.info_str}: Identified platform using {identifier}")
-                    return
+        ''' check the identifiers for the platforms supported by this definition and save the values for the matched platform '''
+        match = get_registry(self._platforms).identify()
+        if match is not None:
+            _, index, identifier = match
+            # save the values for the platform
+            self._set_platform(index)
+            self._logger.debug(f"{self.info_str}: Identified platform as {self.model} using {identifier}")
+            return
         self._logger.debug(f"{self.info_str}: Unable to identify platform. Platform List: {[platform.get('description', platform.get('model')) for platform in self._platforms]}")
-                    
+
+    def _set_platform(self, platform_index:int) -> None:
+        ''' Save the values for the platform at the index in the supported platform list '''
+        for item, value in self._platforms[platform_index].items():
+            setattr(self, item, value)
+        self.platform_index = platform_index
+
     def _set_serial(self) -> None:
         ''' Try to get the serial number of the device and save it to the platform object '''
         if self._serial_location is not None and self._serial_location.get('contents', None) is not None:
@@ -154,6 +197,14 @@ class SbcPlatform_Base:
                 except Exception as e:
                     self._logger.warning(f"{self.info_str}: Unable to get serial number from process: {e}, serial location: {self._serial_location}")
 
+    def _get_gpio_lib(self):
+        ''' Return the gpio library module for the platform, importing it on first use '''
+        if self.gpio_lib is None:
+            raise ValueError(f'{self.info_str}: GPIO Library not identified.  Unable to open a GPIO')
+        if isinstance(self.gpio_lib, (str, tuple, list)):
+            self.gpio_lib = load_gpio_lib(self.gpio_lib, logger=self._logger)
+        return self.gpio_lib
+
     @property
     def platform_matched(self) -> bool:
         ''' Return True if the platform was matched '''
@@ -165,26 +216,73 @@ class SbcPlatform_Base:
         ''' Get a gpio out pin.  Gpio_id can be a string (passed to convert), an int, or a tuple (chip, pin) '''
         if not self.platform_matched:
             raise ValueError(f'{self.info_str}: Platform has not been identified')
-        if self.gpio_lib is None:
-            raise ValueError(f'{self.info_str}: GPIO Library not identified.  Unable to open a GPIO')
+        gpio_lib = self._get_gpio_lib()
         if isinstance(gpio_id, tuple) and len(gpio_id) == 2 and isinstance(gpio_id[0], int) and isinstance(gpio_id[1], int):
             gpio_tuple = gpio_id
         else:
             gpio_tuple = tuple(self.gpio_tuple(gpio_id))
-        return self.gpio_lib.GpioOut(gpio_tuple[1], gpio_tuple[0], name=name, pull=pull, log_level=log_level, initial_state=initial_state)
+        return gpio_lib.GpioOut(gpio_tuple[1], gpio_tuple[0], name=name, pull=pull, log_level=log_level, initial_state=initial_state)
 
-    def get_gpio_in(self, gpio_id, name=None, pull=PULL.DOWN, event=EVENT.BOTH, debounce_ms=100, callback=None, log_level=INFO, start_polling=True) -> GpioIn:
-        ''' Get a gpio in pin.  Gpio_id can be a string (passed to convert), an int, or a tuple (chip, pin) '''
+    def get_gpio_out_group(self, gpio_ids, name=None, pull=PULL.NONE, log_level=INFO, initial_value=0) -> GpioOutGroup:
+        ''' Get a group of gpio out pins that are written together as an integer bit pattern (bit 0 is the first gpio).
+            Each gpio_id can be a string (passed to convert), an int, or a tuple (chip, pin) '''
         if not self.platform_matched:
             raise ValueError(f'{self.info_str}: Platform has not been identified')
-        if self.gpio_lib is None:
-            raise ValueError(f'{self.info_str}: GPIO Library not identified.  Unable to open a GPIO')
+        gpio_lib = self._get_gpio_lib()
+        return gpio_lib.GpioOutGroup(self._gpio_tuples(gpio_ids), name=name, pull=pull, log_level=log_level, initial_value=initial_value)
+
+    def get_gpio_in_group(self, gpio_ids, name=None, pull=PULL.DOWN, log_level=INFO) -> GpioInGroup:
+        ''' Get a group of gpio in pins that are read together as an integer bit pattern (bit 0 is the first gpio).
+            Each gpio_id can be a string (passed to convert), an int, or a tuple (chip, pin) '''
+        if not self.platform_matched:
+            raise ValueError(f'{self.info_str}: Platform has not been identified')
+        gpio_lib = self._get_gpio_lib()
+        return gpio_lib.GpioInGroup(self._gpio_tuples(gpio_ids), name=name, pull=pull, log_level=log_level)
+
+    def _gpio_tuples(self, gpio_ids) -> list:
+        ''' Return a list of (chip, pin) tuples for a list of gpio ids '''
+        gpio_ids = list(gpio_ids)
+        gpio_tuples = [gpio_id if isinstance(gpio_id, tuple) and len(gpio_id) == 2 else None for gpio_id in gpio_ids]
+        pins = iter(self.resolve_many([gpio_id for gpio_id, gpio_tuple in zip(gpio_ids, gpio_tuples) if gpio_tuple is None]))
+        return [gpio_tuple if gpio_tuple is not None else tuple(next(pins)[:2]) for gpio_tuple in gpio_tuples]
+
+    def get_gpio_in(self, gpio_id, name=None, pull=PULL.DOWN, event=EVENT.BOTH, debounce_ms=100, callback=None, log_level=INFO, start_polling=True,
+                    kernel_debounce=True) -> GpioIn:
+        ''' Get a gpio in pin.  Gpio_id can be a string (passed to convert), an int, or a tuple (chip, pin).
+            If kernel_debounce is True the debounce is done by the kernel when supported by the gpio library and kernel.
+            The callback timestamp is in seconds on the monotonic clock (gpiod, uAPI, sim), RPi.GPIO passes time= (time() epoch) '''
+        if not self.platform_matched:
+            raise ValueError(f'{self.info_str}: Platform has not been identified')
+        gpio_lib = self._get_gpio_lib()
         if isinstance(gpio_id, tuple) and len(gpio_id) == 2 and isinstance(gpio_id[0], int) and isinstance(gpio_id[1], int):
             gpio_tuple = gpio_id
         else:
             gpio_tuple = tuple(self.gpio_tuple(gpio_id))
-        return self.gpio_lib.GpioIn(gpio_tuple[1], gpio_tuple[0], name=name, pull=pull, event=event, debounce_ms=debounce_ms,
-                                  callback=callback, log_level=log_level, start_polling=start_polling)
+        return gpio_lib.GpioIn(gpio_tuple[1], gpio_tuple[0], name=name, pull=pull, event=event, debounce_ms=debounce_ms,
+                                  callback=callback, log_level=log_level, start_polling=start_polling, kernel_debounce=kernel_debounce)
+
+    def pwm_channel(self, pwm_id) -> tuple:
+        ''' Return (pwm chip, channel) for a PWM channel name from the platform definition (i.e. 'PWM0'), a gpio or header
+            pin in any supported format that has a PWM function, or a (pwm chip, channel) tuple '''
+        if isinstance(pwm_id, tuple) and len(pwm_id) == 2:
+            return pwm_id
+        pwm_channels = self.pwm_channels or {}
+        if str(pwm_id).upper() in pwm_channels:
+            return tuple(pwm_channels[str(pwm_id).upper()][:2])
+        pin = self.pin_map.resolve(pwm_id)
+        for chip, channel, gpio in pwm_channels.values():
+            if pin is not None and pin.gpio == gpio:
+                return chip, channel
+        raise ValueError(f"{self.info_str}: '{pwm_id}' is not a PWM channel.  PWM channels: {pwm_channels}")
+
+    def get_pwm(self, pwm_id, name=None, frequency_hz:float|None=None, duty_cycle:float|None=None, log_level=INFO):
+        ''' Get a hardware PWM channel (sysfs).  Pwm_id can be a PWM channel name, a gpio/header pin with a PWM function or a
+            tuple (pwm chip, channel) '''
+        from sbc_gpio.gpio_libs.sysfs_pwm import PWM
+        if not self.platform_matched:
+            raise ValueError(f'{self.info_str}: Platform has not been identified')
+        chip, channel = self.pwm_channel(pwm_id)
+        return PWM(chip, channel, name=name, frequency_hz=frequency_hz, duty_cycle=duty_cycle, log_level=log_level)
 
     def spi_buses(self) -> tuple:
         ''' Returns a tuple listing the spi bus numbers that are available (only applicable on Linux).  I.e. (0,1) or (0,) '''
@@ -220,6 +318,22 @@ class SbcPlatform_Base:
         return i2c_buses
 
 
+def load_gpio_lib(gpio_lib, logger=None):
+    ''' Import and return a gpio library.  Accepts a module, a module name or a tuple of module names in order of preference '''
+    if not isinstance(gpio_lib, (str, tuple, list)):
+        return gpio_lib
+    errors = []
+    for module_name in ((gpio_lib,) if isinstance(gpio_lib, str) else gpio_lib):
+        try:
+            return import_module(module_name)
+        except (ImportError, RuntimeError) as e:
+            # RPi.GPIO raises a RuntimeError when imported on a device other than a Raspberry Pi
+            if logger is not None:
+                logger.debug(f"Unable to import GPIO library {module_name}: {e}")
+            errors.append(f"{module_name}: {e}")
+    raise ImportError(f"Unable to import a GPIO library. Errors: {errors}")
+
+
 def get_file_regex(filename:str, re_string:str) -> re.Match|None:
     ''' Check if file exists, open it, and return a regex search object using the provided search string '''
     if not os.path.exists(filename):
@@ -0,0 +1,49 @@
+'''
+Compiled pin map for a platform.  The pin map is built once from the platform definition and maps
+every accepted spelling of a GPIO (integer, numeric string, platform specific name like '3B3' or
+'PC7', and header pin 'PIN<n>') to a GPIO_PIN tuple.  Lookups are a single dict hit.
+'''
+from collections import namedtuple
+
+GPIO_PIN = namedtuple('GPIO_PIN', ('chip', 'line', 'gpio', 'header_pin'))
+
+HEADER_PIN_PREFIX = 'PIN'
+
+
+class PinMap:
+    ''' Table of GPIO_PIN tuples indexed by every accepted spelling of the GPIO '''
+    def __init__(self):
+        self._pins = {}
+        self.pins = ()
+        self.valid_values = frozenset()
+
+    def add(self, chip:int, line:int, gpio:int, header_pin:int|None=None, names=()) -> GPIO_PIN:
+        ''' Add a GPIO to the table with any additional names it can be referenced by '''
+        pin = GPIO_PIN(chip, line, gpio, header_pin)
+        self._pins[gpio] = pin
+        self._pins[str(gpio)] = pin
+        if header_pin is not None:
+            self._pins[f"{HEADER_PIN_PREFIX}{header_pin}"] = pin
+        for name in names:
+            self._pins[str(name).upper()] = pin
+        self.pins += (pin,)
+        self.valid_values = self.valid_values | {gpio}
+        return pin
+
+    def resolve(self, gpio) -> GPIO_PIN|None:
+        ''' Return the GPIO_PIN for the gpio or None if not valid '''
+        pin = self._pins.get(gpio) if isinstance(gpio, int) else None
+        if pin is None and not isinstance(gpio, int):
+            pin = self._pins.get(str(gpio).strip().upper())
+        return pin
+
+    def resolve_many(self, gpios) -> tuple:
+        ''' Return a tuple of GPIO_PIN for an iterable of gpios.  Invalid gpios are returned as None '''
+        pins = self._pins
+        return tuple(pins.get(gpio) if isinstance(gpio, int) else pins.get(str(gpio).strip().upper()) for gpio in gpios)
+
+    def __contains__(self, gpio) -> bool:
+        return self.resolve(gpio) is not None
+
+    def __len__(self) -> int:
+        return len(self.pins)
@@ -0,0 +1,101 @@
+'''
+Registry of the supported platforms.  The registry is built once from the SUPPORTED_PLATFORMS list in each
+platform file.  Identifier regexes are precompiled and indexed by the identifier file so each file is read
+exactly once per identification, and all candidate platforms are matched against the same buffer.
+Environment identifiers ({'type': 'env', 'name': <variable>, 'contents': <regex>}) select a platform
+explicitly (i.e. the simulated platform) and are checked before the file identifiers.
+'''
+import os
+import re
+from importlib import import_module
+
+PLATFORM_BASE_DIR = os.path.dirname(__file__)
+
+
+class PlatformRegistry:
+    ''' Index of platform identifiers.  Candidates are stored as (module name, platform index, identifier) in priority order '''
+    def __init__(self):
+        self._candidates = []
+        self._file_index = {}
+        self._forced = []
+        self._env = []
+        self._platform_lists = []
+        self.supported_platforms = []
+        self.errors = {}
+
+    def add(self, module_name:str|None, platforms:list) -> None:
+        ''' Add a list of platform dicts (SUPPORTED_PLATFORMS) to the registry '''
+        self._platform_lists.append(platforms)
+        for index, platform in enumerate(platforms):
+            self.supported_platforms.append(platform.get('description', platform.get('model')))
+            for identifier in platform.get('identifiers', []):
+                priority = len(self._candidates)
+                self._candidates.append((module_name, index, identifier))
+                if identifier.get('type', 'file') == 'file' and identifier.get('contents', None) is not None:
+                    self._file_index.setdefault(identifier['file'], []).append((priority, re.compile(identifier['contents'])))
+                elif identifier.get('type', 'file') == 'true':
+                    self._forced.append(priority)
+                elif identifier.get('type', 'file') == 'env':
+                    self._env.append((priority, identifier['name'], re.compile(identifier.get('contents', '.'))))
+
+    def identify(self) -> tuple|None:
+        ''' Return (module name, platform index, identifier) for the first matching platform or None '''
+        for priority, name, regex in self._env:
+            value = os.environ.get(name)
+            if value is not None and regex.search(value):
+                return self._candidates[priority]
+        matched = self._forced[0] if len(self._forced) > 0 else None
+        for filename, candidates in self._file_index.items():
+            if matched is not None and candidates[0][0] > matched:
+                # every candidate for this file has a lower priority than the current match
+                continue
+            file_contents = read_identifier_file(filename)
+            if file_contents is None:
+                continue
+            for priority, regex in candidates:
+                if matched is not None and priority > matched:
+                    break
+                if regex.search(file_contents):
+                    matched = priority
+                    break
+        return self._candidates[matched] if matched is not None else None
+
+    @classmethod
+    def from_platform_files(cls, base_dir=PLATFORM_BASE_DIR, logger=None) -> 'PlatformRegistry':
+        ''' Build a registry by importing every platform file.  Import errors are saved to the errors dict '''
+        registry = cls()
+        for platform_file in sorted(os.listdir(base_dir)):
+            if platform_file.endswith('.py') and not platform_file.startswith('_'):
+                module_name = platform_file.split('.py')[0]
+                try:
+                    if logger is not None:
+                        logger.debug(f"{__name__}: {platform_file}: Loading platform file...")
+                    module = import_module(f"sbc_gpio.platforms.{module_name}")
+                    registry.add(module_name, module.SUPPORTED_PLATFORMS)
+                except Exception as e:
+                    registry.errors[platform_file] = e
+        return registry
+
+
+_registries = {}
+
+
+def get_registry(platforms:list|None=None, logger=None) -> PlatformRegistry:
+    ''' Return the registry for a list of platforms (or all platform files if None).  Each registry is built once '''
+    key = id(platforms) if platforms is not None else None
+    if key not in _registries:
+        if platforms is None:
+            _registries[key] = PlatformRegistry.from_platform_files(logger=logger)
+        else:
+            _registries[key] = PlatformRegistry()
+            _registries[key].add(None, platforms)
+    return _registries[key]
+
+
+def read_identifier_file(filename:str) -> str|None:
+    ''' Read an identifier file and return the contents (null characters removed) or None if it is not readable '''
+    try:
+        with open(filename, 'r', encoding='utf-8') as input_file:
+            return input_file.read().replace('\x00', '')
+    except (OSError, UnicodeDecodeError):
+        return None
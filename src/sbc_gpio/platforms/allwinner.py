@@ -8,12 +8,8 @@ i.e.:
   PH7 = 7*32 + 7 = 231
 '''
 
-import re
 import string
-from ._base import SbcPlatform_Base
-
-# select the gpio library for the platform
-import sbc_gpio.gpio_libs.lib_gpiod as lib_gpiod
+from ._base import SbcPlatform_Base, GPIO_LIB_GPIOD
 
 # List of dict - platforms supported by this definition
 SUPPORTED_PLATFORMS = [
@@ -21,7 +17,7 @@ SUPPORTED_PLATFORMS = [
         'model': 'CB1',
         'description': 'Bigtree CB1',
         'gpio_valid_values': [71,78,76,74,231,232,230,198,70,79,224,225,77,75,73,200,199,201,234,72],
-        'gpio_lib': lib_gpiod,
+        'gpio_lib': GPIO_LIB_GPIOD,
         'identifiers': [
             {'type': 'file', 'file': '/sys/firmware/devicetree/base/model', 'contents': '^BQ-H616$'}
         ],
@@ -34,19 +30,6 @@ class SbcPlatformClass(SbcPlatform_Base):
     ''' SBC Platform representing an Allwinner based SBC '''
     _platforms = SUPPORTED_PLATFORMS
 
-    def gpio_convert(self, gpio) -> int | None:
-        ''' convert a gpio passed as a string to an integer '''
-        gpio_tuple = self.gpio_tuple(gpio=gpio)
-        gpio_int = gpio_tuple[1]
-        if gpio_int not in self.gpio_valid_values:
-            raise ValueError(f'Gpio {gpio_int} not in valid range {self.gpio_valid_values}')
-        return gpio_int
-    
-    def gpio_tuple(self, gpio) -> tuple:
-        ''' Take a string representing a GPIO and return it as a Tuple -> ([int chip], [int num])'''
-        match = re.search(self.gpio_re_format, gpio.upper())
-        if not match:
-            raise ValueError(self.gpio_format)
-        if '' in match.groups():
-            raise ValueError(self.gpio_format)
-        return 0, string.ascii_lowercase.find(match.group('group').lower()) * 32 + int(match.group('pinnum'))
+    def _gpio_spec(self, gpio:int) -> tuple:
+        ''' Return (chip, line, (names,)) for a gpio.  All lines are on chip 0, the name is P<group><num> '''
+        return 0, gpio, (f"P{string.ascii_uppercase[gpio // 32]}{gpio % 32}",)
@@ -5,19 +5,24 @@ This configuration should also apply to other Raspberry Pi family devices and ma
 the future to include other platforms.
 '''
 
-from ._base import SbcPlatform_Base
+import os
+from ._base import SbcPlatform_Base, GPIO_LIB_GPIOD
 
-# select the gpio library for the platform
-gpiod = None
-rpi_gpio = None
-try:
-    # try using The RPi.GPIO library
-    import sbc_gpio.gpio_libs.rpi_gpio as rpi_gpio #pylint: disable=W0611
-except ImportError:
-    # fallback to gpiod
-    import  sbc_gpio.gpio_libs.gpiod as gpiod #pylint: disable=W0611,C0411
+# select the gpio library for the platform - try using the RPi.GPIO library, fallback to gpiod
+GPIO_LIB = ('sbc_gpio.gpio_libs.rpi_gpio',) + GPIO_LIB_GPIOD
+# memory mapped registers (/dev/gpiomem) for the Pi 3/4, fallback to the libraries above if not available.  Opt-in
+# with SBC_GPIO_MMAP=1, the edge callbacks are then called with timestamp=/gpio= (lib_uapi) instead of time=
+GPIO_LIB_MMAP = ('sbc_gpio.gpio_libs.mmap_bcm',) + GPIO_LIB
+MMAP_ENV = 'SBC_GPIO_MMAP'
 
 GPIO_VALID_VALUES = [0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27]
+# 40 pin header -> {header pin: gpio}
+GPIO_HEADER = {3: 2, 5: 3, 7: 4, 8: 14, 10: 15, 11: 17, 12: 18, 13: 27, 15: 22, 16: 23, 18: 24, 19: 10, 21: 9, 22: 25,
+               23: 11, 24: 8, 26: 7, 27: 0, 28: 1, 29: 5, 31: 6, 32: 12, 33: 13, 35: 19, 36: 16, 37: 26, 38: 20, 40: 21}
+# hardware PWM with dtoverlay=pwm-2chan (GPIO18 and GPIO19) -> {name: (pwm controller device, channel, gpio)}
+PWM_CHANNELS_BCM2711 = {'PWM0': ('fe20c000.pwm', 0, 18), 'PWM1': ('fe20c000.pwm', 1, 19)}
+PWM_CHANNELS_BCM2837 = {'PWM0': ('3f20c000.pwm', 0, 18), 'PWM1': ('3f20c000.pwm', 1, 19)}
+PWM_CHANNELS_BCM2835 = {'PWM0': ('2020c000.pwm', 0, 18), 'PWM1': ('2020c000.pwm', 1, 19)}
 MODEL_FILE = '/sys/firmware/devicetree/base/model'
 SERIAL_FILE = '/sys/firmware/devicetree/base/serial-number'
 
@@ -27,7 +32,10 @@ SUPPORTED_PLATFORMS = [
         'model': 'Pi4B',
         'description': 'Raspberry Pi 4 Model B',
         'gpio_valid_values': GPIO_VALID_VALUES,
-        'gpio_lib': rpi_gpio if rpi_gpio is not None else gpiod,
+        'gpio_header': GPIO_HEADER,
+        'gpio_lib': GPIO_LIB,
+        'gpio_lib_mmap': GPIO_LIB_MMAP,
+        'pwm_channels': PWM_CHANNELS_BCM2711,
         'identifiers': [{'type': 'file', 'file': MODEL_FILE, 'contents': '^Raspberry Pi 4 Model B'}],
         '_serial_location': {'type': 'file', 'file': SERIAL_FILE, 'contents': '.*'}
     },
@@ -35,7 +43,10 @@ SUPPORTED_PLATFORMS = [
         'model': 'Pi4B',
         'description': 'Raspberry Pi 3 Model B',
         'gpio_valid_values': GPIO_VALID_VALUES,
-        'gpio_lib': rpi_gpio if rpi_gpio is not None else gpiod,
+        'gpio_header': GPIO_HEADER,
+        'gpio_lib': GPIO_LIB,
+        'gpio_lib_mmap': GPIO_LIB_MMAP,
+        'pwm_channels': PWM_CHANNELS_BCM2837,
         'identifiers': [{'type': 'file', 'file': MODEL_FILE, 'contents': '^Raspberry Pi 3 Model B'}],
         '_serial_location': {'type': 'file', 'file': SERIAL_FILE, 'contents': '.*'}
     },
@@ -43,7 +54,9 @@ SUPPORTED_PLATFORMS = [
         'model': 'Pi4B',
         'description': 'Raspberry Pi Zero W',
         'gpio_valid_values': GPIO_VALID_VALUES,
-        'gpio_lib': rpi_gpio if rpi_gpio is not None else gpiod,
+        'gpio_header': GPIO_HEADER,
+        'gpio_lib': GPIO_LIB,
+        'pwm_channels': PWM_CHANNELS_BCM2835,
         'identifiers': [{'type': 'file', 'file': MODEL_FILE, 'contents': '^Raspberry Pi Zero W$'}],
         '_serial_location': {'type': 'file', 'file': SERIAL_FILE, 'contents': '.*'}
     },
@@ -51,7 +64,9 @@ SUPPORTED_PLATFORMS = [
         'model': 'Pi4B',
         'description': 'Raspberry Pi Zero',
         'gpio_valid_values': GPIO_VALID_VALUES,
-        'gpio_lib': rpi_gpio if rpi_gpio is not None else gpiod,
+        'gpio_header': GPIO_HEADER,
+        'gpio_lib': GPIO_LIB,
+        'pwm_channels': PWM_CHANNELS_BCM2835,
         'identifiers': [{'type': 'file', 'file': MODEL_FILE, 'contents': '^Raspberry Pi Zero$'}],
         '_serial_location': {'type': 'file', 'file': SERIAL_FILE, 'contents': '.*'}
     }
@@ -61,3 +76,11 @@ SUPPORTED_PLATFORMS = [
 class SbcPlatformClass(SbcPlatform_Base):
     ''' SBC Platform representing an Allwinner based SBC '''
     _platforms = SUPPORTED_PLATFORMS
+    gpio_lib_mmap = None
+
+    def _get_gpio_lib(self):
+        ''' Use the memory mapped library if selected with SBC_GPIO_MMAP (checked on first use) and supported by the platform '''
+        mmap_lib, self.gpio_lib_mmap = self.gpio_lib_mmap, None
+        if mmap_lib is not None and os.environ.get(MMAP_ENV, '0') not in ('', '0'):
+            self.gpio_lib = mmap_lib
+        return super()._get_gpio_lib()
@@ -0,0 +1,31 @@
+'''
+Platform file for the simulated GPIO library (sbc_gpio.gpio_libs.sim).  Selected when the SBC_GPIO_SIM
+environment variable is set (i.e. SBC_GPIO_SIM=1), on any Linux system and before the hardware platforms,
+so the tests and benchmarks can run without GPIO hardware.  GPIO's are numbered 0-63 (or GPIO<n>), GPIO
+0-31 are lines 0-31 of simulated chip 0 and GPIO 32-63 are lines 0-31 of simulated chip 1.
+'''
+
+from ._base import SbcPlatform_Base
+
+LINES_PER_CHIP = 32
+
+# List of dict - platforms supported by this definition
+SUPPORTED_PLATFORMS = [
+    {
+        'model': 'sim',
+        'description': 'Simulated GPIO',
+        'gpio_valid_values': list(range(2 * LINES_PER_CHIP)),
+        'gpio_lib': 'sbc_gpio.gpio_libs.sim',
+        'identifiers': [{'type': 'env', 'name': 'SBC_GPIO_SIM', 'contents': '^(?!0$).+'}],
+        '_serial_location': None,
+        'gpio_format': 'GPIO number 0-63 or GPIO<n>.  GPIO 0-31 are on simulated chip 0, GPIO 32-63 on simulated chip 1'
+    }
+]
+
+class SbcPlatformClass(SbcPlatform_Base):
+    ''' SBC Platform representing the simulated GPIO chips '''
+    _platforms = SUPPORTED_PLATFORMS
+
+    def _gpio_spec(self, gpio:int) -> tuple:
+        ''' Return (chip, line, (names,)) for a gpio '''
+        return gpio // LINES_PER_CHIP, gpio % LINES_PER_CHIP, (f"GPIO{gpio}",)
@@ -0,0 +1,191 @@
+'''
+Software PWM for multiple gpios driven from one timing thread.
+
+The channels are the gpios of a GpioOutGroup.  Edges are scheduled on absolute monotonic deadlines in a
+heap and all edges due at the same time (within coalesce_us) are written with one set_values call, which
+is a single ioctl per chip.  Channels with the same frequency switch on together, so the number of writes
+grows with the number of distinct edge times, not with the number of channels.  Duty cycle and frequency
+changes take effect at the start of the next period of the channel.  An on time shorter than coalesce_us
+is written as low for the period.
+
+Usage:
+    pwm = SoftPWM(platform, ['GPIO17', 'GPIO27'], frequency_hz=200, duty_cycle=0.25)
+    pwm.start()
+    pwm.set_duty_cycle(1, 0.75)
+    print(pwm.stats())
+'''
+from heapq import heappush, heappop
+from threading import Thread, Event, Lock
+from time import monotonic_ns, thread_time_ns
+from logging_handler import create_logger, INFO
+from sbc_gpio import PULL
+from sbc_gpio.gpio_libs._timing import wait_until_ns, SPIN_NS
+
+
+class SoftPWM:
+    ''' Software PWM engine.  Pass a platform and a list of gpios (or an existing GpioOutGroup as group=), the channel
+        number is the index of the gpio in the list '''
+    def __init__(self, platform=None, gpio_ids=None, group=None, frequency_hz=100, duty_cycle=0.0, name=None, pull=PULL.NONE,
+                 coalesce_us=20, spin_us=SPIN_NS // 1000, log_level=INFO):
+        self._logger = create_logger(console_level=log_level, name=self.__class__.__name__)
+        self._thread = None
+        self._owns_group = group is None
+        self.group = None
+        if group is None:
+            if platform is None or not gpio_ids:
+                raise ValueError("SoftPWM: A platform and gpio_ids or a GpioOutGroup is required")
+            group = platform.get_gpio_out_group(gpio_ids, name=name, pull=pull, log_level=log_level)
+        self.group = group
+        self.name = name if name is not None else f"pwm:{group.name}"
+        self._coalesce_ns = int(coalesce_us * 1000)
+        self._spin_ns = int(spin_us * 1000)
+        self._lock = Lock()
+        self._stop_event = Event()
+        # per channel [period ns, on ns]
+        self._channels = [[0, 0] for _ in range(len(group))]
+        for channel in range(len(group)):
+            self._set_channel(channel, frequency_hz, duty_cycle)
+        self._reset_stats()
+
+    def __del__(self):
+        self.close()
+
+    def close(self):
+        ''' Stop the engine and set all channels low.  The group is released if it was opened by the engine '''
+        self.stop()
+        if self._owns_group and self.group is not None:
+            self.group.close()
+            self.group = None
+
+    @property
+    def info_str(self):
+        ''' Returns the info string for the class (used in logging commands) '''
+        return f"{self.__class__.__name__} ({self.name})"
+
+    def __len__(self):
+        return len(self._channels)
+
+    def _channel(self, channel:int) -> list:
+        ''' Return [period ns, on ns] for a channel '''
+        if not 0 <= channel < len(self._channels):
+            raise ValueError(f"{self.info_str}: Channel {channel} is not valid, {len(self._channels)} channels")
+        return self._channels[channel]
+
+    def _set_channel(self, channel:int, frequency_hz:float, duty_cycle:float):
+        self._channel(channel)
+        if frequency_hz <= 0:
+            raise ValueError(f"{self.info_str}: Frequency must be greater than 0, not {frequency_hz}")
+        if not 0.0 <= duty_cycle <= 1.0:
+            raise ValueError(f"{self.info_str}: Duty cycle must be between 0.0 and 1.0, not {duty_cycle}")
+        period_ns = int(1e9 / frequency_hz)
+        with self._lock:
+            self._channels[channel] = [period_ns, int(period_ns * duty_cycle)]
+
+    def set_duty_cycle(self, channel:int, duty_cycle:float):
+        ''' Change the duty cycle (0.0-1.0) of a channel '''
+        self._set_channel(channel, 1e9 / self._channel(channel)[0], duty_cycle)
+
+    def set_frequency(self, channel:int, frequency_hz:float):
+        ''' Change the frequency of a channel, the duty cycle is kept '''
+        period_ns, on_ns = self._channel(channel)
+        self._set_channel(channel, frequency_hz, on_ns / period_ns)
+
+    def duty_cycle(self, channel:int) -> float:
+        ''' Return the duty cycle of a channel '''
+        period_ns, on_ns = self._channel(channel)
+        return on_ns / period_ns
+
+    def frequency(self, channel:int) -> float:
+        ''' Return the frequency of a channel in Hz '''
+        return 1e9 / self._channel(channel)[0]
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        ''' Start the timing thread, all channels start a period at the same time '''
+        self.stop()
+        self._logger.info(f"{self.info_str}: Starting PWM thread for {len(self._channels)} channels...")
+        self._stop_event.clear()
+        self._reset_stats()
+        self._thread = Thread(target=self._run, name=f'soft-pwm', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        ''' Stop the timing thread and set all channels low '''
+        if self.running:
+            self._logger.info(f"{self.info_str}: Stopping PWM thread...")
+            self._stop_event.set()
+            self._thread.join() # type: ignore
+        self._thread = None
+        if self.group is not None:
+            self.group.set_value(0)
+
+    def _reset_stats(self):
+        self._writes = 0
+        self._edges = 0
+        self._skipped = 0
+        self._jitter_count = 0
+        self._jitter_sum = 0
+        self._jitter_max = 0
+        self._cpu_ns = 0
+
+    def stats(self) -> dict:
+        ''' Return the engine statistics.  Jitter is the time from the deadline to the write (ns), skipped are
+            periods dropped because the thread was more than a period late '''
+        return {'channels': len(self._channels), 'writes': self._writes, 'edges': self._edges, 'skipped': self._skipped,
+                'jitter_mean_ns': self._jitter_sum // self._jitter_count if self._jitter_count else 0,
+                'jitter_max_ns': self._jitter_max, 'cpu_ns': self._cpu_ns}
+
+    def _run(self):
+        ''' Timing thread.  The heap holds (deadline ns, channel) for the next edges of each channel '''
+        set_values, channels, lock = self.group.set_values, self._channels, self._lock # type: ignore
+        coalesce_ns, spin_ns, stop_event = self._coalesce_ns, self._spin_ns, self._stop_event
+        start_ns = monotonic_ns() + spin_ns
+        # a period start has the channel as a positive value, an off edge is ~channel
+        heap = [(start_ns, channel) for channel in range(len(channels))]
+        value = 0
+        while True:
+            deadline_ns = heap[0][0]
+            if not wait_until_ns(deadline_ns, spin_ns, stop_event):
+                break
+            now_ns = monotonic_ns()
+            bits, mask = 0, 0
+            with lock:
+                while len(heap) > 0 and heap[0][0] <= now_ns + coalesce_ns:
+                    edge_ns, channel = heappop(heap)
+                    if channel < 0:
+                        # an off edge in the same batch as its period start (on time < coalesce_us) drops the pulse
+                        channel = ~channel
+                        bits &= ~(1 << channel)
+                        mask |= 1 << channel
+                        continue
+                    period_ns, on_ns = channels[channel]
+                    if on_ns > 0:
+                        bits |= 1 << channel
+                        if on_ns < period_ns:
+                            heappush(heap, (edge_ns + on_ns, ~channel))
+                    mask |= 1 << channel
+                    next_ns = edge_ns + period_ns
+                    if next_ns < now_ns:
+                        # more than a period late, skip the missed periods instead of bursting to catch up
+                        skipped = (now_ns - next_ns) // period_ns + 1
+                        self._skipped += skipped
+                        next_ns += skipped * period_ns
+                    heappush(heap, (next_ns, channel))
+            # only write the lines that change
+            mask &= bits ^ value
+            if mask:
+                set_values(bits, mask)
+                value = (value & ~mask) | (bits & mask)
+                self._writes += 1
+                self._edges += bin(mask).count('1')
+            jitter_ns = now_ns - deadline_ns
+            self._jitter_count += 1
+            self._jitter_sum += jitter_ns
+            if jitter_ns > self._jitter_max:
+                self._jitter_max = jitter_ns
+            if self._jitter_count & 1023 == 0:
+                self._cpu_ns = thread_time_ns()
+        self._cpu_ns = thread_time_ns()
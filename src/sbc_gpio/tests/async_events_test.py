@@ -0,0 +1,55 @@
+import asyncio
+import os
+import unittest
+
+from sbc_gpio import EVENT, PULL
+from sbc_gpio.gpio_libs._generic_gpio import GpioIn
+
+
+class PipeGpioIn(GpioIn):
+    ''' GpioIn with a pipe as the event fd.  Each byte written is an edge (1 rising, 0 falling) '''
+    def __init__(self, debounce_ms=0):
+        self.read_fd, self.write_fd = os.pipe()
+        super().__init__(name='pipe', log_level='CRITICAL', event=EVENT.BOTH, callback=None, debounce_ms=debounce_ms, pull=PULL.DOWN)
+        self.start()
+
+    def _event_fd(self):
+        return self.read_fd
+
+    def _read_events(self):
+        return [(EVENT.RISING if value else EVENT.FALLING, 0, 0) for value in os.read(self.read_fd, 64)]
+
+    def close(self):
+        self.stop()
+        if self.read_fd is not None:
+            os.close(self.read_fd)
+            os.close(self.write_fd)
+            self.read_fd = None
+
+
+class asyncEventsTest(unittest.IsolatedAsyncioTestCase):
+    async def test_1_wait_for_edge(self):
+        gpio = PipeGpioIn()
+        asyncio.get_running_loop().call_later(0.01, os.write, gpio.write_fd, b'\x01')
+        edge_event = await gpio.wait_for_edge(EVENT.RISING, timeout=1)
+        self.assertEqual((edge_event.event, edge_event.state), (EVENT.RISING, True))
+        self.assertIsNone(await gpio.wait_for_edge(timeout=0.01))
+        gpio.close()
+
+    async def test_2_events_debounced(self):
+        gpio = PipeGpioIn(debounce_ms=20)
+        received = []
+
+        async def consume():
+            async for edge_event in gpio.events():
+                received.append(edge_event.event)
+                if len(received) == 2:
+                    break
+        consumer = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        os.write(gpio.write_fd, b'\x01\x00\x01')
+        await asyncio.sleep(0.05)
+        os.write(gpio.write_fd, b'\x00')
+        await asyncio.wait_for(consumer, 1)
+        self.assertEqual(received, [EVENT.RISING, EVENT.FALLING])
+        gpio.close()
@@ -0,0 +1,39 @@
+import unittest
+from threading import Event
+from time import sleep
+
+from sbc_gpio.gpio_libs._executor import CallbackExecutor, INLINE, ORDERED, DROP_NEWEST, DROP_OLDEST, COALESCE
+
+
+class callbackExecutorTest(unittest.TestCase):
+    def test_1_ordered_per_pin(self):
+        executor = CallbackExecutor(mode=ORDERED, max_workers=4, max_queue=1000, log_level='CRITICAL')
+        received = {'a': [], 'b': []}
+        for count in range(500):
+            for pin in ('a', 'b'):
+                executor.submit(pin, lambda pin, count: received[pin].append(count), {'pin': pin, 'count': count})
+        executor.shutdown()
+        self.assertEqual(received['a'], list(range(500)))
+        self.assertEqual(received['b'], list(range(500)))
+        self.assertEqual(executor.stats()['executed'], 1000)
+
+    def test_2_policies(self):
+        for policy, expected, dropped, coalesced in ((DROP_NEWEST, [0, 1], 3, 0), (DROP_OLDEST, [3, 4], 3, 0),
+                                                     (COALESCE, [0, 4], 0, 3)):
+            executor = CallbackExecutor(mode=ORDERED, max_workers=1, max_queue=2, policy=policy, log_level='CRITICAL')
+            blocked, received = Event(), []
+            executor.submit('pin', lambda: blocked.wait(1), {})
+            sleep(0.05)
+            for count in range(5):
+                executor.submit('pin', lambda value: received.append(value), {'value': count})
+            blocked.set()
+            executor.shutdown()
+            stats = executor.stats()
+            self.assertEqual((received, stats['dropped'], stats['coalesced']), (expected, dropped, coalesced), policy)
+
+    def test_3_inline(self):
+        executor = CallbackExecutor(mode=INLINE, log_level='CRITICAL')
+        received = []
+        executor.submit('pin', lambda value: received.append(value), {'value': 1})
+        self.assertEqual(received, [1])
+        self.assertEqual(executor.stats()['workers'], 0)
@@ -0,0 +1,48 @@
+import types
+import unittest
+from unittest import mock
+
+from sbc_gpio.device_tests import _registry
+
+
+class FakeEntryPoint:
+    def __init__(self, name, factory):
+        self.name, self.factory, self.loads = name, factory, 0
+
+    def load(self):
+        self.loads += 1
+        return self.factory
+
+
+class deviceTestRegistryTest(unittest.TestCase):
+    def test_1_load_test_class(self):
+        module = types.SimpleNamespace(DevTest_IR='ir test class')
+        with mock.patch.object(_registry, 'import_module', return_value=module) as import_module:
+            self.assertEqual(_registry.load_test_class('ir'), 'ir test class')
+        import_module.assert_called_once_with('sbc_gpio.device_tests.ir')
+        self.assertRaises(KeyError, _registry.load_test_class, 'not_a_test')
+
+    def test_2_entry_points(self):
+        sensor = FakeEntryPoint('my_sensor', lambda platform, config, log_level, logger: 'sensor test')
+        other = FakeEntryPoint('other', None)
+        with mock.patch('importlib.metadata.entry_points', return_value=[other, sensor]) as entry_points:
+            self.assertIs(_registry.load_entry_point('my_sensor'), sensor.factory)
+            self.assertIsNone(_registry.load_entry_point('missing'))
+        entry_points.assert_called_with(group=_registry.ENTRY_POINT_GROUP)
+        # only the matching entry point is loaded
+        self.assertEqual((sensor.loads, other.loads), (1, 0))
+
+    def test_3_create_tests(self):
+        logger = mock.Mock()
+        sensor = FakeEntryPoint('my_sensor', lambda platform, config, log_level, logger: f"sensor {config['my_sensor']}")
+        config = {'my_sensor': 5, 'ir': False, 'led': None, 'btn': '', 'spi_cs': 1, 'unknown': 1}
+        with mock.patch('importlib.metadata.entry_points', return_value=[sensor]):
+            tests = _registry.create_tests(platform=None, config=config, log_level='CRITICAL', logger=logger)
+        # ir disabled, led/btn not set, spi_cs is a parameter and the unknown key is logged
+        self.assertEqual(tests, ['sensor 5'])
+        self.assertEqual(logger.error.call_count, 1)
+        self.assertIn("'unknown'", logger.error.call_args[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from time import monotonic_ns, sleep
+
+from sbc_gpio import EVENT
+from sbc_gpio.encoder import RotaryEncoder
+from sbc_gpio.gpio_libs import _uapi, sim
+from sbc_gpio.tests.uapi_test import FakeIoctl
+
+RISING, FALLING = _uapi.GPIO_V2_LINE_EVENT_RISING_EDGE, _uapi.GPIO_V2_LINE_EVENT_FALLING_EDGE
+
+
+class FakePlatform:
+    def gpio_tuple(self, gpio):
+        return 0, int(gpio)
+
+
+class SimPlatform:
+    ''' Pins 0-31 on simulated chip 0, 32-63 on chip 1 '''
+    def gpio_tuple(self, gpio):
+        return int(gpio) // 32, int(gpio) % 32
+
+    def get_gpio_in(self, gpio_tuple, **kwargs):
+        return sim.GpioIn(gpio_tuple[1], gpio_tuple[0], **kwargs)
+
+
+class encoderTest(unittest.TestCase):
+    def setUp(self):
+        self.dev_dir = tempfile.TemporaryDirectory()
+        open(os.path.join(self.dev_dir.name, 'gpiochip0'), 'w').close()
+        self.saved = _uapi.ioctl, _uapi.GPIO_DEV_DIR
+        self.fake = FakeIoctl()
+        _uapi.ioctl, _uapi.GPIO_DEV_DIR = self.fake, self.dev_dir.name
+
+    def tearDown(self):
+        _uapi.ioctl, _uapi.GPIO_DEV_DIR = self.saved
+        for read_fd, write_fd in self.fake.pipes:
+            os.close(write_fd)
+        self.dev_dir.cleanup()
+
+    def test_1_decode(self):
+        encoder = RotaryEncoder(FakePlatform(), 5, 6, steps_per_count=4, log_level='CRITICAL')
+        # forward one full cycle (00 -> 10 -> 11 -> 01 -> 00), then back two transitions
+        for bit, level in ((1, 1), (0, 1), (1, 0), (0, 0), (0, 1), (1, 1)):
+            encoder._decode(bit, level, 1)
+        self.assertEqual((encoder._steps, encoder.position, encoder.transitions), (2, 0, 6))
+        # an edge to the level the line is already at is a missed edge
+        encoder._decode(1, 1, 1)
+        self.assertEqual(encoder.stats()['missed'], 1)
+        encoder.close()
+
+    def test_2_line_request(self):
+        encoder = RotaryEncoder(FakePlatform(), 5, 6, log_level='CRITICAL')
+        request = self.fake.requests[0]
+        self.assertEqual((request.num_lines, request.offsets[0], request.offsets[1]), (2, 5, 6))
+        # 8 forward transitions in one read, seqno 5 is lost in the kernel
+        events, state = [], 0
+        for seqno, (offset, event_id) in enumerate(((5, RISING), (6, RISING), (5, FALLING), (6, FALLING)) * 2, start=1):
+            events.append(_uapi.LINE_EVENT.pack(seqno * 1000, event_id, offset, seqno + (seqno >= 5), 0))
+        os.write(self.fake.pipes[0][1], b''.join(events))
+        for _ in range(100):
+            if encoder.transitions == 8:
+                break
+            sleep(0.01)
+        self.assertEqual((encoder.position, encoder.stats()['kernel_lost']), (8, 1))
+        encoder.close()
+
+    def test_3_gpio_fallback_velocity(self):
+        # lines on different chips -> a GpioIn per line, the edge timestamps are monotonic
+        sim.SIMULATOR.reset()
+        encoder = RotaryEncoder(SimPlatform(), 5, 37, velocity_window_ms=50, log_level='CRITICAL')
+        self.assertEqual((len(encoder._gpios), encoder._state), (2, 0b11))
+        # forward (11 -> 01 -> 00 -> 10 -> 11), one transition every 50ms ending now
+        now_ns = monotonic_ns()
+        for step, (bit, edge) in enumerate(((1, EVENT.FALLING), (0, EVENT.FALLING), (1, EVENT.RISING), (0, EVENT.RISING))):
+            encoder._on_gpio_edge(bit, edge, now_ns - (3 - step) * 50_000_000)
+        self.assertEqual(encoder.position, 4)
+        self.assertAlmostEqual(encoder.velocity, 20.0)
+        encoder.close()
+        self.assertEqual(sim.SIMULATOR.stats()['requested'], 0)
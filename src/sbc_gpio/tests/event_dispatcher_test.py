@@ -0,0 +1,36 @@
+import os
+import unittest
+from threading import Event
+from time import sleep
+
+from sbc_gpio.gpio_libs._dispatcher import EventDispatcher
+
+
+class eventDispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = EventDispatcher(name='test-dispatcher', log_level='CRITICAL')
+        self.read_fd, self.write_fd = os.pipe()
+
+    def tearDown(self):
+        self.dispatcher.unregister(self.read_fd)
+        os.close(self.read_fd)
+        os.close(self.write_fd)
+
+    def test_1_readable(self):
+        received = Event()
+        self.dispatcher.register(self.read_fd, lambda: (os.read(self.read_fd, 1), received.set()))
+        os.write(self.write_fd, b'x')
+        self.assertTrue(received.wait(1))
+        self.assertEqual(self.dispatcher.stats()['registered'], 1)
+
+    def test_2_timer_replaced(self):
+        fired = []
+        self.dispatcher.register(self.read_fd, lambda: None)
+        self.dispatcher.call_later('pin', 0.05, lambda: fired.append(1))
+        self.dispatcher.call_later('pin', 0.05, lambda: fired.append(2))
+        sleep(0.2)
+        self.assertEqual(fired, [2])
+        self.dispatcher.call_later('pin', 0.05, lambda: fired.append(3))
+        self.dispatcher.cancel('pin')
+        sleep(0.1)
+        self.assertEqual(fired, [2])
@@ -0,0 +1,28 @@
+import unittest
+from array import array
+
+from sbc_gpio import EVENT
+from sbc_gpio.gpio_libs._event_ring import EventRing, EDGE_RISING, EDGE_FALLING
+
+
+class eventRingTest(unittest.TestCase):
+    def test_1_drain(self):
+        ring = EventRing(8)
+        for seqno in range(1, 4):
+            ring.record(seqno * 100, EDGE_RISING if seqno % 2 else EDGE_FALLING, seqno)
+        self.assertEqual(ring.drain(2), [(100, EVENT.RISING, 1), (200, EVENT.FALLING, 2)])
+        self.assertEqual(ring.drain(), [(300, EVENT.RISING, 3)])
+        self.assertEqual(len(ring), 0)
+
+    def test_2_overflow(self):
+        ring = EventRing(4)
+        for seqno in (1, 2, 3, 6, 7, 8):
+            ring.record(seqno, EDGE_RISING, seqno)
+        stats = ring.stats()
+        self.assertEqual((stats['dropped'], stats['kernel_gaps'], stats['kernel_lost'], stats['max_depth']), (2, 1, 2, 4))
+        timestamps, edges, seqnos = array('Q', bytes(8 * 3)), array('B', bytes(3)), array('L', [0, 0, 0])
+        # the ring wraps, the first drain copies both halves
+        self.assertEqual(ring.drain_into(timestamps, edges, seqnos), 3)
+        self.assertEqual((list(timestamps), list(seqnos)), ([3, 6, 7], [3, 6, 7]))
+        self.assertEqual(ring.drain_into(timestamps, edges), 1)
+        self.assertEqual(timestamps[0], 8)
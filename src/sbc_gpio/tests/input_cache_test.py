@@ -0,0 +1,63 @@
+import os
+import time
+import unittest
+
+from sbc_gpio.tests.async_events_test import PipeGpioIn
+
+
+class CountingGpioIn(PipeGpioIn):
+    ''' PipeGpioIn with a hardware level that counts the reads '''
+    def __init__(self, level=0):
+        self.level, self.reads = level, 0
+        super().__init__()
+
+    def read_state(self):
+        self.reads += 1
+        return self.level
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+class inputCacheTest(unittest.TestCase):
+    def test_1_cached_from_edges(self):
+        gpio = CountingGpioIn(level=1)
+        self.assertEqual((gpio.state, gpio.state, gpio.reads), (1, 1, 1))
+        self.assertTrue(gpio.state_cached)
+        os.write(gpio.write_fd, b'\x00\x01\x00')
+        wait_for(lambda: gpio.state_version == 3)
+        self.assertEqual((gpio.state, gpio.state_version, gpio.reads), (0, 3, 1))
+        # forced hardware read
+        self.assertEqual((gpio.read_state(), gpio.reads), (1, 2))
+        gpio.close()
+
+    def test_2_not_cached_when_stopped(self):
+        gpio = CountingGpioIn(level=1)
+        gpio.stop()
+        self.assertEqual((gpio.state, gpio.state, gpio.reads), (1, 1, 2))
+        self.assertFalse(gpio.state_cached)
+        gpio.start()
+        gpio.level = 0
+        self.assertEqual((gpio.state, gpio.state, gpio.reads), (0, 0, 3))
+        gpio.close()
+
+    def test_3_edge_during_read(self):
+        gpio = CountingGpioIn(level=1)
+
+        def read_state():
+            # the falling edge is handled while the (older) hardware level is read
+            os.write(gpio.write_fd, b'\x00')
+            wait_for(lambda: gpio.state_version == 1)
+            return 1
+
+        gpio.read_state = read_state
+        self.assertEqual(gpio.state, 1)
+        self.assertEqual((gpio.state, gpio.state_version), (0, 1))
+        gpio.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import enum
+import importlib
+import os
+import sys
+import types
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from sbc_gpio import EVENT, PULL
+
+
+def fake_gpiod2(reject_bias=False) -> types.ModuleType:
+    ''' Build a fake gpiod 2.x binding.  If reject_bias is True requests with a bias raise OSError.  Line values are
+        kept in gpiod.values -> {(chip path, offset): Value} and the calls in gpiod.calls '''
+    line = types.ModuleType('gpiod.line')
+    line.Value = enum.Enum('Value', {'INACTIVE': 0, 'ACTIVE': 1})
+    line.Direction = enum.Enum('Direction', ('AS_IS', 'INPUT', 'OUTPUT'))
+    line.Bias = enum.Enum('Bias', ('AS_IS', 'UNKNOWN', 'DISABLED', 'PULL_UP', 'PULL_DOWN'))
+    line.Edge = enum.Enum('Edge', ('NONE', 'RISING', 'FALLING', 'BOTH'))
+    line.Clock = enum.Enum('Clock', ('MONOTONIC', 'REALTIME', 'HTE'))
+    gpiod = types.ModuleType('gpiod')
+    gpiod.line, gpiod.values, gpiod.calls, gpiod.requests = line, {}, [], []
+
+    class LineSettings:
+        def __init__(self, direction=line.Direction.AS_IS, edge_detection=line.Edge.NONE, bias=line.Bias.AS_IS,
+                     event_clock=line.Clock.MONOTONIC, debounce_period=timedelta(0), output_value=line.Value.INACTIVE):
+            self.direction, self.edge_detection, self.bias = direction, edge_detection, bias
+            self.event_clock, self.debounce_period, self.output_value = event_clock, debounce_period, output_value
+
+    class EdgeEvent:
+        Type = enum.Enum('Type', ('RISING_EDGE', 'FALLING_EDGE'))
+
+        def __init__(self, event_type, timestamp_ns, line_seqno):
+            self.event_type, self.timestamp_ns, self.line_seqno = event_type, timestamp_ns, line_seqno
+
+    class LineRequest:
+        def __init__(self, path, offsets):
+            self.path, self.offsets, self.events = path, offsets, []
+            self.fd, self.write_fd = os.pipe()
+
+        def get_value(self, offset):
+            return gpiod.values.get((self.path, offset), line.Value.INACTIVE)
+
+        def get_values(self, offsets):
+            gpiod.calls.append(('get_values', self.path, list(offsets)))
+            return [self.get_value(offset) for offset in offsets]
+
+        def set_value(self, offset, value):
+            gpiod.values[(self.path, offset)] = value
+
+        def set_values(self, values):
+            gpiod.calls.append(('set_values', self.path, sorted(offset for offset in values)))
+            for offset, value in values.items():
+                gpiod.values[(self.path, offset)] = value
+
+        def reconfigure_lines(self, config):
+            gpiod.calls.append(('reconfigure_lines', self.path, {offset: (settings.bias, settings.debounce_period)
+                                                                 for offset, settings in config.items()}))
+
+        def add_event(self, rising, timestamp_ns, line_seqno):
+            self.events.append(EdgeEvent(EdgeEvent.Type.RISING_EDGE if rising else EdgeEvent.Type.FALLING_EDGE, timestamp_ns, line_seqno))
+            os.write(self.write_fd, b'\x00')
+
+        def read_edge_events(self):
+            os.read(self.fd, 64)
+            events, self.events = self.events, []
+            return events
+
+        def release(self):
+            gpiod.calls.append(('release', self.path, list(self.offsets)))
+            os.close(self.fd)
+            os.close(self.write_fd)
+
+    def request_lines(path, consumer=None, config=None, output_values=None):
+        (offsets, settings), = config.items()
+        if reject_bias and settings.bias != line.Bias.AS_IS:
+            raise OSError(22, 'Invalid argument')
+        gpiod.calls.append(('request', path, list(offsets), settings.bias))
+        for offset in offsets if settings.direction == line.Direction.OUTPUT else ():
+            gpiod.values[(path, offset)] = (output_values or {}).get(offset, settings.output_value)
+        request = LineRequest(path, offsets)
+        gpiod.requests.append(request)
+        return request
+
+    gpiod.LineSettings, gpiod.EdgeEvent, gpiod.LineRequest, gpiod.request_lines = LineSettings, EdgeEvent, LineRequest, request_lines
+    return gpiod
+
+
+def load_lib_gpiod2(gpiod:types.ModuleType) -> types.ModuleType:
+    ''' Import a fresh copy of lib_gpiod2 using the fake gpiod 2.x binding '''
+    with mock.patch.dict(sys.modules, {'gpiod': gpiod, 'gpiod.line': gpiod.line}):
+        sys.modules.pop('sbc_gpio.gpio_libs.lib_gpiod2', None)
+        return importlib.import_module('sbc_gpio.gpio_libs.lib_gpiod2')
+
+
+class libGpiod2Test(unittest.TestCase):
+    def test_1_groups(self):
+        lib_gpiod2 = load_lib_gpiod2(fake_gpiod2())
+        gpiod, Value = lib_gpiod2.gpiod, lib_gpiod2.Value
+        chip0, chip1 = lib_gpiod2.chip_path(0), lib_gpiod2.chip_path(1)
+        # chip 0 lines are bits 0 and 2, chip 1 line is bit 1 -> one request per chip with the initial values
+        out_group = lib_gpiod2.GpioOutGroup([(0, 5), (1, 6), (0, 7)], log_level='CRITICAL', initial_value=0b101)
+        self.assertEqual([call[:3] for call in gpiod.calls], [('request', chip0, [5, 7]), ('request', chip1, [6])])
+        self.assertEqual([gpiod.values[key] for key in ((chip0, 5), (chip1, 6), (chip0, 7))], [Value.ACTIVE, Value.INACTIVE, Value.ACTIVE])
+        gpiod.calls.clear()
+        out_group.set_value(0b010)
+        self.assertEqual(gpiod.calls, [('set_values', chip0, [5, 7]), ('set_values', chip1, [6])])
+        # masked write, only the chips and lines in the mask are written
+        gpiod.calls.clear()
+        out_group.set_values(0b100, 0b100)
+        self.assertEqual(gpiod.calls, [('set_values', chip0, [7])])
+        self.assertEqual((out_group.state, out_group._read_value()), (0b110, 0b110))
+        in_group = lib_gpiod2.GpioInGroup([(1, 6), (0, 7), (0, 5)], log_level='CRITICAL')
+        self.assertEqual((in_group.get_values(), in_group.read()), ([1, 1, 0], 0b011))
+        out_group.close()
+        in_group.close()
+
+    def test_2_gpio_in(self):
+        lib_gpiod2 = load_lib_gpiod2(fake_gpiod2())
+        gpiod = lib_gpiod2.gpiod
+        gpio = lib_gpiod2.GpioIn(4, 0, debounce_ms=10, log_level='CRITICAL', start_polling=False)
+        self.assertTrue(gpio._kernel_debounce)
+        self.assertEqual(gpiod.calls[-1], ('reconfigure_lines', lib_gpiod2.chip_path(0), {4: (lib_gpiod2.Bias.PULL_DOWN, timedelta(milliseconds=10))}))
+        request = gpiod.requests[0]
+        request.add_event(True, 1_000, 1)
+        request.add_event(False, 2_000, 2)
+        self.assertEqual(gpio._read_events(), [(EVENT.RISING, 1_000, 1), (EVENT.FALLING, 2_000, 2)])
+        # the kernel debounce is switched off while measuring pulses
+        gpio.start_pulse_measure(window_ms=1000)
+        self.assertEqual(gpiod.calls[-1][2], {4: (lib_gpiod2.Bias.PULL_DOWN, timedelta(0))})
+        gpio.stop_pulse_measure()
+        self.assertEqual(gpiod.calls[-1][2], {4: (lib_gpiod2.Bias.PULL_DOWN, timedelta(milliseconds=10))})
+        gpio.close()
+
+    def test_3_bias_fallback(self):
+        lib_gpiod2 = load_lib_gpiod2(fake_gpiod2(reject_bias=True))
+        gpiod, Bias = lib_gpiod2.gpiod, lib_gpiod2.Bias
+        gpio = lib_gpiod2.GpioIn(4, 0, pull=PULL.UP, debounce_ms=10, log_level='CRITICAL', start_polling=False)
+        self.assertEqual(gpiod.calls[0], ('request', lib_gpiod2.chip_path(0), [4], Bias.AS_IS))
+        # the debounce is changed with the settings without the bias
+        self.assertTrue(gpio._kernel_debounce)
+        self.assertEqual(gpiod.calls[-1][2], {4: (Bias.AS_IS, timedelta(milliseconds=10))})
+        gpio.close()
+        # the caller's settings are not changed
+        settings = lib_gpiod2._line_settings(lib_gpiod2.Direction.OUTPUT, PULL.DOWN)
+        request, used_settings = lib_gpiod2._request_lines(gpio, 0, [5], 'test', settings)
+        self.assertEqual((settings.bias, used_settings.bias), (Bias.PULL_DOWN, Bias.AS_IS))
+        request.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
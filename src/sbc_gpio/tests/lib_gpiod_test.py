@@ -0,0 +1,181 @@
+import importlib
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from sbc_gpio import EVENT
+from sbc_gpio.gpio_libs import _uapi
+from sbc_gpio.tests.uapi_test import FakeIoctl
+
+
+def fake_gpiod(chips=(0, 1), fail_requests=0) -> types.ModuleType:
+    ''' Build a fake gpiod 1.x binding.  Chips not in chips can not be opened and the first fail_requests line requests
+        raise OSError.  Line values are kept in gpiod.values -> {(chip, offset): value} '''
+    gpiod = types.ModuleType('gpiod')
+    gpiod.values, gpiod.calls, gpiod.fail_requests = {}, [], fail_requests
+
+    def request(lines):
+        if gpiod.fail_requests > 0:
+            gpiod.fail_requests -= 1
+            raise OSError(22, 'Invalid argument')
+        gpiod.calls.append(('request', [line.key for line in lines]))
+
+    class line_request:
+        DIRECTION_INPUT, DIRECTION_OUTPUT, EVENT_BOTH_EDGES = 2, 3, 6
+        FLAG_BIAS_DISABLE, FLAG_BIAS_PULL_DOWN, FLAG_BIAS_PULL_UP = 8, 16, 32
+
+        def __init__(self):
+            self.consumer, self.request_type, self.flags = '', 0, 0
+
+    class line:
+        def __init__(self, chip_number, offset):
+            self.key = (chip_number, offset)
+
+        def request(self, config, default_val=0):
+            request([self])
+
+        def release(self):
+            gpiod.calls.append(('release', [self.key]))
+
+        def get_value(self):
+            return gpiod.values.get(self.key, 0)
+
+        def set_value(self, value):
+            gpiod.values[self.key] = value
+
+    class line_bulk:
+        def __init__(self, lines):
+            self.lines = lines
+
+        def request(self, config, default_vals=None):
+            request(self.lines)
+            for line, value in zip(self.lines, default_vals or []):
+                gpiod.values[line.key] = value
+
+        def release(self):
+            gpiod.calls.append(('release', [line.key for line in self.lines]))
+
+        def get_values(self):
+            gpiod.calls.append(('get_values', [line.key for line in self.lines]))
+            return [gpiod.values.get(line.key, 0) for line in self.lines]
+
+        def set_values(self, values):
+            gpiod.calls.append(('set_values', [line.key for line in self.lines]))
+            for line, value in zip(self.lines, values):
+                gpiod.values[line.key] = value
+
+    class chip:
+        OPEN_BY_NUMBER = 3
+
+        def __init__(self, device, how):
+            if int(device) not in chips:
+                raise OSError(2, 'No such file or directory')
+            self.number = int(device)
+
+        def get_line(self, offset):
+            return line(self.number, offset)
+
+        def get_lines(self, offsets):
+            return line_bulk([line(self.number, offset) for offset in offsets])
+
+        def reset(self):
+            pass
+
+    gpiod.line_request, gpiod.line, gpiod.line_bulk, gpiod.chip = line_request, line, line_bulk, chip
+    return gpiod
+
+
+def load_lib_gpiod(gpiod:types.ModuleType) -> types.ModuleType:
+    ''' Import a fresh copy of lib_gpiod using the fake gpiod binding '''
+    with mock.patch.dict(sys.modules, {'gpiod': gpiod}):
+        sys.modules.pop('sbc_gpio.gpio_libs.lib_gpiod', None)
+        return importlib.import_module('sbc_gpio.gpio_libs.lib_gpiod')
+
+
+class libGpiodTest(unittest.TestCase):
+    def setUp(self):
+        self.unraisable = []
+        self.saved_hook, sys.unraisablehook = sys.unraisablehook, self.unraisable.append
+
+    def tearDown(self):
+        sys.unraisablehook = self.saved_hook
+
+    def test_1_request_errors(self):
+        lib_gpiod = load_lib_gpiod(fake_gpiod())
+        # bad chip number, the object is deleted without errors
+        self.assertRaises(OSError, lib_gpiod.GpioOut, 4, 7, log_level='CRITICAL')
+        # request fails with and without the bias, the chip is returned to the pool
+        lib_gpiod.gpiod.fail_requests = 2
+        self.assertRaises(OSError, lib_gpiod.GpioOut, 4, 0, log_level='CRITICAL')
+        lib_gpiod.gpiod.fail_requests = 2
+        self.assertRaises(OSError, lib_gpiod.GpioIn, 5, 0, log_level='CRITICAL', kernel_debounce=False)
+        self.assertEqual(lib_gpiod.chip_pool_stats(), {'open_chips': 0, 'lines': {}})
+        self.assertEqual(self.unraisable, [])
+        # the second request (without the bias) works
+        lib_gpiod.gpiod.fail_requests = 1
+        gpio_out = lib_gpiod.GpioOut(4, 0, log_level='CRITICAL', initial_state=1)
+        self.assertEqual((gpio_out.state, lib_gpiod.chip_pool_stats()['lines']), (1, {0: 1}))
+        gpio_out.close()
+        self.assertEqual(lib_gpiod.chip_pool_stats()['open_chips'], 0)
+
+    def test_2_groups(self):
+        lib_gpiod = load_lib_gpiod(fake_gpiod())
+        gpiod = lib_gpiod.gpiod
+        # lines on two chips, not in chip order -> one bulk (one call) per chip
+        out_group = lib_gpiod.GpioOutGroup([(1, 3), (0, 5), (1, 2)], log_level='CRITICAL', initial_value=0b011)
+        self.assertEqual([gpiod.values[key] for key in ((1, 3), (0, 5), (1, 2))], [1, 1, 0])
+        self.assertEqual(lib_gpiod.chip_pool_stats()['lines'], {1: 2, 0: 1})
+        gpiod.calls.clear()
+        out_group.set_value(0b110)
+        self.assertEqual(gpiod.calls, [('set_values', [(1, 3), (1, 2)]), ('set_values', [(0, 5)])])
+        self.assertEqual((out_group.state, out_group._read_value()), (0b110, 0b110))
+        in_group = lib_gpiod.GpioInGroup([(0, 5), (1, 2), (1, 3)], log_level='CRITICAL')
+        gpiod.calls.clear()
+        self.assertEqual(in_group.get_values(), [1, 1, 0])
+        self.assertEqual(len(gpiod.calls), 2)
+        self.assertEqual(in_group.read(), 0b011)
+        buffer = bytearray(4)
+        self.assertIs(in_group.snapshot(buffer), buffer)
+        self.assertEqual(buffer, bytearray([1, 1, 0, 0]))
+        buffer = bytearray(5)
+        self.assertEqual(bytes(in_group.snapshot(memoryview(buffer)[1:])), bytes([1, 1, 0, 0]))
+        self.assertEqual(buffer, bytearray([0, 1, 1, 0, 0]))
+        # single chip, one get_values call in group order
+        single_group = lib_gpiod.GpioInGroup([(1, 3), (1, 2)], log_level='CRITICAL')
+        gpiod.calls.clear()
+        self.assertEqual(single_group.snapshot(), bytearray([0, 1]))
+        self.assertEqual(gpiod.calls, [('get_values', [(1, 3), (1, 2)])])
+        for group in (out_group, in_group, single_group):
+            group.close()
+        self.assertEqual(lib_gpiod.chip_pool_stats(), {'open_chips': 0, 'lines': {}})
+
+    def test_3_group_request_error(self):
+        lib_gpiod = load_lib_gpiod(fake_gpiod())
+        # the second chip can not be opened, the lines on the first chip are released
+        self.assertRaises(OSError, lib_gpiod.GpioInGroup, [(0, 1), (2, 1)], log_level='CRITICAL')
+        self.assertEqual(lib_gpiod.gpiod.calls, [('request', [(0, 1)]), ('release', [(0, 1)])])
+        self.assertEqual(lib_gpiod.chip_pool_stats(), {'open_chips': 0, 'lines': {}})
+        self.assertEqual(self.unraisable, [])
+
+    def test_4_kernel_debounce(self):
+        lib_gpiod = load_lib_gpiod(fake_gpiod())
+        fake = FakeIoctl()
+        with tempfile.TemporaryDirectory() as dev_dir, mock.patch.object(_uapi, 'ioctl', fake), mock.patch.object(_uapi, 'GPIO_DEV_DIR', dev_dir):
+            open(os.path.join(dev_dir, 'gpiochip0'), 'w').close()
+            gpio_in = lib_gpiod.GpioIn(17, 0, log_level='CRITICAL', debounce_ms=10, start_polling=False)
+            self.assertTrue(gpio_in._kernel_debounce)
+            config = fake.requests[0].config
+            # default (monotonic) event clock, the realtime clock is not supported by Linux 5.10
+            self.assertFalse(config.flags & _uapi.GPIO_V2_LINE_FLAG_EVENT_CLOCK_REALTIME)
+            self.assertEqual(config.attrs[0].attr.value.debounce_period_us, 10000)
+            os.write(fake.pipes[0][1], _uapi.LINE_EVENT.pack(123, _uapi.GPIO_V2_LINE_EVENT_RISING_EDGE, 17, 1, 1))
+            self.assertEqual(gpio_in._read_events(), [(EVENT.RISING, 123, 1)])
+            gpio_in.close()
+            os.close(fake.pipes[0][1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+import unittest
+from importlib import import_module
+
+from sbc_gpio import PULL
+
+
+class mmapBcmTest(unittest.TestCase):
+    ''' The register block is mapped from a regular file standing in for /dev/gpiomem '''
+    @classmethod
+    def setUpClass(cls):
+        cls.gpiomem = tempfile.NamedTemporaryFile()
+        cls.gpiomem.write(bytes(4096))
+        cls.gpiomem.flush()
+        os.environ['SBC_GPIO_GPIOMEM'] = cls.gpiomem.name
+        sys.modules.pop('sbc_gpio.gpio_libs.mmap_bcm', None)
+        cls.mmap_bcm = import_module('sbc_gpio.gpio_libs.mmap_bcm')
+        cls.registers = cls.mmap_bcm._registers
+
+    @classmethod
+    def tearDownClass(cls):
+        del os.environ['SBC_GPIO_GPIOMEM']
+        sys.modules.pop('sbc_gpio.gpio_libs.mmap_bcm', None)
+        cls.gpiomem.close()
+
+    def register(self, offset):
+        return self.registers[offset >> 2]
+
+    def test_1_gpio_out(self):
+        gpio = self.mmap_bcm.GpioOut(17, 0, log_level='CRITICAL', initial_state=1)
+        self.assertEqual(self.mmap_bcm.get_function(17), self.mmap_bcm.FSEL_OUTPUT)
+        self.assertEqual(self.register(self.mmap_bcm.GPSET0), 1 << 17)
+        gpio.set_low()
+        self.assertEqual(self.register(self.mmap_bcm.GPCLR0), 1 << 17)
+        self.registers[self.mmap_bcm.GPLEV0 >> 2] = 1 << 17
+        self.assertEqual(gpio.state, 1)
+        gpio.close()
+        self.assertEqual(self.mmap_bcm.get_function(17), self.mmap_bcm.FSEL_INPUT)
+        self.assertRaises(ValueError, self.mmap_bcm.GpioOut, 60, 0, log_level='CRITICAL')
+
+    def test_2_groups(self):
+        group = self.mmap_bcm.GpioOutGroup([(0, 4), (0, 5), (0, 6)], log_level='CRITICAL')
+        group.set_value(0b101)
+        self.assertEqual((self.register(self.mmap_bcm.GPSET0), self.register(self.mmap_bcm.GPCLR0)), (0b101 << 4, 0b010 << 4))
+        # gpios in both banks, only the masked gpio is written
+        group = self.mmap_bcm.GpioOutGroup([(0, 3), (0, 40)], pull=PULL.UP, log_level='CRITICAL')
+        group.set_values(0b10, 0b10)
+        self.assertEqual(self.registers[(self.mmap_bcm.GPSET0 >> 2) + 1], 1 << 8)
+        self.assertEqual(group.state, 0b10)
+        self.registers[self.mmap_bcm.GPLEV0 >> 2], self.registers[(self.mmap_bcm.GPLEV0 >> 2) + 1] = 1 << 3, 1 << 8
+        group_in = self.mmap_bcm.GpioInGroup([(0, 40), (0, 2), (0, 3)], log_level='CRITICAL')
+        self.assertEqual((group_in.read(), group_in.get_values()), (0b101, [1, 0, 1]))
@@ -0,0 +1,99 @@
+import unittest
+from time import sleep
+
+from sbc_gpio.gpio_libs import sim
+from sbc_gpio.gpio_libs._generic_gpio import GpioOut, GpioOutGroup
+from sbc_gpio.gpio_libs._shadow import ShadowGpioOut
+from sbc_gpio.tests.soft_pwm_test import RecordingGroup
+
+
+class FakeOut(GpioOut):
+    ''' Output with a fake hardware level and a write counter '''
+    def __init__(self):
+        super().__init__(name='fake', log_level='CRITICAL', pull=None)
+        self.level, self.writes = 0, 0
+
+    @property
+    def state(self):
+        return self.level
+
+    def set_high(self):
+        self.level, self.writes = 1, self.writes + 1
+
+    def set_low(self):
+        self.level, self.writes = 0, self.writes + 1
+
+
+class ReadbackGroup(RecordingGroup):
+    def _read_value(self):
+        return self._value
+
+
+class WholeGroup(GpioOutGroup):
+    ''' Output group without a masked set_values (like lib_gpiod 1.x and RPi.GPIO), counts the writes '''
+    def __init__(self, count):
+        super().__init__(name='whole', log_level='CRITICAL', pull=None)
+        self.gpio_tuples = tuple((0, line) for line in range(count))
+        self.writes = []
+
+    def set_value(self, value:int):
+        self.writes.append(value)
+        self._value = value
+
+
+class outputShadowTest(unittest.TestCase):
+    def test_1_gpio_out(self):
+        gpio = FakeOut()
+        shadow = gpio.enable_shadow(verify_interval=None)
+        self.assertIsInstance(gpio, ShadowGpioOut)
+        for _ in range(5):
+            gpio.set_high()
+            gpio.set_on()
+        gpio.set_low()
+        self.assertEqual((gpio.writes, shadow.hits, shadow.misses, gpio.state), (2, 9, 2, 0))
+        gpio.disable_shadow()
+        gpio.set_low()
+        self.assertEqual((type(gpio), gpio.writes), (FakeOut, 3))
+
+    def test_2_external_change(self):
+        gpio = FakeOut()
+        shadow = gpio.enable_shadow(verify_interval=0.01)
+        gpio.set_high()
+        # changed outside of the shadow, the next write after the verify interval goes to the hardware
+        gpio.level = 0
+        gpio.set_high()
+        self.assertEqual(gpio.level, 0)
+        sleep(0.02)
+        gpio.set_high()
+        self.assertEqual((gpio.level, shadow.external_changes, shadow.stats()['verifies']), (1, 1, 1))
+
+    def test_3_group(self):
+        group = ReadbackGroup(4)
+        shadow = group.enable_shadow(verify_interval=None)
+        group.set_value(0b0011)
+        group.set_values(0b0001, 0b0001)
+        group.set_high()
+        group.set_value(0b1111)
+        self.assertEqual((group.state, shadow.hits, shadow.misses), (0b1111, 2, 2))
+
+    def test_4_masked_write(self):
+        sim.SIMULATOR.reset()
+        group = sim.GpioOutGroup([(0, 4), (0, 5)], log_level='CRITICAL')
+        shadow = group.enable_shadow(verify_interval=None)
+        # line outside the mask changed externally (shadow is stale), the masked write only changes the first line
+        sim.SIMULATOR.write(sim.SIMULATOR.line((0, 5)), 1)
+        group.set_values(0b01, 0b01)
+        self.assertEqual([sim.SIMULATOR.line((0, pin)).level for pin in (4, 5)], [1, 1])
+        self.assertEqual((shadow.value, shadow.misses), (0b01, 1))
+        self.assertEqual((group.verify_shadow(), shadow.external_changes), (0b11, 1))
+        group.close()
+
+    def test_5_group_without_set_values(self):
+        # the masked write goes to the library set_value once and counts one miss
+        group = WholeGroup(3)
+        shadow = group.enable_shadow(verify_interval=None)
+        group.set_values(0b110, 0b010)
+        group.set_values(0b010, 0b010)
+        group.set_values(0b100, 0b100)
+        self.assertEqual(group.writes, [0b010, 0b110])
+        self.assertEqual((group.state, shadow.hits, shadow.misses), (0b110, 1, 2))
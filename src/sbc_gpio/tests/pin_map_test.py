@@ -0,0 +1,39 @@
+import unittest
+from importlib import import_module
+
+from sbc_gpio.platforms._pinmap import GPIO_PIN
+
+
+def get_platform(module:str, platform_index:int):
+    return import_module(f'sbc_gpio.platforms.{module}').SbcPlatformClass(platform_index=platform_index, serial='test')
+
+
+class pinMapTest(unittest.TestCase):
+    def test_1_rockchip(self):
+        platform = get_platform('rockchip', 1)
+        self.assertEqual(platform.gpio_resolve('3A7'), GPIO_PIN(3, 7, 103, None))
+        self.assertEqual(platform.gpio_resolve('3a7'), platform.gpio_resolve(103))
+        self.assertEqual(platform.gpio_resolve('103'), platform.gpio_resolve(103))
+        self.assertEqual(platform.gpio_tuple('3B6'), (3, 14))
+        self.assertEqual(platform.gpio_convert('3B6'), 110)
+        self.assertFalse(platform.gpio_valid('0A0'))
+        self.assertRaises(ValueError, platform.gpio_convert, '0A0')
+
+    def test_2_allwinner(self):
+        platform = get_platform('allwinner', 0)
+        self.assertEqual(platform.gpio_tuple('PC7'), (0, 71))
+        self.assertEqual(platform.gpio_convert('ph7'), 231)
+
+    def test_3_rpi_header(self):
+        platform = get_platform('rpi', 0)
+        self.assertEqual(platform.gpio_resolve('PIN11'), GPIO_PIN(0, 17, 17, 11))
+        self.assertEqual(platform.gpio_tuple(17), (0, 17))
+        self.assertFalse(platform.gpio_valid(28))
+
+    def test_4_resolve_many(self):
+        platform = get_platform('rockchip', 1)
+        pins = platform.resolve_many(['3A7', 110, '4B3'])
+        self.assertEqual([pin.gpio for pin in pins], [103, 110, 139])
+        with self.assertRaises(ValueError) as error:
+            platform.resolve_many(['3A7', '9Z9', 1])
+        self.assertIn("'9Z9', 1", str(error.exception))
@@ -0,0 +1,31 @@
+import logging
+import unittest
+
+from sbc_gpio import EVENT, PULL
+from sbc_gpio.gpio_libs._generic_gpio import GpioIn, GpioOut
+
+
+class pinObjectsTest(unittest.TestCase):
+    def test_1_slots(self):
+        gpio = GpioOut(name='out', log_level='CRITICAL', pull=PULL.NONE)
+        self.assertFalse(hasattr(gpio, '__dict__'))
+        self.assertRaises(AttributeError, setattr, gpio, 'not_an_attribute', 1)
+        gpio.enable_shadow()
+        gpio.disable_shadow()
+        self.assertIs(type(gpio), GpioOut)
+
+    def test_2_shared_logger(self):
+        gpios = [GpioIn(name=f'in{pin}', log_level='CRITICAL', event=EVENT.BOTH, callback=None, debounce_ms=0, pull=PULL.DOWN)
+                 for pin in range(3)]
+        logger = gpios[0]._logger
+        self.assertTrue(all(gpio._logger is logger for gpio in gpios))
+        # pytest attaches its capture handlers to the existing non-propagating loggers
+        self.assertEqual(len([handler for handler in logger.handlers if type(handler) is logging.StreamHandler]), 1)
+        self.assertFalse(logger.isEnabledFor(logging.DEBUG))
+        gpio = GpioIn(name='debug', log_level='DEBUG', event=EVENT.BOTH, callback=None, debounce_ms=0, pull=PULL.DOWN)
+        self.assertTrue(gpio._logger.isEnabledFor(logging.DEBUG))
+        self.assertEqual(str(gpio), 'GpioIn (debug)')
+
+
+if __name__ == '__main__':
+    unittest.main()
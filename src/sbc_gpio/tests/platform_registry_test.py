@@ -0,0 +1,49 @@
+import unittest
+from unittest import mock
+
+from sbc_gpio.platforms import _base, _registry, rpi
+from sbc_gpio.platforms._registry import PlatformRegistry
+
+MODEL_FILE = '/sys/firmware/devicetree/base/model'
+
+PLATFORMS = [
+    {'model': 'BoardA', 'identifiers': [{'type': 'file', 'file': MODEL_FILE, 'contents': '^Board A$'}]},
+    {'model': 'BoardB', 'identifiers': [{'type': 'file', 'file': '/proc/cpuinfo', 'contents': 'cpu-b'}]},
+    {'model': 'BoardC', 'identifiers': [{'type': 'file', 'file': MODEL_FILE, 'contents': '^Board'}]},
+]
+
+
+class platformRegistryTest(unittest.TestCase):
+    def identify(self, files:dict):
+        registry = PlatformRegistry()
+        registry.add('test', PLATFORMS)
+        with mock.patch.object(_registry, 'read_identifier_file', side_effect=files.get) as read_file:
+            match = registry.identify()
+        return match, [call.args[0] for call in read_file.call_args_list]
+
+    def test_1_each_file_read_once(self):
+        match, reads = self.identify({MODEL_FILE: 'Board C', '/proc/cpuinfo': 'cpu-a'})
+        self.assertEqual(match[:2], ('test', 2))
+        self.assertEqual(sorted(reads), sorted([MODEL_FILE, '/proc/cpuinfo']))
+
+    def test_2_priority_order(self):
+        match, _ = self.identify({MODEL_FILE: 'Board C', '/proc/cpuinfo': 'cpu-b'})
+        self.assertEqual(match[:2], ('test', 1))
+        match, reads = self.identify({MODEL_FILE: 'Board A', '/proc/cpuinfo': 'cpu-b'})
+        self.assertEqual(match[:2], ('test', 0))
+        self.assertEqual(reads, [MODEL_FILE])
+
+    def test_3_no_match(self):
+        match, _ = self.identify({})
+        self.assertIsNone(match)
+
+    def test_4_rpi_mmap_opt_in(self):
+        # the Pi 4 uses RPi.GPIO first unless the memory mapped library is selected with SBC_GPIO_MMAP
+        for env, gpio_lib in (({}, rpi.GPIO_LIB), ({rpi.MMAP_ENV: '0'}, rpi.GPIO_LIB), ({rpi.MMAP_ENV: '1'}, rpi.GPIO_LIB_MMAP)):
+            platform = rpi.SbcPlatformClass(log_level='CRITICAL', platform_index=0, serial='test')
+            with mock.patch.dict('os.environ', env), mock.patch.object(_base, 'load_gpio_lib', side_effect=lambda lib, logger: lib):
+                self.assertEqual(platform._get_gpio_lib(), gpio_lib)
+        # the Pi Zero has no memory mapped library
+        platform = rpi.SbcPlatformClass(log_level='CRITICAL', platform_index=3, serial='test')
+        with mock.patch.dict('os.environ', {rpi.MMAP_ENV: '1'}), mock.patch.object(_base, 'load_gpio_lib', side_effect=lambda lib, logger: lib):
+            self.assertEqual(platform._get_gpio_lib(), rpi.GPIO_LIB)
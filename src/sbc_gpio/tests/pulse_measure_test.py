@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from time import sleep
+from unittest import mock
+
+from sbc_gpio import EVENT
+from sbc_gpio.gpio_libs import _uapi, lib_uapi
+from sbc_gpio.gpio_libs._measure import PulseMeter
+from sbc_gpio.gpio_libs._executor import CallbackExecutor, INLINE
+from sbc_gpio.tests.async_events_test import PipeGpioIn
+from sbc_gpio.tests.uapi_test import FakeIoctl
+
+
+class pulseMeasureTest(unittest.TestCase):
+    def test_1_pulse_meter(self):
+        meter = PulseMeter('test', window_ms=100)
+        # 1kHz, 25% duty cycle: rising every 1ms, falling 250us later
+        for pulse in range(10):
+            meter.edge(EVENT.RISING, pulse * 1_000_000)
+            meter.edge(EVENT.FALLING, pulse * 1_000_000 + 250_000)
+        stats = meter.publish(meter._window_start_ns + 10_000_000)
+        self.assertEqual((stats.pulses, stats.edges, stats.period_ns, stats.high_ns), (10, 20, 1_000_000, 250_000))
+        self.assertAlmostEqual(stats.frequency_hz, 1000.0)
+        self.assertAlmostEqual(stats.duty_cycle, 0.25)
+        # an empty window resets the aggregates but keeps the total
+        stats = meter.publish()
+        self.assertEqual((stats.pulses, stats.total_pulses, stats.period_ns, stats.duty_cycle), (0, 10, None, None))
+
+    def test_2_gpio_windows(self):
+        gpio = PipeGpioIn(debounce_ms=50)
+        gpio.executor = CallbackExecutor(mode=INLINE, log_level='CRITICAL')
+        published, edges = [], []
+        gpio.callback = lambda **kwargs: edges.append(kwargs)
+        gpio.start_pulse_measure(window_ms=20, callback=lambda stats: published.append(stats))
+        os.write(gpio.write_fd, b'\x01\x00\x01\x00')
+        for _ in range(100):
+            if sum(stats.pulses for stats in published) >= 2:
+                break
+            sleep(0.01)
+        gpio.stop_pulse_measure()
+        self.assertEqual(edges, [])
+        self.assertIsNone(gpio.pulse_meter)
+        self.assertEqual(sum(stats.pulses for stats in published), 2)
+        gpio.close()
+
+    def test_3_kernel_debounce(self):
+        # the kernel debounce is switched off while measuring and restored after
+        fake = FakeIoctl()
+        with tempfile.TemporaryDirectory() as dev_dir, mock.patch.object(_uapi, 'ioctl', fake), mock.patch.object(_uapi, 'GPIO_DEV_DIR', dev_dir):
+            open(os.path.join(dev_dir, 'gpiochip0'), 'w').close()
+            gpio = lib_uapi.GpioIn(4, 0, debounce_ms=100, log_level='CRITICAL')
+            gpio.executor = CallbackExecutor(mode=INLINE, log_level='CRITICAL')
+            published = []
+            gpio.start_pulse_measure(window_ms=20, callback=lambda stats: published.append(stats))
+            self.assertEqual(fake.configs, [(fake.requests[0].config.flags, 0)])
+            # 1kHz edges, much shorter than the 100ms debounce period
+            os.write(fake.pipes[0][1], b''.join(_uapi.LINE_EVENT.pack(edge * 500_000, _uapi.GPIO_V2_LINE_EVENT_RISING_EDGE if edge % 2 == 0
+                                                                      else _uapi.GPIO_V2_LINE_EVENT_FALLING_EDGE, 4, edge + 1, edge + 1)
+                                                for edge in range(4)))
+            for _ in range(100):
+                if sum(stats.pulses for stats in published) >= 2:
+                    break
+                sleep(0.01)
+            gpio.stop_pulse_measure()
+            self.assertEqual(sum(stats.pulses for stats in published), 2)
+            self.assertEqual(fake.configs[-1], (fake.requests[0].config.flags, 100_000))
+            self.assertTrue(gpio._kernel_debounce)
+            gpio.close()
+            os.close(fake.pipes[0][1])
+        # kernel debounce that can not be changed
+        gpio = PipeGpioIn(debounce_ms=50)
+        gpio.stop()
+        gpio._kernel_debounce = True
+        self.assertRaises(ValueError, gpio.start_pulse_measure)
+        self.assertIsNone(gpio.pulse_meter)
+        # the pin is not left registered for events and the kernel debounce is kept
+        self.assertFalse(gpio.event_thread_running)
+        with mock.patch.object(gpio, '_set_kernel_debounce', side_effect=OSError(22, 'Invalid argument')):
+            self.assertRaises(ValueError, gpio.start_pulse_measure)
+        self.assertEqual((gpio.pulse_meter, gpio.event_thread_running, gpio._kernel_debounce), (None, False, True))
+        gpio.close()
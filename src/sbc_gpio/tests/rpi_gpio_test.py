@@ -0,0 +1,69 @@
+import importlib
+import sys
+import types
+import unittest
+from unittest import mock
+
+from sbc_gpio import PULL
+
+
+def fake_rpi_gpio() -> types.ModuleType:
+    ''' Build a fake RPi.GPIO module.  Like the C module, setup() only accepts ints for initial and pull_up_down.
+        Levels are kept in GPIO.levels -> {channel: value} and the setup calls in GPIO.setups '''
+    GPIO = types.ModuleType('RPi.GPIO')
+    GPIO.BCM, GPIO.OUT, GPIO.IN, GPIO.BOTH = 11, 0, 1, 33
+    GPIO.PUD_OFF, GPIO.PUD_DOWN, GPIO.PUD_UP = 20, 21, 22
+    GPIO.levels, GPIO.setups = {}, []
+
+    def channels(channel):
+        return list(channel) if isinstance(channel, (list, tuple)) else [channel]
+
+    def setup(channel, direction, pull_up_down=GPIO.PUD_OFF, initial=-1):
+        if not isinstance(initial, int) or not isinstance(pull_up_down, int):
+            raise TypeError("an integer is required")
+        for line in channels(channel):
+            GPIO.setups.append((line, direction, pull_up_down, initial))
+            if direction == GPIO.OUT and initial != -1:
+                GPIO.levels[line] = initial
+
+    def output(channel, value):
+        for line, line_value in zip(channels(channel), value if isinstance(value, (list, tuple)) else [value] * len(channels(channel))):
+            GPIO.levels[line] = line_value
+
+    GPIO.setmode = GPIO.setwarnings = lambda *args: None
+    GPIO.setup, GPIO.output, GPIO.input = setup, output, lambda channel: GPIO.levels.get(channel, 0)
+    return GPIO
+
+
+def load_rpi_gpio(GPIO:types.ModuleType) -> types.ModuleType:
+    ''' Import a fresh copy of the rpi_gpio library using the fake RPi.GPIO module '''
+    rpi = types.ModuleType('RPi')
+    rpi.GPIO = GPIO
+    with mock.patch.dict(sys.modules, {'RPi': rpi, 'RPi.GPIO': GPIO}):
+        sys.modules.pop('sbc_gpio.gpio_libs.rpi_gpio', None)
+        return importlib.import_module('sbc_gpio.gpio_libs.rpi_gpio')
+
+
+class rpiGpioTest(unittest.TestCase):
+    def test_1_groups(self):
+        rpi_gpio = load_rpi_gpio(fake_rpi_gpio())
+        GPIO = rpi_gpio.GPIO
+        out_group = rpi_gpio.GpioOutGroup([(0, 17), (0, 27), (0, 22)], log_level='CRITICAL', initial_value=0b101)
+        self.assertEqual([GPIO.levels[channel] for channel in (17, 27, 22)], [1, 0, 1])
+        out_group.set_value(0b010)
+        self.assertEqual((out_group._read_value(), out_group.state), (0b010, 0b010))
+        GPIO.setups.clear()
+        in_group = rpi_gpio.GpioInGroup([(0, 17), (0, 27)], pull=PULL.NONE, log_level='CRITICAL')
+        self.assertEqual(GPIO.setups, [(17, GPIO.IN, GPIO.PUD_OFF, -1), (27, GPIO.IN, GPIO.PUD_OFF, -1)])
+        self.assertEqual(in_group.read(), 0b10)
+
+    def test_2_gpio_in_pull(self):
+        rpi_gpio = load_rpi_gpio(fake_rpi_gpio())
+        GPIO = rpi_gpio.GPIO
+        for pull, pud in ((PULL.UP, GPIO.PUD_UP), (PULL.DOWN, GPIO.PUD_DOWN), (PULL.NONE, GPIO.PUD_OFF)):
+            rpi_gpio.GpioIn(4, pull=pull, log_level='CRITICAL', start_polling=False)
+            self.assertEqual(GPIO.setups[-1], (4, GPIO.IN, pud, -1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import unittest
+from time import monotonic_ns, sleep
+from unittest import mock
+
+import sbc_gpio
+from sbc_gpio import EVENT, PULL
+from sbc_gpio.gpio_libs import sim
+from sbc_gpio.gpio_libs.sim import SIMULATOR
+from sbc_gpio.gpio_libs._executor import CallbackExecutor, INLINE
+
+
+def wait_for(condition, timeout=1.0):
+    deadline = monotonic_ns() + int(timeout * 1e9)
+    while not condition() and monotonic_ns() < deadline:
+        sleep(0.001)
+
+
+class simTest(unittest.TestCase):
+    def setUp(self):
+        SIMULATOR.reset()
+
+    def test_1_wiring(self):
+        SIMULATOR.load_wiring('0-1:0-2,1-3')
+        self.assertEqual(SIMULATOR.wiring, {(0, 1): [(0, 2), (1, 3)]})
+        gpio_in = sim.GpioIn(2, 0, log_level='CRITICAL', pull=PULL.UP, start_polling=False)
+        # undriven input follows the bias, then the wired output
+        self.assertEqual(gpio_in.state, 1)
+        gpio_out = sim.GpioOut(1, 0, log_level='CRITICAL')
+        self.assertEqual((gpio_in.state, SIMULATOR.line((1, 3)).level), (0, 0))
+        gpio_out.set_high()
+        self.assertEqual((gpio_in.state, SIMULATOR.line((1, 3)).level), (1, 1))
+        self.assertRaises(OSError, sim.GpioOut, 1, 0, log_level='CRITICAL')
+        gpio_out.close()
+        gpio_in.close()
+        self.assertEqual(SIMULATOR.stats()['requested'], 0)
+
+    def test_2_groups(self):
+        SIMULATOR.connect((0, 4), (1, 4))
+        SIMULATOR.connect((0, 5), (1, 5))
+        out_group = sim.GpioOutGroup([(0, 4), (0, 5)], log_level='CRITICAL', initial_value=0b10)
+        in_group = sim.GpioInGroup([(1, 4), (1, 5)], log_level='CRITICAL')
+        self.assertEqual(in_group.read(), 0b10)
+        out_group.set_values(0b01, 0b01)
+        self.assertEqual((in_group.read(), out_group._read_value()), (0b11, 0b11))
+        out_group.close()
+        in_group.close()
+
+    def test_3_edges(self):
+        SIMULATOR.connect((0, 6), (0, 7))
+        received = []
+        gpio_in = sim.GpioIn(7, 0, log_level='CRITICAL', debounce_ms=0, callback=lambda **kwargs: received.append(kwargs))
+        gpio_in.executor = CallbackExecutor(mode=INLINE, log_level='CRITICAL')
+        gpio_out = sim.GpioOut(6, 0, log_level='CRITICAL')
+        start_ns = monotonic_ns()
+        gpio_out.set_high()
+        gpio_out.set_low()
+        wait_for(lambda: len(received) == 2)
+        self.assertEqual([kwargs['event'] for kwargs in received], [EVENT.RISING, EVENT.FALLING])
+        # synthetic monotonic timestamps (the callback timestamp is in seconds)
+        self.assertTrue(all(start_ns / 1e9 - 1e-6 <= kwargs['timestamp'] <= monotonic_ns() / 1e9 for kwargs in received))
+        self.assertEqual((gpio_in.state_version, gpio_in.state), (2, 0))
+        gpio_out.close()
+        gpio_in.close()
+
+    def test_4_bounce_and_noise(self):
+        SIMULATOR.connect((0, 8), (0, 9))
+        SIMULATOR.set_bounce((0, 9), edges=2, interval_us=10)
+        gpio_in = sim.GpioIn(9, 0, log_level='CRITICAL', debounce_ms=0)
+        gpio_in.enable_event_ring(64)
+        gpio_out = sim.GpioOut(8, 0, log_level='CRITICAL')
+        gpio_out.set_high()
+        SIMULATOR.inject_noise((0, 9), pulses=1, width_us=1)
+        wait_for(lambda: gpio_in.state_version == 7)
+        events = gpio_in.drain_events()
+        self.assertEqual([edge for _, edge, _ in events], [EVENT.RISING, EVENT.FALLING, EVENT.RISING, EVENT.FALLING, EVENT.RISING,
+                                                            EVENT.FALLING, EVENT.RISING])
+        self.assertEqual([seqno for _, _, seqno in events], list(range(1, 8)))
+        self.assertEqual(events[1][0] - events[0][0], 10_000)
+        self.assertEqual(gpio_in.state, 1)
+        gpio_out.close()
+        gpio_in.close()
+
+    def test_5_platform(self):
+        with mock.patch.dict(os.environ, {sbc_gpio.PLATFORM_SIM_ENV: '1'}):
+            platform = sbc_gpio.SBCPlatform(log_level='CRITICAL', use_cache=False)
+        self.assertEqual(platform.model, 'sim')
+        self.assertEqual(platform.gpio_tuple('GPIO40'), (1, 8))
+        gpio_out = platform.get_gpio_out(40, log_level='CRITICAL', initial_state=1)
+        self.assertEqual(SIMULATOR.line((1, 8)).level, 1)
+        gpio_out.close()
+        # gpio ids from a generator (only iterated once)
+        out_group = platform.get_gpio_out_group((gpio for gpio in (41, (1, 10), 'GPIO43')), log_level='CRITICAL', initial_value=0b101)
+        self.assertEqual(out_group.gpio_tuples, ((1, 9), (1, 10), (1, 11)))
+        self.assertEqual([SIMULATOR.line((1, pin)).level for pin in (9, 10, 11)], [1, 0, 1])
+        out_group.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
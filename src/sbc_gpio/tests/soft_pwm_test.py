@@ -0,0 +1,69 @@
+import sys
+import unittest
+from time import sleep, monotonic_ns
+
+from sbc_gpio.gpio_libs._generic_gpio import GpioOutGroup
+from sbc_gpio.soft_pwm import SoftPWM
+
+
+class RecordingGroup(GpioOutGroup):
+    ''' Output group that records each write as (monotonic ns, bits, mask) '''
+    def __init__(self, count):
+        super().__init__(name='recording', log_level='CRITICAL', pull=None)
+        self.gpio_tuples = tuple((0, line) for line in range(count))
+        self.writes = []
+
+    def set_value(self, value:int):
+        self._value = value
+
+    def set_values(self, bits:int, mask:int):
+        self.writes.append((monotonic_ns(), bits, mask))
+        super().set_values(bits, mask)
+
+
+class softPwmTest(unittest.TestCase):
+    def test_1_validation(self):
+        pwm = SoftPWM(group=RecordingGroup(2), log_level='CRITICAL')
+        self.assertRaises(ValueError, pwm.set_duty_cycle, 0, 1.5)
+        self.assertRaises(ValueError, pwm.set_frequency, 1, 0)
+        self.assertRaises(ValueError, pwm.set_duty_cycle, 2, 0.5)
+        pwm.set_frequency(1, 50)
+        pwm.set_duty_cycle(1, 0.5)
+        self.assertEqual((pwm.frequency(1), pwm.duty_cycle(1)), (50, 0.5))
+        # missing platform or group, the engine is deleted without errors
+        unraisable, saved_hook = [], sys.unraisablehook
+        sys.unraisablehook = unraisable.append
+        try:
+            self.assertRaises(ValueError, SoftPWM, log_level='CRITICAL')
+        finally:
+            sys.unraisablehook = saved_hook
+        self.assertEqual(unraisable, [])
+
+    def test_2_bulk_writes(self):
+        group = RecordingGroup(8)
+        pwm = SoftPWM(group=group, frequency_hz=100, duty_cycle=0.5, log_level='CRITICAL')
+        pwm.set_duty_cycle(7, 0.0)
+        pwm.start()
+        sleep(0.105)
+        pwm.stop()
+        stats = pwm.stats()
+        # channels with the same frequency and duty share one write per edge, channel 7 is never written high
+        self.assertTrue(all(mask in (0x7f, 0xff) for _, _, mask in group.writes[:-1]))
+        self.assertTrue(all(bits & 0x80 == 0 for _, bits, _ in group.writes))
+        self.assertGreaterEqual(stats['writes'], 18)
+        self.assertEqual(stats['edges'], stats['writes'] * 7)
+        self.assertEqual(group.state, 0)
+
+    def test_3_short_pulse(self):
+        # 10us on time, less than the 20us coalesce window -> the off edge is in the same batch and the line stays low
+        group = RecordingGroup(2)
+        pwm = SoftPWM(group=group, frequency_hz=100, duty_cycle=0.001, log_level='CRITICAL')
+        pwm.set_duty_cycle(1, 0.5)
+        pwm.start()
+        sleep(0.055)
+        state = group.state
+        pwm.stop()
+        self.assertEqual(state & 0b01, 0)
+        self.assertTrue(all(bits & 0b01 == 0 for _, bits, _ in group.writes))
+        # channel 1 is still switched
+        self.assertTrue(any(bits & 0b10 for _, bits, _ in group.writes))
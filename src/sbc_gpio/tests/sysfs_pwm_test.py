@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from sbc_gpio.gpio_libs import sysfs_pwm
+from sbc_gpio.tests.pin_map_test import get_platform
+
+
+class sysfsPwmTest(unittest.TestCase):
+    ''' Fake /sys/class/pwm tree with one Raspberry Pi 4 PWM controller (2 channels, channel 0 already exported) '''
+    def setUp(self):
+        self.sysfs = tempfile.TemporaryDirectory()
+        self.saved = sysfs_pwm.PWM_SYSFS_DIR, sysfs_pwm.EXPORT_TIMEOUT
+        sysfs_pwm.PWM_SYSFS_DIR = os.path.join(self.sysfs.name, 'class', 'pwm')
+        device_dir = os.path.join(self.sysfs.name, 'devices', 'fe20c000.pwm')
+        self.chip_dir = os.path.join(sysfs_pwm.PWM_SYSFS_DIR, 'pwmchip2')
+        os.makedirs(device_dir)
+        os.makedirs(os.path.join(self.chip_dir, 'pwm0'))
+        os.symlink(device_dir, os.path.join(self.chip_dir, 'device'))
+        self._write('npwm', '2')
+        for attribute in ('export', 'unexport', 'pwm0/period', 'pwm0/duty_cycle', 'pwm0/enable', 'pwm0/polarity'):
+            self._write(attribute, '0')
+
+    def tearDown(self):
+        sysfs_pwm.PWM_SYSFS_DIR, sysfs_pwm.EXPORT_TIMEOUT = self.saved
+        self.sysfs.cleanup()
+
+    def _write(self, attribute, value):
+        with open(os.path.join(self.chip_dir, attribute), 'w', encoding='utf-8') as attribute_file:
+            attribute_file.write(value)
+
+    def _read(self, attribute):
+        with open(os.path.join(self.chip_dir, attribute), 'r', encoding='utf-8') as attribute_file:
+            return attribute_file.read()
+
+    def test_1_chips(self):
+        self.assertEqual(sysfs_pwm.pwm_chips(), {'pwmchip2': {'device': 'fe20c000.pwm', 'npwm': 2}})
+        self.assertEqual(sysfs_pwm.find_chip('fe20c000.pwm'), 'pwmchip2')
+        self.assertEqual(sysfs_pwm.find_chip(2), 'pwmchip2')
+        self.assertRaises(ValueError, sysfs_pwm.find_chip, 'fe20d000.pwm')
+
+    def test_2_pwm(self):
+        pwm = sysfs_pwm.PWM('fe20c000.pwm', 0, frequency_hz=1000, log_level='CRITICAL')
+        self.assertEqual((self._read('pwm0/period'), pwm.period_ns), ('1000000', 1_000_000))
+        pwm.set_duty_cycle(0.25)
+        pwm.enable()
+        self.assertEqual((self._read('pwm0/duty_cycle'), self._read('pwm0/enable'), pwm.enabled), ('250000', '1', True))
+        # a higher frequency keeps the duty cycle ratio
+        pwm.set_frequency(2000)
+        self.assertEqual((pwm.period_ns, pwm.duty_ns, pwm.duty_cycle), (500_000, 125_000, 0.25))
+        self.assertRaises(ValueError, pwm.set_duty_cycle, 1.5)
+        pwm.close()
+        # channel 1 is not exported and the fake kernel does not create it
+        sysfs_pwm.EXPORT_TIMEOUT = 0.1
+        self.assertRaises(FileNotFoundError, sysfs_pwm.PWM, 'pwmchip2', 1, log_level='CRITICAL')
+        self.assertEqual(self._read('export'), '1')
+
+    def test_3_platform(self):
+        platform = get_platform('rpi', 0)
+        self.assertEqual(platform.pwm_channel('PWM1'), ('fe20c000.pwm', 1))
+        self.assertEqual(platform.pwm_channel('PIN12'), ('fe20c000.pwm', 0))
+        self.assertEqual(platform.pwm_channel(('pwmchip0', 1)), ('pwmchip0', 1))
+        self.assertRaises(ValueError, platform.pwm_channel, 17)
+        pwm = platform.get_pwm(18, log_level='CRITICAL')
+        self.assertEqual((pwm.chip, pwm.channel), ('pwmchip2', 0))
+        pwm.close()
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from ctypes import sizeof
+
+from sbc_gpio import EVENT
+from sbc_gpio.gpio_libs import _uapi, lib_uapi
+
+
+class FakeIoctl:
+    ''' Fake GPIO uAPI v2 ioctl layer.  Line requests return a pipe so edge events can be written to the request fd '''
+    def __init__(self):
+        self.requests, self.values, self.configs, self.pipes, self.writes = [], {}, [], [], 0
+
+    def __call__(self, fd, request, arg):
+        if request == _uapi.GPIO_V2_GET_LINE_IOCTL:
+            read_fd, write_fd = os.pipe()
+            self.pipes.append((read_fd, write_fd))
+            arg.fd = read_fd
+            self.requests.append(arg)
+            output_values = [attr.attr.value.values for attr in arg.config.attrs[:arg.config.num_attrs]
+                             if attr.attr.id == _uapi.GPIO_V2_LINE_ATTR_ID_OUTPUT_VALUES]
+            self.values[read_fd] = output_values[0] if len(output_values) > 0 else 0
+        elif request == _uapi.GPIO_V2_LINE_GET_VALUES_IOCTL:
+            arg.bits = self.values[fd] & arg.mask
+        elif request == _uapi.GPIO_V2_LINE_SET_VALUES_IOCTL:
+            self.values[fd] = (self.values[fd] & ~arg.mask) | (arg.bits & arg.mask)
+            self.writes += 1
+        elif request == _uapi.GPIO_V2_LINE_SET_CONFIG_IOCTL:
+            debounce_us = [attr.attr.value.debounce_period_us for attr in arg.attrs[:arg.num_attrs] if attr.attr.id == _uapi.GPIO_V2_LINE_ATTR_ID_DEBOUNCE]
+            self.configs.append((arg.flags, debounce_us[0] if len(debounce_us) > 0 else 0))
+        else:
+            raise OSError(25, 'Inappropriate ioctl for device')
+        return 0
+
+
+class uapiTest(unittest.TestCase):
+    def setUp(self):
+        self.dev_dir = tempfile.TemporaryDirectory()
+        open(os.path.join(self.dev_dir.name, 'gpiochip0'), 'w').close()
+        self.saved = _uapi.ioctl, _uapi.GPIO_DEV_DIR
+        self.fake = FakeIoctl()
+        _uapi.ioctl, _uapi.GPIO_DEV_DIR = self.fake, self.dev_dir.name
+
+    def tearDown(self):
+        _uapi.ioctl, _uapi.GPIO_DEV_DIR = self.saved
+        for read_fd, write_fd in self.fake.pipes:
+            os.close(write_fd)
+        self.dev_dir.cleanup()
+
+    def test_1_struct_layout(self):
+        self.assertEqual(sizeof(_uapi.gpio_v2_line_config), 272)
+        self.assertEqual(sizeof(_uapi.gpio_v2_line_request), 592)
+        self.assertEqual(_uapi.LINE_EVENT.size, 48)
+        self.assertEqual(_uapi.GPIO_V2_GET_LINE_IOCTL, 0xC250B407)
+        self.assertEqual(_uapi.GPIO_V2_LINE_SET_VALUES_IOCTL, 0xC010B40F)
+
+    def test_2_debounce_request(self):
+        line_request = _uapi.LineRequest(0, [17], _uapi.GPIO_V2_LINE_FLAG_INPUT, 'test', debounce_us=5000)
+        request = self.fake.requests[0]
+        self.assertEqual((request.num_lines, request.offsets[0], request.consumer), (1, 17, b'test'))
+        self.assertEqual(request.config.num_attrs, 1)
+        self.assertEqual(request.config.attrs[0].attr.id, _uapi.GPIO_V2_LINE_ATTR_ID_DEBOUNCE)
+        self.assertEqual(request.config.attrs[0].attr.value.debounce_period_us, 5000)
+        os.write(self.fake.pipes[0][1], _uapi.LINE_EVENT.pack(123, _uapi.GPIO_V2_LINE_EVENT_RISING_EDGE, 17, 1, 1)
+                 + _uapi.LINE_EVENT.pack(456, _uapi.GPIO_V2_LINE_EVENT_FALLING_EDGE, 17, 2, 2))
+        self.assertEqual(line_request.read_events(), [(123, 1, 17, 1, 1), (456, 2, 17, 2, 2)])
+        line_request.close()
+
+    def test_3_values(self):
+        line_request = _uapi.LineRequest(0, [3, 4, 5], _uapi.GPIO_V2_LINE_FLAG_OUTPUT, 'test', output_values=0)
+        line_request.set_values(0b101)
+        self.assertEqual(line_request.get_values(), 0b101)
+        line_request.set_values(0b010, mask=0b011)
+        self.assertEqual(line_request.get_values(), 0b110)
+        self.assertEqual(line_request.get_value(), 0)
+        line_request.close()
+
+
+class libUapiTest(unittest.TestCase):
+    def setUp(self):
+        self.dev_dir = tempfile.TemporaryDirectory()
+        for gpio_chip in (0, 1):
+            open(os.path.join(self.dev_dir.name, f'gpiochip{gpio_chip}'), 'w').close()
+        self.saved = _uapi.ioctl, _uapi.GPIO_DEV_DIR
+        self.fake = FakeIoctl()
+        _uapi.ioctl, _uapi.GPIO_DEV_DIR = self.fake, self.dev_dir.name
+
+    def tearDown(self):
+        _uapi.ioctl, _uapi.GPIO_DEV_DIR = self.saved
+        for read_fd, write_fd in self.fake.pipes:
+            os.close(write_fd)
+        self.dev_dir.cleanup()
+
+    def test_1_gpio_out(self):
+        gpio = lib_uapi.GpioOut(17, 0, log_level='CRITICAL', initial_state=1)
+        self.assertEqual(gpio.state, 1)
+        gpio.set_low()
+        self.assertEqual((gpio.state, self.fake.writes), (0, 1))
+        gpio.close()
+
+    def test_2_groups(self):
+        # chip 0 lines are bits 0 and 2 (not contiguous), chip 1 line is bit 1
+        group = lib_uapi.GpioOutGroup([(0, 5), (1, 6), (0, 7)], log_level='CRITICAL', initial_value=0b101)
+        chip0, chip1 = self.fake.requests[0].fd, self.fake.requests[1].fd
+        self.assertEqual((self.fake.values[chip0], self.fake.values[chip1]), (0b11, 0))
+        group.set_value(0b010)
+        self.assertEqual((self.fake.values[chip0], self.fake.values[chip1], self.fake.writes), (0, 1, 2))
+        group.set_values(0b100, 0b100)
+        self.assertEqual((self.fake.values[chip0], group.state, self.fake.writes), (0b10, 0b110, 3))
+        group.close()
+        in_group = lib_uapi.GpioInGroup([(0, 1), (0, 2), (0, 3)], log_level='CRITICAL')
+        self.fake.values[self.fake.requests[2].fd] = 0b110
+        self.assertEqual((in_group.read(), in_group.get_values()), (0b110, [0, 1, 1]))
+        in_group.close()
+
+    def test_3_gpio_in_kernel_debounce(self):
+        received = []
+        gpio = lib_uapi.GpioIn(4, 0, debounce_ms=10, callback=lambda **kwargs: received.append(kwargs), log_level='CRITICAL',
+                               start_polling=False)
+        self.assertTrue(gpio._kernel_debounce)
+        self.assertEqual(self.fake.requests[0].config.attrs[0].attr.value.debounce_period_us, 10000)
+        self.assertFalse(self.fake.requests[0].config.flags & _uapi.GPIO_V2_LINE_FLAG_EVENT_CLOCK_REALTIME)
+        os.write(self.fake.pipes[0][1], _uapi.LINE_EVENT.pack(2_000_000_000, _uapi.GPIO_V2_LINE_EVENT_RISING_EDGE, 4, 1, 1))
+        self.assertEqual(gpio._read_events(), [(EVENT.RISING, 2_000_000_000, 1)])
+        gpio.close()
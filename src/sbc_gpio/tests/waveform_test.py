@@ -0,0 +1,42 @@
+import unittest
+from time import sleep
+
+from sbc_gpio.gpio_libs._generic_gpio import GpioOut
+from sbc_gpio.tests.soft_pwm_test import RecordingGroup
+from sbc_gpio.waveform import Waveform
+
+
+class RecordingOut(GpioOut):
+    def __init__(self):
+        super().__init__(name='recording', log_level='CRITICAL', pull=None)
+        self.writes = []
+
+    def set_high(self):
+        self.writes.append(1)
+
+    def set_low(self):
+        self.writes.append(0)
+
+
+class waveformTest(unittest.TestCase):
+    def test_1_offsets(self):
+        waveform = Waveform([(0, 1), (1000, 0), (2500, 1)])
+        self.assertEqual((list(waveform.offsets), list(waveform.values), waveform.duration_ns), ([0, 1000, 3500], [1, 0, 1], 3500))
+        self.assertRaises(ValueError, Waveform, [(0, 1), (-5, 0)])
+
+    def test_2_gpio_out(self):
+        gpio = RecordingOut()
+        result = gpio.play_waveform([(0, 1), (50_000, 0), (50_000, 1), (50_000, 0)])
+        self.assertEqual((gpio.writes, result.steps, len(result.errors_ns)), ([1, 0, 1, 0], 4, 4))
+        self.assertGreaterEqual(min(result.errors_ns), 0)
+        self.assertGreaterEqual(result.duration_ns, 150_000)
+
+    def test_3_group_stop(self):
+        group = RecordingGroup(4)
+        waveform = group.play_waveform([(0, 0b0101)] + [(20_000_000, step) for step in range(1, 50)], wait=False)
+        self.assertTrue(waveform.playing)
+        sleep(0.03)
+        waveform.stop()
+        # each step after the first writes the step number to the group
+        self.assertTrue(2 <= waveform.result.steps < 50)
+        self.assertEqual(group.state, waveform.result.steps - 1)
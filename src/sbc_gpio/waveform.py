@@ -0,0 +1,108 @@
+'''
+Precomputed waveform playback on a GpioOut or GpioOutGroup.
+
+A waveform is a sequence of (delta_ns, bitmask) steps: wait delta_ns after the previous step, then write the
+bitmask (bit 0 is the GpioOut, or the first gpio of a GpioOutGroup).  The steps are converted once to
+absolute offsets and played from a dedicated thread that sleeps until shortly before each deadline and busy
+waits the rest.  Group steps are a single set_value (one ioctl per chip).  The timing error of each step
+is measured so the caller can check if the waveform was played within tolerance.
+
+Usage:
+    waveform = Waveform([(0, 1), (10_000, 0), (10_000, 1), (20_000, 0)])
+    result = waveform.play(gpio_out)
+    print(result.max_error_ns, list(result.errors_ns))
+'''
+from array import array
+from collections import namedtuple
+from threading import Thread, Event
+from time import monotonic_ns
+from sbc_gpio.gpio_libs._generic_gpio import GpioOut, GpioOutGroup
+from sbc_gpio.gpio_libs._timing import wait_until_ns, SPIN_NS
+
+# errors_ns is an array('q') of (time the write completed - deadline) per step, steps is the number of steps played
+WAVEFORM_RESULT = namedtuple('WAVEFORM_RESULT', ('steps', 'errors_ns', 'max_error_ns', 'mean_error_ns', 'duration_ns'))
+
+
+class Waveform:
+    ''' A sequence of (delta_ns, bitmask) steps converted to absolute offsets from the start of playback '''
+    def __init__(self, steps, spin_us=SPIN_NS // 1000):
+        self.offsets = array('q')
+        self.values = array('Q')
+        offset_ns = 0
+        for delta_ns, bitmask in steps:
+            if delta_ns < 0:
+                raise ValueError(f"Waveform step delta must not be negative, not {delta_ns}")
+            offset_ns += int(delta_ns)
+            self.offsets.append(offset_ns)
+            self.values.append(int(bitmask))
+        self._spin_ns = int(spin_us * 1000)
+        self._thread = None
+        self._stop_event = Event()
+        self.result = None
+
+    def __len__(self):
+        return len(self.offsets)
+
+    @property
+    def duration_ns(self) -> int:
+        ''' Return the time from the start to the last step '''
+        return self.offsets[-1] if len(self.offsets) > 0 else 0
+
+    def play(self, output:GpioOut|GpioOutGroup, wait=True, start_delay_us=500) -> WAVEFORM_RESULT|None:
+        ''' Play the waveform on the output from a dedicated thread.  If wait is True the result is returned when the
+            playback is done, otherwise call wait() for the result.  The first deadline is start_delay_us after the
+            call so the thread is running before the first step '''
+        if self.playing:
+            raise ValueError("Waveform is already playing")
+        if isinstance(output, GpioOutGroup):
+            writes = (output.set_value,)
+        else:
+            writes = (output.set_low, output.set_high)
+        self.result = None
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, args=(writes, monotonic_ns() + int(start_delay_us * 1000)), name='waveform', daemon=True)
+        self._thread.start()
+        return self.wait() if wait else None
+
+    @property
+    def playing(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait(self, timeout:float|None=None) -> WAVEFORM_RESULT|None:
+        ''' Wait for the playback to finish and return the result (None on timeout) '''
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return None
+        return self.result
+
+    def stop(self):
+        ''' Stop the playback, the result has the steps played before the stop '''
+        self._stop_event.set()
+        self.wait()
+
+    def _run(self, writes:tuple, start_ns:int):
+        ''' Playback thread '''
+        offsets, values, spin_ns, stop_event = self.offsets, self.values, self._spin_ns, self._stop_event
+        errors = array('q', bytes(8 * len(offsets)))
+        steps = 0
+        if len(writes) == 1:
+            set_value = writes[0]
+            for offset_ns, value in zip(offsets, values):
+                deadline_ns = start_ns + offset_ns
+                if not wait_until_ns(deadline_ns, spin_ns, stop_event):
+                    break
+                set_value(value)
+                errors[steps] = monotonic_ns() - deadline_ns
+                steps += 1
+        else:
+            for offset_ns, value in zip(offsets, values):
+                deadline_ns = start_ns + offset_ns
+                if not wait_until_ns(deadline_ns, spin_ns, stop_event):
+                    break
+                writes[value & 1]()
+                errors[steps] = monotonic_ns() - deadline_ns
+                steps += 1
+        end_ns = monotonic_ns()
+        del errors[steps:]
+        self.result = WAVEFORM_RESULT(steps, errors, max(errors) if steps else 0, sum(errors) // steps if steps else 0, end_ns - start_ns)